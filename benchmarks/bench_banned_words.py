@@ -0,0 +1,52 @@
+"""Benchmark du détecteur de mots interdits
+
+Compare la boucle historique (un re.search par mot) au détecteur compilé
+pour plusieurs tailles de liste.
+Lancement: PYTHONPATH=src python benchmarks/bench_banned_words.py
+"""
+import random
+import re
+import string
+import time
+
+from utils.matcher import BannedWordMatcher
+
+LIST_SIZES = [10, 100, 1000, 5000]
+MESSAGE_COUNT = 2000
+
+def random_word(rng, min_len=3, max_len=10):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_len, max_len)))
+
+def naive_search(words, content):
+    content = content.lower()
+    for word in words:
+        if re.search(rf'\b{re.escape(word)}\b', content):
+            return word
+    return None
+
+def measure(func, messages):
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - start)
+
+def main():
+    rng = random.Random(42)
+    vocabulary = [random_word(rng) for _ in range(20000)]
+    messages = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 40))) for _ in range(MESSAGE_COUNT)]
+
+    print(f"{'mots':>6} | {'naïf (msg/s)':>14} | {'compilé (msg/s)':>16} | {'build (ms)':>10}")
+    for size in LIST_SIZES:
+        words = [random_word(rng) for _ in range(size)]
+        start = time.perf_counter()
+        matcher = BannedWordMatcher(words)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # La boucle naïve est trop lente sur les grandes listes : on l'échantillonne
+        sample = messages if size <= 100 else messages[:200]
+        naive = measure(lambda m: naive_search(words, m), sample)
+        compiled = measure(matcher.search, messages)
+        print(f"{size:>6} | {naive:>14.0f} | {compiled:>16.0f} | {build_ms:>10.1f}")
+
+if __name__ == "__main__":
+    main()
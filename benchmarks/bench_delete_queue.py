@@ -0,0 +1,81 @@
+"""Benchmark des suppressions de modération pendant un raid
+
+Un raid envoie RAID_MESSAGES messages interdits dans un salon en RAID_DURATION
+secondes. Les appels à l'API Discord sont simulés : chaque appel prend
+LATENCY secondes et le salon n'accepte que DELETE_RATE suppressions par
+seconde (limite par salon, ordre de grandeur observé). On compare une
+suppression par message (message.delete()) et la file de suppressions
+groupées (channel.delete_messages, 100 messages par appel).
+Lancement: PYTHONPATH=src python benchmarks/bench_delete_queue.py
+"""
+import asyncio
+import random
+import statistics
+import time
+
+import discord
+
+from utils.delete_queue import BulkDeleteQueue
+
+LATENCY = 0.08
+DELETE_RATE = 5  # Appels de suppression par seconde et par salon
+RAID_MESSAGES = 300
+RAID_DURATION = 3.0
+
+class FakeChannel:
+    def __init__(self):
+        self.id = 1
+        self.calls = 0
+        self._lock = asyncio.Lock()
+        self._last = 0.0
+
+    async def _call(self):
+        # Un appel à la fois, au plus DELETE_RATE par seconde
+        async with self._lock:
+            wait = self._last + 1 / DELETE_RATE - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last = time.monotonic()
+            self.calls += 1
+            await asyncio.sleep(LATENCY)
+
+    async def delete_messages(self, messages, reason=None):
+        await self._call()
+
+class FakeMessage:
+    def __init__(self, message_id, channel):
+        self.id = message_id
+        self.channel = channel
+        self.created_at = discord.utils.utcnow()
+
+    async def delete(self):
+        await self.channel._call()
+
+async def raid(delete):
+    channel = FakeChannel()
+    latencies = []
+    rng = random.Random(42)
+    arrivals = sorted(rng.uniform(0, RAID_DURATION) for _ in range(RAID_MESSAGES))
+
+    async def moderate(message_id, at):
+        await asyncio.sleep(at)
+        started = time.monotonic()
+        await delete(FakeMessage(message_id, channel))
+        latencies.append(time.monotonic() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(moderate(i, at) for i, at in enumerate(arrivals)))
+    total = time.perf_counter() - started
+    latencies.sort()
+    return channel.calls, total, statistics.median(latencies), latencies[int(len(latencies) * 0.9)]
+
+async def main():
+    queue = BulkDeleteQueue()
+    for label, delete in (("message.delete()", lambda m: m.delete()), ("file groupée", queue.delete)):
+        calls, total, median, p90 = await raid(delete)
+        print(f"{label:>17} : {calls:>4} appels, raid nettoyé en {total:5.1f}s, "
+              f"suppression médiane {median * 1000:7.0f} ms, 90e centile {p90 * 1000:7.0f} ms")
+    print(f"file groupée (esquisse) : médiane {queue.latency.quantile(0.5):.0f} ms, 90e centile {queue.latency.quantile(0.9):.0f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
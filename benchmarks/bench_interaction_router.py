@@ -0,0 +1,48 @@
+"""Benchmark du routage des interactions
+
+Compare l'ancienne chaîne de startswith (avec split à chaque branche) à la
+table de routage InteractionRouter, pour des custom_id gérés et étrangers.
+Lancement: PYTHONPATH=src python benchmarks/bench_interaction_router.py
+"""
+import timeit
+
+from utils.router import InteractionRouter
+
+PREFIXES = [
+    'edit_category', 'edit_cat_discord', 'edit_cat_message', 'use_default_message',
+    'custom_message', 'create_ticket', 'close_ticket', 'confirm_close',
+    'cancel_close', 'confirm_delete', 'cancel_delete', 'edit_role'
+]
+
+CUSTOM_IDS = {
+    'premier préfixe': 'edit_category:123456789012345678:support',
+    'dernier préfixe': 'edit_role:123456789012345678',
+    'étranger': 'help_next_page:42',
+}
+
+async def handler(interaction, *args):
+    pass
+
+def startswith_chain(custom_id):
+    if custom_id == "edit_logs":
+        return 'edit_logs', []
+    for prefix in PREFIXES:
+        if custom_id.startswith(prefix + ':'):
+            return prefix, custom_id.split(':')[1:]
+    return None
+
+def main():
+    router = InteractionRouter()
+    router.register('edit_logs', handler)
+    for prefix in PREFIXES:
+        router.register(prefix, handler)
+
+    number = 200000
+    print(f"{'custom_id':>16} | {'startswith (ns)':>15} | {'table (ns)':>10}")
+    for name, custom_id in CUSTOM_IDS.items():
+        chain = timeit.timeit(lambda: startswith_chain(custom_id), number=number) / number * 1e9
+        table = timeit.timeit(lambda: router.resolve(custom_id), number=number) / number * 1e9
+        print(f"{name:>16} | {chain:>15.0f} | {table:>10.0f}")
+
+if __name__ == "__main__":
+    main()
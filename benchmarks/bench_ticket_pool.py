@@ -0,0 +1,99 @@
+"""Benchmark de l'ouverture des tickets avec et sans réserve de salons
+
+Les appels à l'API Discord sont simulés par des attentes (latences ci-dessous,
+ordre de grandeur observé pour un salon avec permissions). Sans réserve, une
+ouverture crée le salon puis envoie le message de bienvenue ; avec la réserve,
+elle ne fait que modifier un salon existant puis envoie le message. La
+réserve est complétée en arrière-plan pendant les ouvertures.
+Lancement: PYTHONPATH=src python benchmarks/bench_ticket_pool.py
+"""
+import asyncio
+import itertools
+import os
+import statistics
+import tempfile
+import time
+
+from utils.ticket_pool import TicketChannelPool
+from utils.ticket_store import TicketStore
+
+CREATE_LATENCY = 0.45  # guild.create_text_channel avec permissions
+EDIT_LATENCY = 0.15    # channel.edit (nom, catégorie et permissions)
+SEND_LATENCY = 0.12    # envoi du message de bienvenue
+OPENINGS = 20
+ARRIVAL = 0.5          # Un ticket toutes les 0,5 s (afflux)
+POOL_SIZE = 5
+
+ids = itertools.count(1)
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+    async def edit(self, **kwargs):
+        await asyncio.sleep(EDIT_LATENCY)
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(SEND_LATENCY)
+
+class FakeGuild:
+    def __init__(self):
+        self.channels = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def create_text_channel(self, **kwargs):
+        await asyncio.sleep(CREATE_LATENCY)
+        channel = FakeChannel(next(ids))
+        self.channels[channel.id] = channel
+        return channel
+
+async def open_ticket(guild, pool):
+    start = time.perf_counter()
+    channel = pool.take(guild, 'panel', 'support') if pool else None
+    if channel is not None:
+        await channel.edit(name="ticket-membre")
+    else:
+        channel = await guild.create_text_channel(name="ticket-membre")
+    if pool:
+        pool.refill('panel', 'support', POOL_SIZE)
+    await channel.send("Bienvenue")
+    return time.perf_counter() - start
+
+async def run(use_pool):
+    guild = FakeGuild()
+    with tempfile.TemporaryDirectory() as directory:
+        store = TicketStore(os.path.join(directory, 'tickets.db'), legacy_path=os.path.join(directory, 'none.json'))
+        store.load()
+        pool = None
+        if use_pool:
+            async def create(panel_id, category_id):
+                return (await guild.create_text_channel(name="ticket-reserve")).id
+            pool = TicketChannelPool(store, create, interval=0.2)
+            pool.refill('panel', 'support', POOL_SIZE)
+            while pool.size('panel', 'support') < POOL_SIZE:
+                await asyncio.sleep(0.05)
+
+        tasks = []
+        for _ in range(OPENINGS):
+            tasks.append(asyncio.create_task(open_ticket(guild, pool)))
+            await asyncio.sleep(ARRIVAL)
+        latencies = await asyncio.gather(*tasks)
+        if pool:
+            pool.cancel()
+            print(f"  réserve : {pool.hits} ouvertures depuis la réserve, {pool.misses} sans")
+        store.close()
+    return latencies
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:>12} | moyenne {statistics.mean(latencies) * 1000:6.0f} ms | p95 {p95 * 1000:6.0f} ms | max {latencies[-1] * 1000:6.0f} ms")
+
+async def main():
+    report("sans réserve", await run(False))
+    report("avec réserve", await run(True))
+
+if __name__ == "__main__":
+    asyncio.run(main())
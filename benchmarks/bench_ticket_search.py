@@ -0,0 +1,57 @@
+"""Benchmark de la recherche dans l'archive des tickets
+
+Archive 20 000 tickets de 10 messages (200 000 messages) puis mesure le
+temps d'une recherche (page de 5 résultats et total) pour un terme rare, un
+terme fréquent et une recherche par préfixe.
+Lancement: PYTHONPATH=src python benchmarks/bench_ticket_search.py
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from utils.ticket_archive import TicketArchive
+
+TICKETS = 20000
+MESSAGES = 10
+WORDS = ("bonjour", "commande", "livraison", "paiement", "erreur", "merci", "compte",
+         "problème", "remboursement", "serveur", "connexion", "facture", "délai", "aide")
+QUERIES = ("commande #1234", "merci", "rembours*")
+
+def messages(index, rng):
+    return [
+        {
+            'content': " ".join(rng.choice(WORDS) for _ in range(12)) + f" commande #{index}",
+            'author': f"membre{rng.randrange(500)}",
+            'ts': "2024-01-01 12:00:00",
+            'attachments': []
+        }
+        for _ in range(MESSAGES)
+    ]
+
+async def main():
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        archive = TicketArchive(os.path.join(directory, 'archive.db'))
+        start = time.perf_counter()
+        for index in range(TICKETS):
+            await archive.add({
+                'channel_id': index, 'channel_name': f"ticket-{index}", 'user_id': index,
+                'category_id': rng.choice(("support", "bug", "commande", "autre")), 'priority': None,
+                'created_at': None, 'closed_at': "2024-01-01T12:00:00", 'closed_by': None
+            }, messages(index, rng))
+        print(f"indexation : {TICKETS} tickets en {time.perf_counter() - start:.1f}s")
+
+        for query in QUERIES:
+            await archive.search(query)  # Cache SQLite chaud
+            start = time.perf_counter()
+            runs = 20
+            for _ in range(runs):
+                total, hits = await archive.search(query, limit=5, offset=5)
+            elapsed = (time.perf_counter() - start) / runs * 1000
+            print(f"{query!r:>18} : {total:>7} résultats, {elapsed:6.1f} ms par page")
+        archive.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
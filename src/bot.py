@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import logging
 import os
 from dotenv import load_dotenv
@@ -7,7 +7,11 @@ from cogs.moderation import ModerationCog
 from cogs.config import ConfigCog
 from cogs.help import HelpCog
 from cogs.tickets import TicketsCog
-from utils.config import load_config, save_config, DEFAULT_CONFIG
+from utils.config import load_config, save_config, ConfigWriter, DEFAULT_CONFIG
+from utils.matcher import BannedWordMatcher
+from utils.member_counter import MemberCounter
+from utils.pending_input import PendingInputRegistry
+from utils.timer_scheduler import TimerScheduler
 
 # Configuration du logging
 logging.basicConfig(
@@ -21,9 +25,12 @@ load_dotenv()
 
 class AutoModBot(commands.Bot):
     def __init__(self):
+        config = load_config()
         intents = discord.Intents.default()
         intents.message_content = True
         intents.members = True
+        # Intent privilégié, optionnel : répartition des tickets entre les membres du staff en ligne
+        intents.presences = bool(config.get("staff_presence"))
         intents.guilds = True  # Pour avoir accès aux informations du serveur
         
         super().__init__(
@@ -32,8 +39,14 @@ class AutoModBot(commands.Bot):
             help_command=None
         )
         
-        self.config = load_config()
+        self.config = config
+        self.config_writer = ConfigWriter(self.config)
         self.logger = logger
+        self.word_matcher = BannedWordMatcher(self.config["banned_words"])
+        self.member_counter = MemberCounter()
+        self.pending_inputs = PendingInputRegistry()  # Réponses attendues par les assistants
+        self.timers = TimerScheduler('data/timers.db')  # Actions différées, conservées au redémarrage
+        self.timers.register('delete_message', self.delete_message_now)
 
     async def setup_hook(self):
         # Chargement des cogs
@@ -49,9 +62,15 @@ class AutoModBot(commands.Bot):
         except Exception as e:
             self.logger.error(f"Erreur lors de la synchronisation des commandes slash: {e}")
 
+        self.verify_member_counts.start()
+
     async def on_ready(self):
         self.logger.info(f'Connecté en tant que {self.user.name} ({self.user.id})')
         self.logger.info('------')
+
+        for guild in self.guilds:
+            self.member_counter.seed(guild)
+        self.timers.start()
         
         # Définition du statut
         await self.change_presence(
@@ -61,6 +80,73 @@ class AutoModBot(commands.Bot):
             )
         )
 
+    # Les compteurs sont mis à jour ici, sans await : l'événement du bot est
+    # planifié avant ceux des cogs, qui lisent donc des valeurs déjà à jour.
+    async def on_guild_available(self, guild):
+        self.member_counter.seed(guild)
+
+    async def on_guild_join(self, guild):
+        self.member_counter.seed(guild)
+
+    async def on_guild_remove(self, guild):
+        self.member_counter.forget(guild)
+
+    async def on_member_join(self, member):
+        self.member_counter.member_joined(member)
+
+    async def on_member_remove(self, member):
+        self.member_counter.member_left(member)
+
+    async def on_member_update(self, before, after):
+        self.member_counter.member_updated(before, after)
+
+    async def on_message(self, message):
+        self.pending_inputs.dispatch(message)
+        await self.process_commands(message)
+
+    @tasks.loop(minutes=30)
+    async def verify_member_counts(self):
+        """Contrôle périodique des compteurs par rapport à guild.member_count"""
+        for guild in self.guilds:
+            if not self.member_counter.verify(guild):
+                self.logger.warning(f"Compteurs de membres recalculés pour {guild.name}")
+
+    @verify_member_counts.before_loop
+    async def before_verify_member_counts(self):
+        await self.wait_until_ready()
+
+    async def close(self):
+        # Écriture des modifications de configuration en attente avant l'arrêt
+        try:
+            await self.config_writer.flush()
+        finally:
+            await super().close()
+            self.timers.close()
+
+    def delete_later(self, delay: float, message: discord.Message = None,
+                     interaction: discord.Interaction = None, message_id: int = None) -> str:
+        """Programme la suppression d'un message
+
+        Soit un message de salon, soit un message (éphémère) d'une interaction,
+        supprimé avec le jeton de l'interaction (valable 15 minutes).
+        """
+        if interaction is not None:
+            payload = {'application_id': interaction.application_id, 'token': interaction.token, 'message_id': message_id}
+        else:
+            payload = {'channel_id': message.channel.id, 'message_id': message.id}
+        return self.timers.schedule('delete_message', delay, payload)
+
+    async def delete_message_now(self, payload: dict):
+        try:
+            if 'token' in payload:
+                webhook = discord.Webhook.partial(payload['application_id'], payload['token'], client=self)
+                await webhook.delete_message(payload['message_id'])
+            else:
+                channel = self.get_partial_messageable(payload['channel_id'])
+                await channel.get_partial_message(payload['message_id']).delete()
+        except (discord.NotFound, discord.Forbidden):
+            pass
+
     def is_admin(self, user: discord.Member) -> bool:
         """Vérifie si un utilisateur est admin"""
         if self.config["admin_role_id"]:
@@ -1,11 +1,15 @@
 import discord
 from discord.ext import commands
-from src.utils.config import save_config
+from src.utils.stats_scheduler import StatsRenameScheduler
 
 class ConfigCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config = bot.config
+        self.stats_scheduler = StatsRenameScheduler()
+
+    def cog_unload(self):
+        self.stats_scheduler.cancel()
 
     @commands.command(name="set_owner")
     async def set_owner(self, ctx, user: discord.User):
@@ -13,7 +17,7 @@ class ConfigCog(commands.Cog):
         # Vérifier si l'utilisateur est déjà propriétaire ou si c'est le premier propriétaire
         if self.config["owner_id"] is None or ctx.author.id == self.config["owner_id"]:
             self.config["owner_id"] = user.id
-            save_config(self.config)
+            self.bot.config_writer.save()
             
             embed = discord.Embed(
                 title="👑 Propriétaire Défini",
@@ -32,7 +36,7 @@ class ConfigCog(commands.Cog):
         # Vérifier si l'utilisateur est propriétaire ou admin
         if ctx.author.id == self.config["owner_id"] or ctx.author.guild_permissions.administrator:
             self.config["admin_role_id"] = role.id
-            save_config(self.config)
+            self.bot.config_writer.save()
             
             embed = discord.Embed(
                 title="🔧 Rôle Admin Défini",
@@ -50,7 +54,7 @@ class ConfigCog(commands.Cog):
     async def set_status(self, ctx, *, status: str):
         """Définit le statut du bot"""
         self.config["status"] = status
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         await self.bot.change_presence(
             activity=discord.Activity(
@@ -78,7 +82,8 @@ class ConfigCog(commands.Cog):
             return
         
         self.config["banned_words"].append(word)
-        save_config(self.config)
+        self.bot.word_matcher.rebuild(self.config["banned_words"])
+        self.bot.config_writer.save()
         
         embed = discord.Embed(
             title="✅ Mot Ajouté",
@@ -99,7 +104,8 @@ class ConfigCog(commands.Cog):
             return
         
         self.config["banned_words"].remove(word)
-        save_config(self.config)
+        self.bot.word_matcher.rebuild(self.config["banned_words"])
+        self.bot.config_writer.save()
         
         embed = discord.Embed(
             title="❌ Mot Retiré",
@@ -133,7 +139,7 @@ class ConfigCog(commands.Cog):
     async def set_log_channel(self, ctx, channel: discord.TextChannel):
         """Définit le canal de logs"""
         self.config["log_channel_id"] = channel.id
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         embed = discord.Embed(
             title="📝 Canal de Logs Défini",
@@ -198,7 +204,7 @@ class ConfigCog(commands.Cog):
             return
             
         self.config["auto_reactions"][channel_id].append(emoji)
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         embed = discord.Embed(
             title="✅ Réaction Ajoutée",
@@ -236,7 +242,7 @@ class ConfigCog(commands.Cog):
         if not self.config["auto_reactions"][channel_id]:
             del self.config["auto_reactions"][channel_id]
             
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         embed = discord.Embed(
             title="❌ Réaction Retirée",
@@ -257,7 +263,8 @@ class ConfigCog(commands.Cog):
             
         embed = discord.Embed(
             title="📝 Réactions Automatiques",
-            description="Voici la liste des réactions automatiques configurées :",
+            description="Voici la liste des réactions automatiques configurées :\n"
+                        f"Probabilité de réaction : **{self.config['auto_reaction_chance'] * 100:g}%**",
             color=discord.Color.blue()
         )
         
@@ -270,6 +277,32 @@ class ConfigCog(commands.Cog):
                     inline=False
                 )
         
+        moderation = self.bot.get_cog("ModerationCog")
+        if moderation is not None:
+            reactions = moderation.reactions
+            embed.set_footer(text=f"Auto Mod Bot • {reactions.reacted} réactions ajoutées, "
+                                  f"{reactions.pending} messages en attente, {reactions.dropped} abandonnés")
+        else:
+            embed.set_footer(text="Auto Mod Bot")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="set_reaction_chance")
+    @commands.has_permissions(administrator=True)
+    async def set_reaction_chance(self, ctx, percentage: float):
+        """Définit la probabilité qu'un message reçoive les réactions automatiques
+        Exemple: ?set_reaction_chance 30"""
+        if not 0 <= percentage <= 100:
+            await ctx.send("❌ Le pourcentage doit être compris entre 0 et 100.")
+            return
+
+        self.config["auto_reaction_chance"] = percentage / 100
+        self.bot.config_writer.save()
+
+        embed = discord.Embed(
+            title="🎲 Probabilité de Réaction",
+            description=f"Les réactions automatiques sont ajoutées à **{percentage:g}%** des messages.",
+            color=discord.Color.green()
+        )
         embed.set_footer(text="Auto Mod Bot")
         await ctx.send(embed=embed)
 
@@ -280,7 +313,7 @@ class ConfigCog(commands.Cog):
         Exemple: ?set_welcome_channel #bienvenue
         """
         self.config["welcome_channel_id"] = channel.id
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         embed = discord.Embed(
             title="✅ Salon de Bienvenue Défini",
@@ -299,12 +332,12 @@ class ConfigCog(commands.Cog):
         Exemple: ?set_welcome_message Bienvenue {member.mention} sur le serveur ! 🎉 Nous sommes maintenant {member_count} membres !
         """
         self.config["welcome_message"] = message
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         # Créer un exemple avec les variables remplacées
         example = message.format(
             member=ctx.author,
-            member_count=len(ctx.guild.members)
+            member_count=self.bot.member_counter.humans(ctx.guild)
         )
         
         embed = discord.Embed(
@@ -326,12 +359,12 @@ class ConfigCog(commands.Cog):
         Exemple: ?set_goodbye_message Au revoir {member.name} ! 😢 Nous sommes maintenant {member_count} membres.
         """
         self.config["goodbye_message"] = message
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         # Créer un exemple avec les variables remplacées
         example = message.format(
             member=ctx.author,
-            member_count=len(ctx.guild.members)
+            member_count=self.bot.member_counter.humans(ctx.guild)
         )
         
         embed = discord.Embed(
@@ -394,12 +427,12 @@ class ConfigCog(commands.Cog):
         # Si aucun salon n'est spécifié, on désactive le compteur
         if channel is None:
             self.config["stats_channels"][stat_type] = None
-            save_config(self.config)
+            self.bot.config_writer.save()
             await ctx.send(f"✅ Compteur {stat_type} désactivé.")
             return
             
         self.config["stats_channels"][stat_type] = channel.id
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         # Mise à jour immédiate du compteur
         await self._update_stats_channel(stat_type)
@@ -430,7 +463,7 @@ class ConfigCog(commands.Cog):
             return
             
         self.config["stats_format"][stat_type] = format_text
-        save_config(self.config)
+        self.bot.config_writer.save()
         
         # Mise à jour immédiate du compteur
         await self._update_stats_channel(stat_type)
@@ -457,12 +490,13 @@ class ConfigCog(commands.Cog):
         guild = channel.guild
         count = 0
         
+        counter = self.bot.member_counter
         if stat_type == "members":
-            count = len([m for m in guild.members if not m.bot])
+            count = counter.humans(guild)
         elif stat_type == "bots":
-            count = len([m for m in guild.members if m.bot])
+            count = counter.bots(guild)
         elif stat_type == "total":
-            count = len(guild.members)
+            count = counter.total(guild)
         elif stat_type == "channels":
             count = len(guild.channels)
         elif stat_type == "roles":
@@ -470,12 +504,8 @@ class ConfigCog(commands.Cog):
             
         new_name = self.config["stats_format"][stat_type].format(count=count)
         
-        try:
-            await channel.edit(name=new_name)
-        except discord.Forbidden:
-            self.bot.logger.error(f"Impossible de modifier le nom du salon {channel.name}")
-        except discord.HTTPException as e:
-            self.bot.logger.error(f"Erreur lors de la modification du salon {channel.name}: {e}")
+        # Renommage regroupé et limité par salon (quota Discord)
+        self.stats_scheduler.request(channel, new_name)
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
@@ -509,6 +539,47 @@ class ConfigCog(commands.Cog):
         """Met à jour le compteur de rôles quand un rôle est supprimé"""
         await self._update_stats_channel("roles")
 
+    @commands.command(name="stats_queue")
+    @commands.has_permissions(administrator=True)
+    async def stats_queue(self, ctx):
+        """Affiche l'état de la file des renommages des compteurs"""
+        scheduler = self.stats_scheduler
+        
+        embed = discord.Embed(
+            title="📊 File des Compteurs",
+            description="Renommages des salons de statistiques",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Demandés", value=str(scheduler.requested))
+        embed.add_field(name="Appliqués", value=str(scheduler.applied))
+        embed.add_field(name="Regroupés", value=str(scheduler.coalesced))
+        embed.add_field(name="Ignorés (nom inchangé)", value=str(scheduler.skipped))
+        embed.add_field(name="En attente", value=str(scheduler.pending))
+        embed.set_footer(text="Auto Mod Bot")
+        
+        await ctx.send(embed=embed)
+
+    @commands.command(name="timers")
+    @commands.has_permissions(administrator=True)
+    async def timers(self, ctx):
+        """Affiche la file des actions différées (suppressions, expirations...)"""
+        timers = self.bot.timers
+        depth = timers.depth()
+
+        embed = discord.Embed(
+            title="⏱️ Actions Différées",
+            description="\n".join(f"`{action}` : {count}" for action, count in sorted(depth.items())) or "Aucune action en attente.",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="En attente", value=str(len(timers)))
+        embed.add_field(name="Retard actuel", value=f"{timers.lag:.1f}s")
+        embed.add_field(name="Dernier retard", value=f"{timers.last_lag:.2f}s")
+        embed.add_field(name="Exécutées", value=str(timers.fired))
+        embed.add_field(name="Échecs", value=str(timers.failed))
+        embed.set_footer(text="Auto Mod Bot")
+
+        await ctx.send(embed=embed)
+
     @commands.command(name="setup_stats")
     @commands.has_permissions(administrator=True)
     async def setup_stats(self, ctx):
@@ -546,7 +617,7 @@ class ConfigCog(commands.Cog):
                 await self._update_stats_channel(stat_type)
 
             # Sauvegarde de la configuration
-            save_config(self.config)
+            self.bot.config_writer.save()
 
             # Désactiver la possibilité de se connecter aux salons vocaux
             for channel in category.voice_channels:
@@ -607,7 +678,7 @@ class ConfigCog(commands.Cog):
                 await stats_category.delete()
 
             # Sauvegarde de la configuration
-            save_config(self.config)
+            self.bot.config_writer.save()
 
             embed = discord.Embed(
                 title="✅ Compteurs Supprimés",
@@ -666,7 +737,7 @@ class ConfigCog(commands.Cog):
             
             # Mise à jour de la configuration
             self.config["stats_channels"][stat_type] = None
-            save_config(self.config)
+            self.bot.config_writer.save()
 
             # Vérification si la catégorie est vide
             if channel.category and not channel.category.channels:
@@ -80,6 +80,29 @@ class HelpCog(commands.Cog):
 • Affiche les tickets actifs par niveau de priorité
 • Montre les statistiques globales
 • Permet un suivi des tickets urgents
+""",
+            inline=False
+        )
+        embed_tickets.add_field(
+            name="Transcriptions et Suivi",
+            value="""
+`?ticket_transcript <txt|html>` : Définit le format des transcriptions
+• Fichiers compressés ou découpés s'ils dépassent la taille autorisée
+
+`?ticket_timings` : Durée moyenne des étapes de fermeture des tickets
+
+`?ticket_stats` : Délais de première réponse et de fermeture
+• Médiane et 90e centile par catégorie et priorité (30 jours)
+
+`?ticket_search <mots>` : Recherche dans les tickets fermés
+`?ticket_archive [n°]` : Transcription d'un ticket archivé (compressée, conservée 1 an)
+
+`?ticket_pool #salon [taille]` : Salons pré-créés par catégorie
+• Ouverture instantanée des tickets pendant les afflux
+
+`?ticket_assign #salon [on|off]` : Assignation au staff en ligne le moins chargé
+
+`?ticket_inactivity #salon [heures] [avertissement]` : Fermeture auto des tickets inactifs
 """,
             inline=False
         )
@@ -99,6 +122,7 @@ class HelpCog(commands.Cog):
 `?remove_banned_word <mot>` : Retire un mot de la liste des mots interdits
 `?list_banned_words` : Affiche la liste des mots interdits
 `?list_banned_files` : Affiche la liste des extensions de fichiers interdites
+`?delete_queue_stats` : Délai de suppression des messages interdits
 """,
             inline=False
         )
@@ -154,7 +178,8 @@ class HelpCog(commands.Cog):
 `?add_auto_reaction #salon emoji` : Ajoute une réaction automatique
 `?remove_auto_reaction #salon emoji` : Retire une réaction automatique
 `?list_auto_reactions` : Affiche la liste des réactions automatiques
-`?react_history #salon <nombre>` : Ajoute les réactions aux anciens messages
+`?react_history #salon <nombre>` : Ajoute les réactions aux anciens messages (reprend s'il a été interrompu)
+`?react_history_stop #salon [reset]` : Arrête le rattrapage en cours (reset : repart de zéro)
 """,
             inline=False
         )
@@ -195,6 +220,10 @@ class HelpCog(commands.Cog):
 • Membres en ligne
 • Nombre de salons
 • Nombre de tickets actifs
+
+`?stats_queue` : Affiche la file des renommages des compteurs
+`?timers` : Affiche les actions différées en attente et leur retard
+• Renommages appliqués, regroupés et en attente
 """,
             inline=False
         )
@@ -1,14 +1,39 @@
 import discord
 from discord.ext import commands
-import re
-from datetime import datetime, timedelta
-import random
+from datetime import timedelta
+import asyncio
+import time
+from src.utils.delete_queue import BulkDeleteQueue
+from src.utils.reaction_backfill import MAX_BACKFILL, BackfillCheckpoints, ReactionBackfill
+from src.utils.reaction_dispatcher import ReactionDispatcher
+from src.utils.warnings_store import WarningStore
 
 class ModerationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config = bot.config
-        self.warnings = {}  # Dictionnaire pour stocker les avertissements
+        self.warning_store = WarningStore("data/warnings.db")  # Avertissements persistants
+        bot.timers.register('expire_warnings', self.expire_warnings)
+        # Réactions automatiques en arrière-plan, hors du chemin de la modération
+        self.reactions = ReactionDispatcher(lambda: self.config["auto_reaction_chance"])
+        self.backfill_checkpoints = BackfillCheckpoints('data/react_history.json')
+        self.backfills = {}  # channel_id -> tâche de rattrapage en cours
+        self.deletes = BulkDeleteQueue()  # Suppressions groupées par salon pendant les raids
+
+    async def cog_load(self):
+        # Avertissements expirés pendant l'arrêt du bot, les suivants à leur expiration
+        await self.warning_store.purge(self.config["warning_duration"])
+
+    def cog_unload(self):
+        for task in self.backfills.values():
+            task.cancel()
+        self.reactions.cancel()
+        self.deletes.cancel()
+        self.warning_store.close()
+
+    async def expire_warnings(self, member_id: int):
+        """Supprime les avertissements expirés d'un membre"""
+        await self.warning_store.purge(self.config["warning_duration"], member_id)
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
@@ -16,9 +41,9 @@ class ModerationCog(commands.Cog):
         if self.config["welcome_channel_id"]:
             welcome_channel = self.bot.get_channel(self.config["welcome_channel_id"])
             if welcome_channel:
-                # Calcul précis du nombre de membres
-                real_members = len([m for m in member.guild.members if not m.bot])
-                total_members = len(member.guild.members)
+                # Compteurs tenus à jour par le bot (sans parcourir la liste des membres)
+                real_members = self.bot.member_counter.humans(member.guild)
+                total_members = self.bot.member_counter.total(member.guild)
                 
                 self.bot.logger.info(f"Arrivée de {member.name}")
                 self.bot.logger.info(f"Nombre total de membres (avec bots): {total_members}")
@@ -46,16 +71,15 @@ class ModerationCog(commands.Cog):
         if self.config["welcome_channel_id"]:
             welcome_channel = self.bot.get_channel(self.config["welcome_channel_id"])
             if welcome_channel:
-                # Calcul précis du nombre de membres
-                real_members = len([m for m in member.guild.members if not m.bot])
-                total_members = len(member.guild.members)
+                # Compteurs tenus à jour par le bot, le départ est déjà décompté
+                real_members = self.bot.member_counter.humans(member.guild)
+                total_members = self.bot.member_counter.total(member.guild)
                 
                 self.bot.logger.info(f"Départ de {member.name}")
                 self.bot.logger.info(f"Nombre total de membres (avec bots): {total_members}")
                 self.bot.logger.info(f"Nombre de membres (sans bots): {real_members}")
                 
-                # On soustrait 1 car le membre a déjà quitté
-                member_count = real_members - 1
+                member_count = real_members
                 goodbye_message = self.config["goodbye_message"].format(
                     member=member,
                     member_count=member_count
@@ -73,50 +97,54 @@ class ModerationCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_message(self, message):
-        # Réactions automatiques configurées par salon
-        channel_id = str(message.channel.id)
-        if channel_id in self.config["auto_reactions"]:
-            for emoji in self.config["auto_reactions"][channel_id]:
-                try:
-                    await message.add_reaction(emoji)
-                except discord.Forbidden:
-                    self.bot.logger.error(f"Impossible d'ajouter la réaction {emoji} au message de {message.author}")
+        # Modération d'abord (sauf messages de bots), puis réactions si le message est conservé
+        if message.author.bot or not await self._moderate(message):
+            self.reactions.submit(message, self.config["auto_reactions"].get(str(message.channel.id)))
 
-        # Ne pas faire la modération sur les messages de bots
-        if message.author.bot:
-            return
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        self.reactions.discard(payload.channel_id, payload.message_id)
 
-        # Vérification des mots interdits
-        message_content = message.content.lower()
-        for word in self.config["banned_words"]:
-            if re.search(rf'\b{word}\b', message_content):
-                try:
-                    await message.delete()
-                    embed = discord.Embed(
-                        title="⚠️ Message Supprimé",
-                        description=f"{message.author.mention}, ce type de contenu n'est pas autorisé ici!",
-                        color=discord.Color.red()
-                    )
-                    embed.add_field(name="Mot interdit détecté", value=word)
-                    embed.set_footer(text="Auto Mod Bot")
-                    await message.channel.send(embed=embed, delete_after=10)
-                    
-                    await self._log_action(
-                        f"Message supprimé de {message.author} (ID: {message.author.id})\n"
-                        f"Contenu: {message.content[:100]}...\n"
-                        f"Mot interdit détecté: {word}"
-                    )
-                    
-                    await self._add_warning(message.author)
-                except discord.Forbidden:
-                    self.bot.logger.error(f"Impossible de supprimer le message de {message.author}")
-                return
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        for message_id in payload.message_ids:
+            self.reactions.discard(payload.channel_id, message_id)
+
+    async def _moderate(self, message) -> bool:
+        """Supprime le message s'il enfreint les règles, retourne True dans ce cas"""
+        # Vérification des mots interdits (une seule passe sur le message)
+        word = self.bot.word_matcher.search(message.content)
+        if word:
+            try:
+                async with self.reactions.priority():
+                    await self.deletes.delete(message)
+                embed = discord.Embed(
+                    title="⚠️ Message Supprimé",
+                    description=f"{message.author.mention}, ce type de contenu n'est pas autorisé ici!",
+                    color=discord.Color.red()
+                )
+                embed.add_field(name="Mot interdit détecté", value=word)
+                embed.set_footer(text="Auto Mod Bot")
+                notice = await message.channel.send(embed=embed)
+                self.bot.delete_later(10, notice)
+                
+                await self._log_action(
+                    f"Message supprimé de {message.author} (ID: {message.author.id})\n"
+                    f"Contenu: {message.content[:100]}...\n"
+                    f"Mot interdit détecté: {word}"
+                )
+                
+                await self._add_warning(message.author, f"Mot interdit: {word}")
+            except discord.Forbidden:
+                self.bot.logger.error(f"Impossible de supprimer le message de {message.author}")
+            return True
 
         # Vérification des fichiers interdits
         for attachment in message.attachments:
             if any(attachment.filename.lower().endswith(ext) for ext in self.config["banned_extensions"]):
                 try:
-                    await message.delete()
+                    async with self.reactions.priority():
+                        await self.deletes.delete(message)
                     embed = discord.Embed(
                         title="⚠️ Fichier Supprimé",
                         description=f"{message.author.mention}, l'upload de fichiers {attachment.filename.split('.')[-1]} n'est pas autorisé ici!",
@@ -124,32 +152,30 @@ class ModerationCog(commands.Cog):
                     )
                     embed.add_field(name="Nom du fichier", value=attachment.filename)
                     embed.set_footer(text="Auto Mod Bot")
-                    await message.channel.send(embed=embed, delete_after=10)
+                    notice = await message.channel.send(embed=embed)
+                    self.bot.delete_later(10, notice)
                     
                     await self._log_action(
                         f"Fichier supprimé de {message.author} (ID: {message.author.id})\n"
                         f"Nom du fichier: {attachment.filename}"
                     )
                     
-                    await self._add_warning(message.author)
+                    await self._add_warning(message.author, f"Fichier interdit: {attachment.filename}")
                 except discord.Forbidden:
                     self.bot.logger.error(f"Impossible de supprimer le fichier de {message.author}")
-                return
+                return True
+        return False
 
-    async def _add_warning(self, member: discord.Member):
+    async def _add_warning(self, member: discord.Member, reason: str = None):
         """Ajoute un avertissement à un membre"""
-        if member.id not in self.warnings:
-            self.warnings[member.id] = []
-        
-        self.warnings[member.id].append(datetime.now())
-        
-        # Nettoyage des anciens avertissements
-        self.warnings[member.id] = [
-            w for w in self.warnings[member.id]
-            if datetime.now() - w < timedelta(hours=self.config["warning_duration"])
-        ]
+        await self.warning_store.add(member.id, reason)
+        # Un seul minuteur par membre, repoussé à chaque nouvel avertissement
+        self.bot.timers.schedule(
+            'expire_warnings', self.config["warning_duration"] * 3600, member.id, key=f"warnings:{member.id}"
+        )
         
-        if len(self.warnings[member.id]) >= self.config["max_warnings"]:
+        # Seuls les avertissements de la fenêtre warning_duration sont comptés
+        if await self.warning_store.count(member.id, self.config["warning_duration"]) >= self.config["max_warnings"]:
             if self.config["auto_timeout"]:
                 try:
                     await member.timeout(
@@ -167,7 +193,8 @@ class ModerationCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def warn(self, ctx, member: discord.Member, *, reason: str):
         """Donne un avertissement à un membre"""
-        await self._add_warning(member)
+        await self._add_warning(member, reason)
+        warning_count = await self.warning_store.count(member.id, self.config["warning_duration"])
         
         embed = discord.Embed(
             title="⚠️ Avertissement",
@@ -175,7 +202,7 @@ class ModerationCog(commands.Cog):
             color=discord.Color.orange()
         )
         embed.add_field(name="Raison", value=reason)
-        embed.add_field(name="Avertissements", value=f"{len(self.warnings.get(member.id, []))}/{self.config['max_warnings']}")
+        embed.add_field(name="Avertissements", value=f"{warning_count}/{self.config['max_warnings']}")
         embed.set_footer(text=f"Par {ctx.author}")
         
         await ctx.send(embed=embed)
@@ -189,7 +216,7 @@ class ModerationCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def warnings(self, ctx, member: discord.Member):
         """Affiche les avertissements d'un membre"""
-        member_warnings = self.warnings.get(member.id, [])
+        member_warnings = await self.warning_store.list(member.id, self.config["warning_duration"])
         
         embed = discord.Embed(
             title=f"⚠️ Avertissements de {member}",
@@ -230,74 +257,156 @@ class ModerationCog(commands.Cog):
             )
             embed.set_footer(text=f"Par {ctx.author}")
             
-            await ctx.send(embed=embed, delete_after=5)
+            notice = await ctx.send(embed=embed)
+            self.bot.delete_later(5, notice)
             await self._log_action(
                 f"{ctx.author} a supprimé {len(deleted)} messages dans {ctx.channel.mention}"
             )
         except discord.Forbidden:
             await ctx.send("Je n'ai pas les permissions nécessaires pour supprimer des messages.")
 
+    @commands.command(name="delete_queue_stats")
+    @commands.has_permissions(administrator=True)
+    async def delete_queue_stats(self, ctx):
+        """Affiche le délai de suppression des messages interdits"""
+        deletes = self.deletes
+        embed = discord.Embed(
+            title="🗑️ Suppressions de Modération",
+            description="Délai entre la détection d'un message interdit et sa suppression",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Supprimés", value=str(deletes.deleted))
+        for label, q in (("Médiane", 0.5), ("90e centile", 0.9)):
+            value = deletes.latency.quantile(q)
+            embed.add_field(name=label, value=f"{value:.0f} ms" if value is not None else "-")
+        embed.add_field(name="Suppressions groupées", value=str(deletes.bulk_calls))
+        embed.add_field(name="Suppressions simples", value=str(deletes.single_calls))
+        embed.add_field(name="En attente", value=str(deletes.pending))
+        embed.set_footer(text="Auto Mod Bot")
+
+        await ctx.send(embed=embed)
+
     @commands.command(name="react_history")
     @commands.has_permissions(administrator=True)
     async def react_history(self, ctx, channel: discord.TextChannel, limit: int = 100):
         """Ajoute les réactions configurées aux anciens messages du salon
-        Exemple: ?react_history #salon 100"""
+        Exemple: ?react_history #salon 100
+        Un rattrapage interrompu reprend là où il s'était arrêté."""
         channel_id = str(channel.id)
         if channel_id not in self.config["auto_reactions"]:
             await ctx.send("❌ Aucune réaction n'est configurée pour ce salon.")
             return
 
-        if limit > 1000:
-            await ctx.send("❌ La limite maximale est de 1000 messages.")
+        if limit > MAX_BACKFILL:
+            await ctx.send(f"❌ La limite maximale est de {MAX_BACKFILL} messages.")
             return
 
-        progress_msg = await ctx.send("⏳ Ajout des réactions en cours...")
-        count = 0
-        
-        try:
-            async for message in channel.history(limit=limit):
-                for emoji in self.config["auto_reactions"][channel_id]:
-                    try:
-                        await message.add_reaction(emoji)
-                        count += 1
-                    except discord.Forbidden:
-                        continue
-                    except discord.NotFound:
-                        continue
-        except Exception as e:
-            await progress_msg.edit(content=f"❌ Une erreur est survenue : {str(e)}")
+        task = self.backfills.get(channel.id)
+        if task is not None and not task.done():
+            await ctx.send(f"⏳ Un rattrapage est déjà en cours dans {channel.mention}. `?react_history_stop {channel.mention}` pour l'arrêter.")
+            return
+
+        job = ReactionBackfill(
+            channel, self.config["auto_reactions"][channel_id], limit,
+            self.reactions.react, self.backfill_checkpoints, self.backfill_checkpoints.get(channel.id)
+        )
+        if job.resumed:
+            kept = (
+                f" La limite précédente de {job.limit} messages est conservée ; "
+                f"`?react_history_stop {channel.mention} reset` pour repartir de zéro."
+            ) if job.kept_limit else ""
+            progress_msg = await ctx.send(f"⏳ Reprise du rattrapage ({job.processed}/{job.limit} messages déjà traités)...{kept}")
+        else:
+            progress_msg = await ctx.send("⏳ Ajout des réactions en cours...")
+        task = asyncio.create_task(job.run())
+        self.backfills[channel.id] = task
+
+        # Progression mise à jour toutes les 5 secondes jusqu'à la fin du rattrapage
+        while not task.done():
+            await asyncio.wait([task], timeout=5)
+            if task.done():
+                break
+            eta = f" • fin estimée <t:{int(time.time() + job.eta)}:R>" if job.eta is not None else ""
+            try:
+                await progress_msg.edit(
+                    content=f"⏳ {job.processed}/{job.limit} messages • {job.added} réactions ajoutées • "
+                            f"{job.skipped} déjà présentes{eta}"
+                )
+            except discord.HTTPException:
+                pass
+        self.backfills.pop(channel.id, None)
+
+        if task.cancelled():
+            await progress_msg.edit(
+                content=f"⏹️ Rattrapage arrêté après {job.processed}/{job.limit} messages. "
+                        f"`?react_history {channel.mention}` pour le reprendre."
+            )
+            return
+        if task.exception() is not None:
+            await progress_msg.edit(
+                content=f"❌ Une erreur est survenue : {task.exception()}\n"
+                        f"`?react_history {channel.mention}` pour reprendre le rattrapage."
+            )
             return
 
         embed = discord.Embed(
             title="✅ Réactions Ajoutées",
-            description=f"J'ai ajouté {count} réactions aux {limit} derniers messages dans {channel.mention}",
+            description=f"J'ai ajouté {job.added} réactions aux {job.processed} derniers messages dans {channel.mention}",
             color=discord.Color.green()
         )
+        embed.add_field(name="Déjà présentes", value=str(job.skipped))
+        if job.failed:
+            embed.add_field(name="Échecs", value=str(job.failed))
         embed.set_footer(text=f"Par {ctx.author}")
         
         await progress_msg.delete()
         await ctx.send(embed=embed)
 
+    @commands.command(name="react_history_stop")
+    @commands.has_permissions(administrator=True)
+    async def react_history_stop(self, ctx, channel: discord.TextChannel, option: str = None):
+        """Arrête le rattrapage des réactions d'un salon (il pourra être repris)
+        Exemple: ?react_history_stop #salon reset (oublie aussi le point de reprise)"""
+        reset = option is not None and option.lower() == "reset"
+        task = self.backfills.get(channel.id)
+        running = task is not None and not task.done()
+        if running:
+            task.cancel()
+            if reset:
+                await asyncio.wait([task])  # Le point de reprise est enregistré à l'annulation
+
+        if reset:
+            had_checkpoint = self.backfill_checkpoints.get(channel.id) is not None
+            self.backfill_checkpoints.remove(channel.id)
+            if running or had_checkpoint:
+                await ctx.send(f"🗑️ Rattrapage de {channel.mention} réinitialisé : le prochain `?react_history` repartira des messages les plus récents.")
+            else:
+                await ctx.send(f"❌ Aucun rattrapage en cours ni interrompu dans {channel.mention}.")
+        elif running:
+            await ctx.send(f"⏹️ Rattrapage de {channel.mention} arrêté.")
+        else:
+            await ctx.send(f"❌ Aucun rattrapage en cours dans {channel.mention}.")
+
     @commands.command(name="clearwarns")
     @commands.has_permissions(administrator=True)
     async def clearwarns(self, ctx, member: discord.Member):
         """Supprime tous les avertissements d'un membre"""
-        if member.id in self.warnings:
-            old_count = len(self.warnings[member.id])
-            self.warnings[member.id] = []
+        # Tous les avertissements sont supprimés, y compris ceux déjà expirés
+        removed = await self.warning_store.clear(member.id)
+        if removed:
             
             embed = discord.Embed(
                 title="🗑️ Avertissements Supprimés",
                 description=f"Les avertissements de {member.mention} ont été supprimés.",
                 color=discord.Color.green()
             )
-            embed.add_field(name="Avertissements supprimés", value=str(old_count))
+            embed.add_field(name="Avertissements supprimés", value=str(removed))
             embed.set_footer(text=f"Par {ctx.author}")
             
             await ctx.send(embed=embed)
             await self._log_action(
                 f"Avertissements supprimés pour {member} (ID: {member.id})\n"
-                f"Nombre d'avertissements supprimés: {old_count}\n"
+                f"Nombre d'avertissements supprimés: {removed}\n"
                 f"Par: {ctx.author}"
             )
         else:
@@ -1,11 +1,22 @@
 import discord
-from discord.ext import commands
-import json
-import os
-from datetime import datetime
+from discord.ext import commands, tasks
+from datetime import datetime, timezone
 import asyncio
-import io
 import re
+import time
+from collections import deque
+from src.utils.ticket_store import TicketStore
+from src.utils.router import InteractionRouter
+from src.utils.inactivity import InactivityIndex
+from src.utils.category_counter import CategoryChannelCounter
+from src.utils.ticket_analytics import ALL, NO_PRIORITY, TicketAnalytics, format_duration
+from src.utils.staff_balancer import StaffBalancer
+from src.utils.ticket_archive import MAX_COUNT, TicketArchive
+from src.utils.attachment_store import AttachmentStore
+from src.utils.single_flight import SingleFlight
+from src.utils.ticket_journal import TicketJournal
+from src.utils.ticket_pool import MAX_POOL_SIZE, TicketChannelPool
+from src.utils.transcript import Transcript, to_files
 
 class SetupMessageView(discord.ui.View):
     def __init__(self, category_info, timeout=120):
@@ -34,15 +45,182 @@ class SetupMessageView(discord.ui.View):
             except:
                 pass
 
+class SearchResultsView(discord.ui.View):
+    """Pages de résultats de ?ticket_search"""
+
+    PAGE_SIZE = 5
+
+    def __init__(self, archive, query, author, total, timeout=180):
+        super().__init__(timeout=timeout)
+        self.archive = archive
+        self.query = query
+        self.author = author
+        self.total = total
+        self.page = 0
+        self.pages = max(1, -(-total // self.PAGE_SIZE))
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    def build_embed(self, hits):
+        total = f"{self.total}+" if self.total >= MAX_COUNT else str(self.total)
+        embed = discord.Embed(
+            title=f"🔎 Recherche : {self.query}"[:256],
+            description=f"{total} messages trouvés dans les tickets archivés" if hits else "Aucun résultat.",
+            color=discord.Color.blue()
+        )
+        for hit in hits:
+            embed.add_field(
+                name=f"n°{hit['ticket']} • #{hit['channel_name']} • {hit['author']} • {hit['ts']}"[:256],
+                value=hit['snippet'][:1024] or "(message vide)",
+                inline=False
+            )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.pages} • ?ticket_archive <n°> pour la transcription")
+        return embed
+
+    async def show_page(self, interaction: discord.Interaction):
+        _, hits = await self.archive.search(self.query, self.PAGE_SIZE, self.page * self.PAGE_SIZE)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(hits), view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author.id
+
+    @discord.ui.button(label="Précédent", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await self.show_page(interaction)
+
+    @discord.ui.button(label="Suivant", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self.show_page(interaction)
+
+class CreateTicketButton(discord.ui.DynamicItem[discord.ui.Button], template=r'create_ticket:(?P<panel_id>[0-9]+):(?P<category_id>\w+)'):
+    """Bouton persistant de création de ticket d'un panneau"""
+
+    def __init__(self, panel_id: int, category_id: str, label=None, emoji=None):
+        super().__init__(discord.ui.Button(
+            style=discord.ButtonStyle.secondary,
+            label=label,
+            emoji=emoji,
+            custom_id=f"create_ticket:{panel_id}:{category_id}"
+        ))
+        self.panel_id = panel_id
+        self.category_id = category_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['panel_id']), match['category_id'])
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog('TicketsCog')
+        await cog.handle_create_ticket(interaction, self.panel_id, self.category_id)
+
+class CloseTicketButton(discord.ui.DynamicItem[discord.ui.Button], template=r'close_ticket:(?P<channel_id>[0-9]+)'):
+    """Bouton persistant de fermeture d'un ticket"""
+
+    def __init__(self, channel_id: int):
+        super().__init__(discord.ui.Button(
+            style=discord.ButtonStyle.danger,
+            label="Fermer le ticket",
+            emoji="🔒",
+            custom_id=f"close_ticket:{channel_id}"
+        ))
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['channel_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog('TicketsCog')
+        await cog.handle_close_request(interaction, self.channel_id)
+
+class ConfirmCloseButton(discord.ui.DynamicItem[discord.ui.Button], template=r'confirm_close:(?P<channel_id>[0-9]+)'):
+    """Bouton persistant de confirmation de fermeture d'un ticket"""
+
+    def __init__(self, channel_id: int):
+        super().__init__(discord.ui.Button(
+            style=discord.ButtonStyle.danger,
+            label="Confirmer",
+            emoji="✅",
+            custom_id=f"confirm_close:{channel_id}"
+        ))
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['channel_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog('TicketsCog')
+        await cog.handle_confirm_close(interaction, self.channel_id)
+
+class CancelCloseButton(discord.ui.DynamicItem[discord.ui.Button], template=r'cancel_close:(?P<channel_id>[0-9]+)'):
+    """Bouton persistant d'annulation de fermeture d'un ticket"""
+
+    def __init__(self, channel_id: int):
+        super().__init__(discord.ui.Button(
+            style=discord.ButtonStyle.secondary,
+            label="Annuler",
+            emoji="❌",
+            custom_id=f"cancel_close:{channel_id}"
+        ))
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['channel_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog('TicketsCog')
+        await cog.handle_cancel_close(interaction, self.channel_id)
+
+TICKET_BUTTONS = (CreateTicketButton, CloseTicketButton, ConfirmCloseButton, CancelCloseButton)
+
+def close_confirmation_view(channel_id: int) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    view.add_item(ConfirmCloseButton(channel_id))
+    view.add_item(CancelCloseButton(channel_id))
+    return view
+
 class TicketsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.tickets_file = 'data/tickets.json'
-        self.tickets_data = self.load_tickets()
+        self.store = TicketStore('data/tickets.db', legacy_path='data/tickets.json')
+        self.tickets_data = self.store.load()
+        self.journal = TicketJournal('data/journals')
+        self.archive = TicketArchive('data/ticket_archive.db')  # Tickets fermés, recherche plein texte
+        self.attachments = AttachmentStore('data/attachments')  # Pièces jointes des tickets
+        self.analytics = TicketAnalytics(self.store)  # Durées de réponse et de fermeture
+        self.analytics.load()
+        self.close_timings = deque(maxlen=100)  # Durées des étapes des dernières fermetures
+        self.closing_tickets = set()  # Salons dont la fermeture est en cours
+        self.ticket_creations = SingleFlight()  # Créations de tickets en cours par membre
+        self.pool = TicketChannelPool(self.store, self.create_pool_channel)
+        self.inactivity = InactivityIndex(self.inactivity_thresholds)  # Dernière activité des tickets
+        bot.timers.register('ticket_inactivity', self.check_inactive_tickets)
+        self.category_counts = CategoryChannelCounter()  # Salons par catégorie Discord
+        self.overflow_creations = SingleFlight()  # Créations de catégories de débordement en cours
+        # Charge des membres du staff en ligne (tous les membres sans l'intent Presence)
+        self.balancer = StaffBalancer(track_presence=bot.intents.presences)
+        self.pending_reassignments = {}  # (guild_id, member_id) -> tâche de réassignation
+
+        # Routage des boutons des assistants de configuration (préfixe du custom_id -> gestionnaire)
+        self.router = InteractionRouter()
+        self.router.register('edit_logs', self.handle_edit_logs)
+        self.router.register('edit_category', self.handle_category_edit)
+        self.router.register('edit_cat_discord', self.handle_category_discord_edit)
+        self.router.register('edit_cat_message', self.handle_category_message_edit)
+        self.router.register('use_default_message', self.handle_use_default_message)
+        self.router.register('custom_message', self.handle_custom_message)
+        self.router.register('edit_role', self.handle_role_edit)
+        self.router.register('confirm_delete', self.handle_delete_request)
+        self.router.register('cancel_delete', self.handle_cancel_delete)
         self.current_context = None  # Pour stocker le contexte actuel
-        
-        # Créer le dossier data s'il n'existe pas
-        os.makedirs('data', exist_ok=True)
 
         # Définition des priorités et leurs couleurs
         self.priorities = {
@@ -84,58 +262,401 @@ class TicketsCog(commands.Cog):
             }
         }
 
-    def load_tickets(self):
-        default_data = {
-            'ticket_configs': {},  # Configurations par salon
-            'active_tickets': {},
-            'log_channel_id': None,
-            'ticket_stats': {
-                'total_tickets': 0,
-                'tickets_by_category': {
-                    'support': 0,
-                    'bug': 0,
-                    'commande': 0,
-                    'autre': 0
-                },
-                'tickets_by_priority': {
-                    'basse': 0,
-                    'moyenne': 0,
-                    'haute': 0,
-                    'urgente': 0
-                }
-            }
-        }
-        
-        if os.path.exists(self.tickets_file):
+    async def cog_load(self):
+        # Boutons persistants : fonctionnent encore après un redémarrage du bot
+        self.bot.add_dynamic_items(*TICKET_BUTTONS)
+        asyncio.create_task(self.fill_pools())
+        asyncio.create_task(self.track_active_tickets())
+        asyncio.create_task(self.track_staff())
+        self.attachments.start()
+        self.prune_attachments.start()
+        self.maintain_archive.start()
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(*TICKET_BUTTONS)
+        for task in self.pending_reassignments.values():
+            task.cancel()
+        self.pool.cancel()
+        self.journal.close()
+        self.maintain_archive.cancel()
+        self.archive.close()
+        self.prune_attachments.cancel()
+        await self.attachments.close()
+        self.store.close()
+
+    async def fill_pools(self):
+        """Complète les réserves de salons de toutes les configurations au démarrage"""
+        await self.bot.wait_until_ready()
+        # Les réserves sont placées selon le remplissage des catégories : compter d'abord
+        for guild in self.bot.guilds:
+            self.category_counts.seed(guild)
+        for panel_id, config in self.tickets_data['ticket_configs'].items():
+            for category_id in config.get('categories', {}):
+                self.pool.refill(panel_id, category_id, config.get('pool_size', 0))
+
+    async def create_pool_channel(self, panel_id: str, category_id: str):
+        """Crée un salon caché pour la réserve d'une catégorie"""
+        config = self.tickets_data['ticket_configs'].get(panel_id)
+        panel = self.bot.get_channel(int(panel_id))
+        if config is None or panel is None or category_id not in config.get('categories', {}):
+            return None
+
+        guild = panel.guild
+        channel = await self.create_ticket_text_channel(
+            guild, panel_id, category_id,
+            name="ticket-reserve",
+            overwrites={
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            },
+            reason="Réserve de salons de tickets"
+        )
+        return channel.id
+
+    # Catégories de débordement (50 salons au maximum par catégorie Discord)
+
+    def category_shard_ids(self, config: dict, category_id: str) -> list:
+        """Catégorie Discord principale puis catégories de débordement d'une catégorie de tickets"""
+        category_config = config.get('categories', {}).get(category_id, {})
+        if not category_config.get('category_id'):
+            return []
+        return [category_config['category_id']] + category_config.get('overflow_ids', [])
+
+    async def ticket_category(self, guild: discord.Guild, panel_id: str, category_id: str):
+        """Catégorie Discord où placer un nouveau salon (une place y est réservée)
+
+        La première catégorie non pleine est utilisée ; si toutes le sont, une
+        catégorie de débordement est créée avec les permissions de la principale.
+        """
+        config = self.tickets_data['ticket_configs'][panel_id]
+        shard_ids = self.category_shard_ids(config, category_id)
+        primary = guild.get_channel(shard_ids[0]) if shard_ids else None
+        if primary is None:
+            return None
+
+        category = None
+        for shard_id in shard_ids:
+            shard = guild.get_channel(shard_id)
+            if shard is not None and self.category_counts.available(shard_id):
+                category = shard
+                break
+        if category is None:
+            category = await self.overflow_creations.do(
+                (guild.id, panel_id, category_id),
+                lambda: self.create_overflow_category(primary, panel_id, category_id)
+            )
+        self.category_counts.reserve(category.id)
+        return category
+
+    def claimed_channel_category(self, guild: discord.Guild, config: dict, category_id: str, channel):
+        """Catégorie non pleine où ramener un salon de réserve placé en débordement (None : il y reste)"""
+        for shard_id in self.category_shard_ids(config, category_id):
+            if shard_id == channel.category_id:
+                return None
+            shard = guild.get_channel(shard_id)
+            if shard is not None and self.category_counts.available(shard_id):
+                return shard
+        return None
+
+    async def create_overflow_category(self, primary: discord.CategoryChannel, panel_id: str, category_id: str):
+        category_config = self.tickets_data['ticket_configs'][panel_id]['categories'][category_id]
+        overflow_ids = category_config.setdefault('overflow_ids', [])
+        category = await primary.guild.create_category(
+            name=f"{primary.name} {len(overflow_ids) + 2}",
+            overwrites=primary.overwrites,
+            reason=f"Catégorie {primary.name} pleine"
+        )
+        overflow_ids.append(category.id)
+        self.store.save_config(panel_id)
+        self.bot.logger.info(f"Catégorie de débordement créée pour {primary.name}: {category.name}")
+        return category
+
+    async def create_ticket_text_channel(self, guild: discord.Guild, panel_id: str, category_id: str, **kwargs):
+        """Crée un salon dans la première catégorie Discord non pleine d'une catégorie de tickets"""
+        category = await self.ticket_category(guild, panel_id, category_id)
+        try:
+            channel = await guild.create_text_channel(category=category, **kwargs)
+            self.category_counts.add(channel)
+        finally:
+            if category is not None:
+                self.category_counts.release(category.id)
+        return channel
+
+    async def collect_overflow_category(self, guild: discord.Guild, category_id: int):
+        """Supprime une catégorie de débordement devenue vide"""
+        if category_id is None or self.category_counts.count(category_id):
+            return
+        for panel_id, config in self.tickets_data['ticket_configs'].items():
+            for category_config in config.get('categories', {}).values():
+                if category_id in category_config.get('overflow_ids', []):
+                    category_config['overflow_ids'].remove(category_id)
+                    self.store.save_config(panel_id)
+                    category = guild.get_channel(category_id)
+                    if category is not None:
+                        try:
+                            await category.delete(reason="Catégorie de débordement vide")
+                        except discord.HTTPException as e:
+                            self.bot.logger.error(f"Erreur lors de la suppression de la catégorie {category.name}: {e}")
+                    return
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.category_counts.seed(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.category_counts.add(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.category_id != after.category_id:
+            self.category_counts.move(before, after)
+            await self.collect_overflow_category(after.guild, before.category_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.store.remove_pool_channel(channel.id)
+        if isinstance(channel, discord.CategoryChannel):
+            self.category_counts.forget_category(channel.id)
+            return
+        self.category_counts.remove(channel)
+        await self.collect_overflow_category(channel.guild, channel.category_id)
+
+    # Assignation automatique des tickets au staff
+
+    REASSIGN_DELAY = 300  # Secondes hors ligne avant la réassignation des tickets d'un membre
+
+    def track_support_role(self, guild: discord.Guild, role: discord.Role):
+        for member in role.members:
+            if not member.bot:
+                self.balancer.set_member(guild.id, role.id, member.id, member.status != discord.Status.offline)
+
+    def auto_assign_roles(self, guild: discord.Guild):
+        """Rôles support des configurations du serveur où l'assignation est activée"""
+        roles = set()
+        for panel_id, config in self.tickets_data['ticket_configs'].items():
+            panel = guild.get_channel(int(panel_id)) if panel_id.isdigit() else None
+            if panel is not None and config.get('auto_assign') and config.get('support_role_id'):
+                role = guild.get_role(config['support_role_id'])
+                if role is not None:
+                    roles.add(role)
+        return roles
+
+    async def track_staff(self):
+        """Initialise les présences du staff et la charge de chaque membre"""
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            for role in self.auto_assign_roles(guild):
+                self.track_support_role(guild, role)
+        for ticket in list(self.tickets_data['active_tickets'].values()):
+            channel = self.bot.get_channel(ticket['channel_id'])
+            if channel is not None and ticket.get('assignee_id'):
+                self.balancer.add_ticket(channel.guild.id, ticket['assignee_id'], channel.id, ticket.get('priority'))
+
+    def pick_assignee(self, guild: discord.Guild, config: dict, exclude: int = None):
+        """Membre du staff en ligne le moins chargé pour une configuration (None si désactivé)"""
+        if not config.get('auto_assign') or not config.get('support_role_id'):
+            return None
+        member_id = self.balancer.pick(guild.id, config['support_role_id'], exclude=exclude)
+        return guild.get_member(member_id) if member_id else None
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        was_online = before.status != discord.Status.offline
+        is_online = after.status != discord.Status.offline
+        if was_online == is_online or not self.balancer.is_tracked(after.guild.id, after.id):
+            return
+
+        self.balancer.set_online(after.guild.id, after.id, is_online)
+        key = (after.guild.id, after.id)
+        task = self.pending_reassignments.pop(key, None)
+        if task is not None:
+            task.cancel()
+        if not is_online and self.balancer.tickets(*key):
+            self.pending_reassignments[key] = asyncio.create_task(self.reassign_later(after))
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles == after.roles:
+            return
+        for role in self.auto_assign_roles(after.guild):
+            if role in after.roles and role not in before.roles:
+                self.balancer.set_member(after.guild.id, role.id, after.id, after.status != discord.Status.offline)
+            elif role in before.roles and role not in after.roles:
+                self.balancer.remove_member(after.guild.id, role.id, after.id)
+                await self.reassign_tickets(after)
+
+    async def reassign_later(self, member: discord.Member):
+        await asyncio.sleep(self.REASSIGN_DELAY)
+        self.pending_reassignments.pop((member.guild.id, member.id), None)
+        await self.reassign_tickets(member)
+
+    async def reassign_tickets(self, member: discord.Member):
+        """Réassigne les tickets d'un membre du staff hors ligne (ou qui a perdu le rôle)"""
+        guild = member.guild
+        for channel_id in self.balancer.tickets(guild.id, member.id):
+            user_id, ticket = self.store.ticket_by_channel(channel_id)
+            channel = guild.get_channel(channel_id)
+            config = self.tickets_data['ticket_configs'].get(ticket.get('panel_id')) if ticket else None
+            if channel is None or config is None:
+                continue
+            assignee = self.pick_assignee(guild, config, exclude=member.id)
+            if assignee is None or str(assignee.id) == user_id:
+                continue  # Personne d'autre en ligne : le ticket reste assigné
+
+            self.balancer.remove_ticket(channel_id)
+            self.balancer.add_ticket(guild.id, assignee.id, channel_id, ticket.get('priority'))
+            ticket['assignee_id'] = assignee.id
+            self.store.save_ticket(user_id)
             try:
-                with open(self.tickets_file, 'r') as f:
-                    data = json.load(f)
-                    # Migration des anciennes données
-                    if 'ticket_category_id' in data:
-                        # Créer une configuration par défaut avec les anciennes données
-                        default_config = {
-                            'category_id': data.get('ticket_category_id'),
-                            'support_role_id': data.get('support_role_id'),
-                            'welcome_message': "Bienvenue {user} dans votre ticket!\nUn membre du staff vous répondra dès que possible."
-                        }
-                        # Ajouter la configuration par défaut si elle existe
-                        if default_config['category_id'] is not None:
-                            default_data['ticket_configs']['default'] = default_config
-                    
-                    # Fusionner les données existantes avec la structure par défaut
-                    for key in default_data:
-                        if key not in data:
-                            data[key] = default_data[key]
-                    
-                    return data
-            except (json.JSONDecodeError, IOError):
-                self.bot.logger.error("Erreur lors du chargement du fichier tickets.json")
-                return default_data
-        return default_data
-
-    def save_tickets(self):
-        with open(self.tickets_file, 'w') as f:
-            json.dump(self.tickets_data, f, indent=4)
+                await channel.set_permissions(assignee, read_messages=True, send_messages=True)
+                await channel.send(f"🔄 Ticket réassigné à {assignee.mention} ({member.display_name} n'est plus disponible).")
+            except discord.HTTPException as e:
+                self.bot.logger.error(f"Erreur lors de la réassignation du ticket {channel.name}: {e}")
+
+    # Fermeture automatique des tickets inactifs
+
+    @staticmethod
+    def inactivity_delays(config):
+        """(avertissement, fermeture) en secondes d'inactivité pour une configuration"""
+        if not config or not config.get('inactivity_hours'):
+            return None
+        close_after = config['inactivity_hours'] * 3600
+        warning = min(config.get('inactivity_warning_hours', 12) * 3600, close_after / 2)
+        return close_after - warning, close_after
+
+    def inactivity_thresholds(self, channel_id: int):
+        _, ticket = self.store.ticket_by_channel(channel_id)
+        if ticket is None:
+            return None
+        return self.inactivity_delays(self.tickets_data['ticket_configs'].get(ticket.get('panel_id')))
+
+    async def track_active_tickets(self):
+        """Reprend le suivi de l'activité des tickets ouverts avant le démarrage"""
+        await self.bot.wait_until_ready()
+        for ticket in list(self.tickets_data['active_tickets'].values()):
+            channel = self.bot.get_channel(ticket['channel_id'])
+            if channel is None:
+                continue
+            if 'panel_id' not in ticket and channel.category_id:
+                # Ticket antérieur à l'enregistrement du panneau : retrouvé par sa catégorie Discord
+                for panel_id, config in self.tickets_data['ticket_configs'].items():
+                    if any(c.get('category_id') == channel.category_id for c in config.get('categories', {}).values()):
+                        ticket['panel_id'] = panel_id
+                        self.store.save_ticket(self.store.ticket_by_channel(channel.id)[0])
+                        break
+            # Borne le rattrapage des messages envoyés pendant l'arrêt (fermeture)
+            self.journal.note_connected(channel.id, channel.last_message_id)
+            if channel.last_message_id:
+                last_activity = discord.utils.snowflake_time(channel.last_message_id).timestamp()
+            elif ticket.get('created_at'):
+                last_activity = datetime.fromisoformat(ticket['created_at']).replace(tzinfo=timezone.utc).timestamp()
+            else:
+                last_activity = None
+            self.inactivity.track(channel.id, last_activity)
+        self.schedule_inactivity_check()
+
+    def schedule_inactivity_check(self):
+        """Programme une vérification à l'échéance d'inactivité la plus proche"""
+        deadline = self.inactivity.next_deadline()
+        if deadline is None:
+            return
+        current = self.bot.timers.due_at('ticket_inactivity')
+        if current is None or deadline < current:
+            self.bot.timers.schedule('ticket_inactivity', key='ticket_inactivity', at=deadline)
+
+    async def check_inactive_tickets(self, payload=None):
+        """Avertit puis ferme les tickets arrivés au seuil d'inactivité"""
+        for channel_id, action in self.inactivity.due():
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                self.inactivity.forget(channel_id)
+                continue
+            try:
+                if action == 'warn':
+                    await self.send_inactivity_warning(channel)
+                else:
+                    self.bot.logger.info(f"Fermeture automatique du ticket inactif {channel.name}")
+                    await self.close_ticket_channel(channel, self.bot.user)
+            except Exception as e:
+                self.bot.logger.error(f"Erreur lors du traitement du ticket inactif {channel.name}: {e}")
+        self.schedule_inactivity_check()
+
+    async def send_inactivity_warning(self, channel):
+        _, close_after = self.inactivity_thresholds(channel.id)
+        closes_at = int(self.inactivity.last_activity(channel.id) + close_after)
+        embed = discord.Embed(
+            title="⏰ Ticket Inactif",
+            description=f"Ce ticket sera fermé automatiquement <t:{closes_at}:R> faute d'activité.\n"
+                        "Envoyez un message pour le garder ouvert.",
+            color=discord.Color.orange()
+        )
+        view = discord.ui.View(timeout=None)
+        view.add_item(CloseTicketButton(channel.id))
+        await channel.send(embed=embed, view=view)
+
+    def is_ticket_channel(self, channel_id: int) -> bool:
+        return channel_id in self.journal or self.store.ticket_by_channel(channel_id)[1] is not None
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Journalise les messages des tickets actifs"""
+        if self.is_ticket_channel(message.channel.id):
+            self.journal.record_message(message)
+            for attachment in message.attachments:
+                self.attachments.enqueue(message.channel.id, message.id, {
+                    'filename': attachment.filename, 'url': attachment.url, 'size': attachment.size
+                })
+            if not message.author.bot:
+                self.inactivity.touch(message.channel.id)
+                self.record_first_response(message)
+
+    @staticmethod
+    def ticket_created_at(ticket) -> float:
+        """Date d'ouverture d'un ticket (timestamp), None si inconnue"""
+        if not ticket.get('created_at'):
+            return None
+        return datetime.fromisoformat(ticket['created_at']).replace(tzinfo=timezone.utc).timestamp()
+
+    def record_first_response(self, message):
+        """Enregistre le premier message du staff (toute personne autre que le créateur) dans un ticket"""
+        user_id, ticket = self.store.ticket_by_channel(message.channel.id)
+        if ticket is None or ticket.get('first_response_at') or str(message.author.id) == user_id:
+            return
+
+        at = message.created_at.timestamp()
+        ticket['first_response_at'] = message.created_at.replace(tzinfo=None).isoformat()
+        self.store.save_ticket(user_id)
+        self.store.record_event(message.channel.id, 'first_response', at, ticket.get('category_id'), ticket.get('priority'))
+        created_at = self.ticket_created_at(ticket)
+        if created_at is not None:
+            self.analytics.record('first_response', at - created_at, ticket.get('category_id'), ticket.get('priority'), at)
+
+    @tasks.loop(hours=24)
+    async def prune_attachments(self):
+        """Supprime les pièces jointes archivées au-delà de la durée de conservation"""
+        removed = await self.attachments.prune()
+        if removed:
+            self.bot.logger.info(f"{removed} pièces jointes archivées supprimées (durée de conservation dépassée)")
+
+    @tasks.loop(hours=24)
+    async def maintain_archive(self):
+        """Passe les anciennes transcriptions en lzma et applique les durées de conservation"""
+        # Statistiques : seule la fenêtre glissante est conservée
+        self.analytics.prune()
+        try:
+            results = await self.archive.maintain()
+        except Exception as e:
+            self.bot.logger.error(f"Erreur lors de la maintenance de l'archive des tickets: {e}")
+            return
+        if any(results.values()):
+            self.bot.logger.info("Archive des tickets : " + ", ".join(f"{key} {value}" for key, value in results.items()))
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        """Journalise les modifications de messages des tickets actifs"""
+        if self.is_ticket_channel(payload.channel_id):
+            self.journal.record_edit(payload)
 
     @commands.command(name="ticket_setup")
     @commands.has_permissions(administrator=True)
@@ -173,10 +694,9 @@ class TicketsCog(commands.Cog):
         await ctx.send(embed=embed)
 
         try:
-            support_role_msg = await self.bot.wait_for(
-                'message',
-                timeout=60.0,
-                check=lambda m: m.author == ctx.author and m.channel == ctx.channel and len(m.role_mentions) > 0
+            support_role_msg = await self.bot.pending_inputs.wait(
+                ctx.author.id, ctx.channel.id, 60.0,
+                check=lambda m: len(m.role_mentions) > 0
             )
             support_role = support_role_msg.role_mentions[0]
             config_data['support_role_id'] = support_role.id
@@ -210,16 +730,14 @@ class TicketsCog(commands.Cog):
                 
                 if view.value == "waiting_for_message":
                     try:
-                        custom_msg = await self.bot.wait_for(
-                            'message',
-                            timeout=120.0,
-                            check=lambda m: m.author == ctx.author and m.channel == ctx.channel
-                        )
+                        custom_msg = await self.bot.pending_inputs.wait(ctx.author.id, ctx.channel.id, 120.0)
                         welcome_message = custom_msg.content
-                        await ctx.send(f"✅ Message personnalisé enregistré pour {category_info['name']}", delete_after=5)
+                        notice = await ctx.send(f"✅ Message personnalisé enregistré pour {category_info['name']}")
+                        self.bot.delete_later(5, notice)
                     except asyncio.TimeoutError:
                         welcome_message = category_info['default_message']
-                        await ctx.send(f"⏳ Temps écoulé, utilisation du message par défaut pour {category_info['name']}", delete_after=5)
+                        notice = await ctx.send(f"⏳ Temps écoulé, utilisation du message par défaut pour {category_info['name']}")
+                        self.bot.delete_later(5, notice)
                 else:
                     welcome_message = view.value
 
@@ -244,13 +762,12 @@ class TicketsCog(commands.Cog):
                 )
                 await ctx.send(embed=embed)
 
-                log_channel_msg = await self.bot.wait_for(
-                    'message',
-                    timeout=60.0,
-                    check=lambda m: m.author == ctx.author and m.channel == ctx.channel and len(m.channel_mentions) > 0
+                log_channel_msg = await self.bot.pending_inputs.wait(
+                    ctx.author.id, ctx.channel.id, 60.0,
+                    check=lambda m: len(m.channel_mentions) > 0
                 )
                 log_channel = log_channel_msg.channel_mentions[0]
-                self.tickets_data['log_channel_id'] = log_channel.id
+                self.store.set_log_channel(log_channel.id)
 
             # Étape 3: Création du message avec les boutons
             embed = discord.Embed(
@@ -269,13 +786,12 @@ class TicketsCog(commands.Cog):
 
             view = discord.ui.View(timeout=None)
             for category_id, category_info in self.ticket_categories.items():
-                button = discord.ui.Button(
-                    style=discord.ButtonStyle.secondary,
+                view.add_item(CreateTicketButton(
+                    channel.id,
+                    category_id,
                     label=category_info['name'],
-                    emoji=category_info['emoji'],
-                    custom_id=f"create_ticket:{channel.id}:{category_id}"
-                )
-                view.add_item(button)
+                    emoji=category_info['emoji']
+                ))
 
             setup_message = await channel.send(embed=embed, view=view)
 
@@ -285,7 +801,7 @@ class TicketsCog(commands.Cog):
                 'categories': config_data['categories'],
                 'setup_message_id': setup_message.id
             }
-            self.save_tickets()
+            self.store.save_config(str(channel.id))
 
             # Message de confirmation
             embed = discord.Embed(
@@ -303,14 +819,10 @@ class TicketsCog(commands.Cog):
     @commands.command(name="close")
     async def close_ticket(self, ctx):
         """Ferme le ticket actuel"""
-        # Vérifier si le salon est un ticket en cherchant dans les tickets actifs
-        is_ticket = False
-        for user_id, ticket_data in self.tickets_data['active_tickets'].items():
-            if ticket_data['channel_id'] == ctx.channel.id:
-                is_ticket = True
-                break
+        # Vérifier si le salon est un ticket actif
+        _, ticket_data = self.store.ticket_by_channel(ctx.channel.id)
 
-        if not is_ticket:
+        if ticket_data is None:
             await ctx.send("❌ Ce salon n'est pas un ticket!")
             return
 
@@ -323,23 +835,7 @@ class TicketsCog(commands.Cog):
             color=discord.Color.orange()
         )
 
-        view = discord.ui.View(timeout=None)
-        confirm_button = discord.ui.Button(
-            style=discord.ButtonStyle.danger,
-            label="Confirmer",
-            emoji="✅",
-            custom_id=f"confirm_close:{ctx.channel.id}"
-        )
-        cancel_button = discord.ui.Button(
-            style=discord.ButtonStyle.secondary,
-            label="Annuler",
-            emoji="❌",
-            custom_id=f"cancel_close:{ctx.channel.id}"
-        )
-        view.add_item(confirm_button)
-        view.add_item(cancel_button)
-        
-        await ctx.send(embed=embed, view=view)
+        await ctx.send(embed=embed, view=close_confirmation_view(ctx.channel.id))
 
     @commands.command(name="ticket_list")
     @commands.has_permissions(administrator=True)
@@ -366,8 +862,11 @@ class TicketsCog(commands.Cog):
                     cat_channel = ctx.guild.get_channel(cat_config['category_id'])
                     cat_info = self.ticket_categories[cat_id]
                     if cat_channel:
+                        shard_ids = self.category_shard_ids(config, cat_id)
+                        used = sum(self.category_counts.count(shard_id) for shard_id in shard_ids)
+                        overflow = f", +{len(shard_ids) - 1} débordement" if len(shard_ids) > 1 else ""
                         categories_info.append(
-                            f"• {cat_info['emoji']} {cat_info['name']} ({cat_channel.name})"
+                            f"• {cat_info['emoji']} {cat_info['name']} ({cat_channel.name} : {used} salons{overflow})"
                         )
 
                 embed.add_field(
@@ -440,17 +939,11 @@ class TicketsCog(commands.Cog):
 
         await ctx.send(embed=embed, view=view)
 
-    async def delete_after(self, interaction, delay=30):
-        """Supprime un message après un délai donné"""
-        await asyncio.sleep(delay)
-        try:
-            if isinstance(interaction, discord.Interaction):
-                message = await interaction.original_response()
-                await message.delete()
-            else:
-                await interaction.delete()
-        except (discord.NotFound, discord.Forbidden):
-            pass
+    def delete_after(self, interaction, response, delay=30):
+        """Programme la suppression d'une réponse éphémère (réponse ou message de suivi)"""
+        message_id = response.message_id if isinstance(response, discord.InteractionCallbackResponse) else response.id
+        if message_id is not None:
+            self.bot.delete_later(delay, interaction=interaction, message_id=message_id)
 
     @commands.command(name="ticket_edit")
     @commands.has_permissions(administrator=True)
@@ -507,14 +1000,14 @@ class TicketsCog(commands.Cog):
     async def handle_category_edit(self, interaction: discord.Interaction, channel_id: str, category_id: str = None):
         """Gère la modification d'une catégorie spécifique"""
         if interaction.user != self.current_context.author:
-            await interaction.response.send_message("❌ Seul l'auteur de la commande peut utiliser ces boutons!", ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
+            response = await interaction.response.send_message("❌ Seul l'auteur de la commande peut utiliser ces boutons!", ephemeral=True)
+            self.delete_after(interaction, response)
             return
 
         config = self.tickets_data['ticket_configs'].get(channel_id)
         if not config:
-            await interaction.response.send_message("❌ Configuration introuvable.", ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
+            response = await interaction.response.send_message("❌ Configuration introuvable.", ephemeral=True)
+            self.delete_after(interaction, response)
             return
 
         cat_info = self.ticket_categories[category_id]
@@ -540,24 +1033,22 @@ class TicketsCog(commands.Cog):
             custom_id=f"edit_cat_message:{channel_id}:{category_id}"
         ))
 
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-        asyncio.create_task(self.delete_after(interaction))
+        response = await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        self.delete_after(interaction, response)
 
     async def handle_category_discord_edit(self, interaction: discord.Interaction, channel_id: str, category_id: str):
         """Gère la modification de la catégorie Discord"""
-        await interaction.response.send_message("📝 Entrez le nom de la nouvelle catégorie Discord:", ephemeral=True)
-        asyncio.create_task(self.delete_after(interaction))
+        response = await interaction.response.send_message("📝 Entrez le nom de la nouvelle catégorie Discord:", ephemeral=True)
+        self.delete_after(interaction, response)
 
         try:
-            msg = await self.bot.wait_for(
-                'message',
-                timeout=60.0,
-                check=lambda m: m.author == self.current_context.author and m.channel == self.current_context.channel
+            msg = await self.bot.pending_inputs.wait(
+                self.current_context.author.id, self.current_context.channel.id, 60.0
             )
             
             category = await interaction.guild.create_category(msg.content)
             self.tickets_data['ticket_configs'][channel_id]['categories'][category_id]['category_id'] = category.id
-            self.save_tickets()
+            self.store.save_config(channel_id)
             
             await self.current_context.send(f"✅ Catégorie Discord mise à jour: {category.name}")
         except asyncio.TimeoutError:
@@ -587,8 +1078,8 @@ class TicketsCog(commands.Cog):
             custom_id=f"custom_message:{channel_id}:{category_id}"
         ))
 
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-        asyncio.create_task(self.delete_after(interaction))
+        response = await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        self.delete_after(interaction, response)
 
     @commands.command(name="ticket_logs")
     @commands.has_permissions(administrator=True)
@@ -620,8 +1111,7 @@ class TicketsCog(commands.Cog):
             return
 
         # Configurer le nouveau salon
-        self.tickets_data['log_channel_id'] = channel.id
-        self.save_tickets()
+        self.store.set_log_channel(channel.id)
 
         embed = discord.Embed(
             title="✅ Configuration des Logs",
@@ -632,327 +1122,709 @@ class TicketsCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_interaction(self, interaction: discord.Interaction):
-        if not interaction.data or not interaction.data.get('custom_id'):
+        # Les boutons persistants (création, fermeture) sont gérés par les DynamicItem
+        if interaction.type != discord.InteractionType.component:
             return
+        await self.router.dispatch(interaction)
+
+    async def handle_edit_logs(self, interaction: discord.Interaction):
+        """Gère la modification du salon des logs"""
+        await interaction.response.send_message(
+            "📝 Mentionnez le nouveau salon des logs.",
+            ephemeral=True
+        )
+        try:
+            msg = await self.bot.pending_inputs.wait(
+                interaction.user.id, interaction.channel.id, 60.0,
+                check=lambda m: len(m.channel_mentions) > 0
+            )
+            new_channel = msg.channel_mentions[0]
+            self.store.set_log_channel(new_channel.id)
+            
+            embed = discord.Embed(
+                title="✅ Configuration des Logs",
+                description=f"Le salon des logs a été mis à jour : {new_channel.mention}",
+                color=discord.Color.green()
+            )
+            await interaction.followup.send(embed=embed)
+        except asyncio.TimeoutError:
+            await interaction.followup.send("❌ Temps écoulé, aucune modification n'a été effectuée.", ephemeral=True)
 
-        custom_id = interaction.data['custom_id']
+    async def handle_use_default_message(self, interaction: discord.Interaction, channel_id: str, category_id: str):
+        """Restaure le message de bienvenue par défaut d'une catégorie"""
+        cat_info = self.ticket_categories[category_id]
+        self.tickets_data['ticket_configs'][channel_id]['categories'][category_id]['welcome_message'] = cat_info['default_message']
+        self.store.save_config(channel_id)
+        response = await interaction.response.send_message("✅ Message par défaut restauré!", ephemeral=True)
+        self.delete_after(interaction, response)
+
+    async def handle_custom_message(self, interaction: discord.Interaction, channel_id: str, category_id: str):
+        """Enregistre un message de bienvenue personnalisé pour une catégorie"""
+        response = await interaction.response.send_message("📝 Écrivez votre message personnalisé. Utilisez {user} pour mentionner l'utilisateur.", ephemeral=True)
+        self.delete_after(interaction, response)
+        
+        try:
+            msg = await self.bot.pending_inputs.wait(interaction.user.id, interaction.channel.id, 120.0)
+            
+            self.tickets_data['ticket_configs'][channel_id]['categories'][category_id]['welcome_message'] = msg.content
+            self.store.save_config(channel_id)
+            message = await interaction.followup.send("✅ Message personnalisé enregistré!", ephemeral=True, wait=True)
+            self.delete_after(interaction, message)
+        except asyncio.TimeoutError:
+            message = await interaction.followup.send("❌ Temps écoulé, modification annulée.", ephemeral=True, wait=True)
+            self.delete_after(interaction, message)
 
-        # Ajouter le cas pour l'édition des logs
-        if custom_id == "edit_logs":
-            await interaction.response.send_message(
-                "📝 Mentionnez le nouveau salon des logs.",
-                ephemeral=True
+    async def handle_role_edit(self, interaction: discord.Interaction, channel_id: str):
+        """Gère la modification du rôle support d'une configuration"""
+        response = await interaction.response.send_message("📝 Mentionnez le nouveau rôle support.", ephemeral=True)
+        self.delete_after(interaction, response)
+
+        try:
+            msg = await self.bot.pending_inputs.wait(
+                interaction.user.id, interaction.channel.id, 60.0,
+                check=lambda m: len(m.role_mentions) > 0
             )
-            try:
-                msg = await self.bot.wait_for(
-                    'message',
-                    timeout=60.0,
-                    check=lambda m: m.author == interaction.user and m.channel == interaction.channel and len(m.channel_mentions) > 0
-                )
-                new_channel = msg.channel_mentions[0]
-                self.tickets_data['log_channel_id'] = new_channel.id
-                self.save_tickets()
-                
-                embed = discord.Embed(
-                    title="✅ Configuration des Logs",
-                    description=f"Le salon des logs a été mis à jour : {new_channel.mention}",
-                    color=discord.Color.green()
-                )
-                await interaction.followup.send(embed=embed)
-            except asyncio.TimeoutError:
-                await interaction.followup.send("❌ Temps écoulé, aucune modification n'a été effectuée.", ephemeral=True)
+            role = msg.role_mentions[0]
+            self.tickets_data['ticket_configs'][channel_id]['support_role_id'] = role.id
+            self.store.save_config(channel_id)
+            await interaction.followup.send(f"✅ Rôle support mis à jour : {role.mention}", ephemeral=True)
+        except asyncio.TimeoutError:
+            await interaction.followup.send("❌ Temps écoulé, modification annulée.", ephemeral=True)
+
+    async def handle_create_ticket(self, interaction: discord.Interaction, channel_id: int, category_id: str):
+        """Crée un ticket depuis un bouton d'un panneau"""
+        # Vérifier si la configuration existe toujours
+        if str(channel_id) not in self.tickets_data['ticket_configs']:
+            response = await interaction.response.send_message("❌ La configuration de tickets n'existe plus.", ephemeral=True)
+            self.delete_after(interaction, response)
             return
 
-        # Ajouter les nouveaux cas pour la gestion des catégories
-        if custom_id.startswith('edit_category:'):
-            _, channel_id, category_id = custom_id.split(':')
-            await self.handle_category_edit(interaction, channel_id, category_id)
-        elif custom_id.startswith('edit_cat_discord:'):
-            _, channel_id, category_id = custom_id.split(':')
-            await self.handle_category_discord_edit(interaction, channel_id, category_id)
-        elif custom_id.startswith('edit_cat_message:'):
-            _, channel_id, category_id = custom_id.split(':')
-            await self.handle_category_message_edit(interaction, channel_id, category_id)
-        elif custom_id.startswith('use_default_message:'):
-            _, channel_id, category_id = custom_id.split(':')
-            cat_info = self.ticket_categories[category_id]
-            self.tickets_data['ticket_configs'][channel_id]['categories'][category_id]['welcome_message'] = cat_info['default_message']
-            self.save_tickets()
-            await interaction.response.send_message("✅ Message par défaut restauré!", ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
-        elif custom_id.startswith('custom_message:'):
-            _, channel_id, category_id = custom_id.split(':')
-            await interaction.response.send_message("📝 Écrivez votre message personnalisé. Utilisez {user} pour mentionner l'utilisateur.", ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
-            
-            try:
-                msg = await self.bot.wait_for(
-                    'message',
-                    timeout=120.0,
-                    check=lambda m: m.author == interaction.user and m.channel == interaction.channel
+        # Vérifier si l'utilisateur a déjà un ticket ouvert
+        existing_ticket = self.store.ticket_by_user(interaction.user.id)
+        if existing_ticket:
+            channel = interaction.guild.get_channel(existing_ticket['channel_id'])
+            if channel:
+                response = await interaction.response.send_message(
+                    f"❌ Vous avez déjà un ticket ouvert : {channel.mention}",
+                    ephemeral=True
                 )
-                
-                self.tickets_data['ticket_configs'][channel_id]['categories'][category_id]['welcome_message'] = msg.content
-                self.save_tickets()
-                await interaction.followup.send("✅ Message personnalisé enregistré!", ephemeral=True)
-                asyncio.create_task(self.delete_after(interaction.followup))
-            except asyncio.TimeoutError:
-                await interaction.followup.send("❌ Temps écoulé, modification annulée.", ephemeral=True)
-                asyncio.create_task(self.delete_after(interaction.followup))
-        elif custom_id.startswith('create_ticket:'):
-            # Extraire les IDs du custom_id
-            _, channel_id, category_id = custom_id.split(':')
-            channel_id = int(channel_id)
-            
-            # Vérifier si la configuration existe toujours
-            if str(channel_id) not in self.tickets_data['ticket_configs']:
-                await interaction.response.send_message("❌ La configuration de tickets n'existe plus.", ephemeral=True)
-                asyncio.create_task(self.delete_after(interaction))
+                self.delete_after(interaction, response)
                 return
 
-            # Vérifier si l'utilisateur a déjà un ticket ouvert
-            if str(interaction.user.id) in self.tickets_data['active_tickets']:
-                existing_ticket = self.tickets_data['active_tickets'][str(interaction.user.id)]
-                channel = interaction.guild.get_channel(existing_ticket['channel_id'])
-                if channel:
-                    await interaction.response.send_message(
-                        f"❌ Vous avez déjà un ticket ouvert : {channel.mention}",
-                        ephemeral=True
-                    )
-                    asyncio.create_task(self.delete_after(interaction))
-                    return
+        # Récupérer la configuration du canal
+        config = self.tickets_data['ticket_configs'][str(channel_id)]
+        
+        # Récupérer les informations de la catégorie depuis self.ticket_categories
+        category_info = self.ticket_categories.get(category_id)
+        if not category_info:
+            await interaction.response.send_message("❌ Cette catégorie n'existe plus.", ephemeral=True)
+            return
 
-            # Récupérer la configuration du canal
-            config = self.tickets_data['ticket_configs'][str(channel_id)]
-            
-            # Récupérer les informations de la catégorie depuis self.ticket_categories
-            category_info = self.ticket_categories.get(category_id)
-            if not category_info:
-                await interaction.response.send_message("❌ Cette catégorie n'existe plus.", ephemeral=True)
-                return
+        # Les clics simultanés d'un même membre partagent une seule création
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            ticket_channel = await self.ticket_creations.do(
+                (interaction.guild.id, interaction.user.id),
+                lambda: self.create_ticket_channel(interaction, str(channel_id), config, category_id, category_info)
+            )
+        except discord.HTTPException:
+            await interaction.followup.send("❌ Impossible de créer le ticket.", ephemeral=True)
+            return
 
-            # Créer le canal du ticket
-            overwrites = {
-                interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                interaction.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-            }
+        message = await interaction.followup.send(
+            f"✅ Votre ticket a été créé : {ticket_channel.mention}",
+            ephemeral=True,
+            wait=True
+        )
+        self.delete_after(interaction, message)
+
+    async def create_ticket_channel(self, interaction: discord.Interaction, panel_id: str, config: dict, category_id: str, category_info: dict) -> discord.TextChannel:
+        """Crée le salon du ticket (ou le prend dans la réserve), son message de bienvenue et l'enregistre
+
+        L'assignation provisoire au staff (clé : l'interaction qui mène la
+        création) est libérée ici en cas d'échec, quelle que soit l'erreur.
+        """
+        try:
+            return await self._create_ticket_channel(interaction, panel_id, config, category_id, category_info)
+        except BaseException:
+            self.balancer.remove_ticket(interaction.id)
+            raise
+
+    async def _create_ticket_channel(self, interaction: discord.Interaction, panel_id: str, config: dict, category_id: str, category_info: dict) -> discord.TextChannel:
+        # Créer le canal du ticket
+        overwrites = {
+            interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            interaction.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
 
-            # Ajouter les permissions pour le rôle support
-            if config['support_role_id']:
-                support_role = interaction.guild.get_role(config['support_role_id'])
-                if support_role:
-                    overwrites[support_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-
-            # Créer le canal dans la catégorie appropriée
-            discord_category = None
-            if 'categories' in config and category_id in config['categories']:
-                category_config = config['categories'][category_id]
-                if 'category_id' in category_config:
-                    discord_category = interaction.guild.get_channel(category_config['category_id'])
-
-            # Créer le canal
-            ticket_channel = await interaction.guild.create_text_channel(
+        # Ajouter les permissions pour le rôle support
+        support_role = None
+        if config['support_role_id']:
+            support_role = interaction.guild.get_role(config['support_role_id'])
+            if support_role:
+                overwrites[support_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+
+        # Assigner le ticket au membre du staff en ligne le moins chargé
+        assignee = self.pick_assignee(interaction.guild, config, exclude=interaction.user.id)
+        if assignee is not None:
+            overwrites[assignee] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            # Compté dès maintenant pour répartir les créations simultanées
+            self.balancer.add_ticket(interaction.guild.id, assignee.id, interaction.id)
+
+        # Prendre un salon pré-créé si la réserve en contient, sinon créer le canal
+        ticket_channel = self.pool.take(interaction.guild, panel_id, category_id)
+        if ticket_channel is not None and ticket_channel.category_id not in (self.category_shard_ids(config, category_id) or [None]):
+            # Réserve créée avant un changement de catégorie Discord
+            asyncio.create_task(ticket_channel.delete(reason="Salon de réserve dans une ancienne catégorie"))
+            ticket_channel = None
+        if ticket_channel is not None:
+            # Nom, catégorie et permissions modifiés en un seul appel
+            previous_category_id = ticket_channel.category_id
+            category = self.claimed_channel_category(interaction.guild, config, category_id, ticket_channel)
+            moved = {'category': category} if category is not None else {}
+            if category is not None:
+                self.category_counts.reserve(category.id)
+            try:
+                ticket_channel = await ticket_channel.edit(
+                    name=f"ticket-{interaction.user.name}",
+                    overwrites=overwrites,
+                    reason=f"Ticket créé par {interaction.user}",
+                    **moved
+                ) or ticket_channel
+                if category is not None:
+                    self.category_counts.remove(ticket_channel, previous_category_id)
+                    self.category_counts.add(ticket_channel)
+            except discord.NotFound:
+                ticket_channel = None
+            finally:
+                if category is not None:
+                    self.category_counts.release(category.id)
+        if ticket_channel is None:
+            # Dans la catégorie appropriée, ou une catégorie de débordement si elle est pleine
+            ticket_channel = await self.create_ticket_text_channel(
+                interaction.guild, panel_id, category_id,
                 name=f"ticket-{interaction.user.name}",
-                category=discord_category,
                 overwrites=overwrites,
                 reason=f"Ticket créé par {interaction.user}"
             )
+        self.pool.refill(panel_id, category_id, config.get('pool_size', 0))
+        self.journal.start(ticket_channel.id)
 
-            # Créer le message de bienvenue avec les informations de self.ticket_categories
-            embed = discord.Embed(
-                title=f"{category_info['emoji']} Nouveau Ticket - {category_info['name']}",
-                description=category_info['default_message'].format(user=interaction.user.mention),
-                color=category_info['color']
-            )
-            embed.set_footer(text=f"ID du ticket: {ticket_channel.id}")
+        # Créer le message de bienvenue avec les informations de self.ticket_categories
+        embed = discord.Embed(
+            title=f"{category_info['emoji']} Nouveau Ticket - {category_info['name']}",
+            description=category_info['default_message'].format(user=interaction.user.mention),
+            color=category_info['color']
+        )
+        embed.set_footer(text=f"ID du ticket: {ticket_channel.id}")
+        if assignee is not None:
+            embed.add_field(name="Assigné à", value=assignee.mention)
 
-            view = discord.ui.View(timeout=None)
-            close_button = discord.ui.Button(
-                style=discord.ButtonStyle.danger,
-                label="Fermer le ticket",
-                emoji="🔒",
-                custom_id=f"close_ticket:{ticket_channel.id}"
+        view = discord.ui.View(timeout=None)
+        view.add_item(CloseTicketButton(ticket_channel.id))
+
+        # Seul le membre assigné est mentionné, sinon tout le rôle support
+        staff_mention = assignee.mention if assignee else (support_role.mention if support_role else '')
+        welcome_msg = await ticket_channel.send(
+            content=f"{interaction.user.mention} {staff_mention}",
+            embed=embed,
+            view=view
+        )
+
+        # Sauvegarder les informations du ticket
+        self.store.open_ticket(str(interaction.user.id), {
+            'channel_id': ticket_channel.id,
+            'category_id': category_id,
+            'welcome_message_id': welcome_msg.id,
+            'created_at': datetime.utcnow().isoformat(),
+            'panel_id': panel_id,
+            'assignee_id': assignee.id if assignee else None
+        })
+        # Ticket enregistré : l'assignation provisoire est rattachée au salon
+        self.balancer.rekey(interaction.id, ticket_channel.id)
+        self.inactivity.track(ticket_channel.id)
+        self.schedule_inactivity_check()
+
+        # Statistiques
+        stats = self.tickets_data['ticket_stats']
+        stats['total_tickets'] += 1
+        stats['tickets_by_category'][category_id] = stats['tickets_by_category'].get(category_id, 0) + 1
+        self.store.save_stat('total_tickets')
+        self.store.save_stat('tickets_by_category', category_id)
+        self.store.record_event(ticket_channel.id, 'open', time.time(), category_id)
+
+        return ticket_channel
+
+    async def handle_close_request(self, interaction: discord.Interaction, ticket_channel_id: int):
+        """Demande la confirmation de fermeture d'un ticket"""
+        # Vérifier si le canal existe
+        ticket_channel = interaction.guild.get_channel(ticket_channel_id)
+        if not ticket_channel:
+            await interaction.response.send_message("❌ Ce ticket n'existe plus.", ephemeral=True)
+            return
+
+        # Vérifier les permissions
+        creator_id, _ = self.store.ticket_by_channel(ticket_channel_id)
+        member_permissions = ticket_channel.permissions_for(interaction.user)
+        if not (member_permissions.manage_channels or str(interaction.user.id) == creator_id):
+            await interaction.response.send_message("❌ Vous n'avez pas la permission de fermer ce ticket.", ephemeral=True)
+            return
+
+        # Créer le message de confirmation
+        embed = discord.Embed(
+            title="🔒 Fermeture du Ticket",
+            description="Êtes-vous sûr de vouloir fermer ce ticket ?\nUne transcription sera générée avant la fermeture.",
+            color=discord.Color.orange()
+        )
+
+        response = await interaction.response.send_message(embed=embed, view=close_confirmation_view(ticket_channel_id), ephemeral=True)
+        self.delete_after(interaction, response)
+
+    async def handle_confirm_close(self, interaction: discord.Interaction, ticket_channel_id: int):
+        """Ferme un ticket après confirmation"""
+        # Vérifier si le canal existe
+        ticket_channel = interaction.guild.get_channel(ticket_channel_id)
+        if not ticket_channel:
+            await interaction.response.send_message("❌ Ce ticket n'existe plus.", ephemeral=True)
+            return
+
+        if ticket_channel.id in self.closing_tickets:
+            await interaction.response.send_message("⏳ Ce ticket est déjà en cours de fermeture.", ephemeral=True)
+            return
+
+        # Répondre immédiatement (délai de 3 secondes des interactions)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        if not await self.close_ticket_channel(ticket_channel, interaction.user, interaction=interaction):
+            await interaction.followup.send("⏳ Ce ticket est déjà en cours de fermeture.", ephemeral=True)
+
+    async def handle_cancel_close(self, interaction: discord.Interaction, ticket_channel_id: int = None):
+        response = await interaction.response.send_message("❌ Fermeture du ticket annulée.", ephemeral=True)
+        self.delete_after(interaction, response)
+
+    async def handle_delete_request(self, interaction: discord.Interaction, channel_id: str):
+        await self.handle_confirm_delete(interaction, channel_id)
+
+    async def handle_cancel_delete(self, interaction: discord.Interaction, channel_id: str = None):
+        response = await interaction.response.send_message("❌ Suppression annulée.", ephemeral=True)
+        self.delete_after(interaction, response)
+
+    async def close_ticket_channel(self, ticket_channel, closed_by, interaction=None):
+        """Ferme un ticket : transcription, envois (MP et logs) puis suppression du salon
+
+        Les envois vers le créateur et le salon de logs sont faits en parallèle ;
+        le salon est supprimé en dernier. La durée de chaque étape est conservée
+        dans self.close_timings. Retourne False si le ticket est déjà en cours
+        de fermeture (rien n'est fait). Une erreur est journalisée et signalée
+        à l'utilisateur de l'interaction.
+        """
+        if ticket_channel.id in self.closing_tickets:
+            return False  # Double clic ou fermeture automatique simultanée
+        self.closing_tickets.add(ticket_channel.id)
+        try:
+            await self._close_ticket_channel(ticket_channel, closed_by, interaction)
+        except Exception as e:
+            # L'interaction a déjà été différée : sans réponse, l'utilisateur attendrait indéfiniment
+            self.bot.logger.error(f"Erreur lors de la fermeture du ticket {ticket_channel.name}: {e}")
+            if interaction is not None:
+                try:
+                    await interaction.followup.send(f"❌ Une erreur est survenue lors de la fermeture du ticket : {e}", ephemeral=True)
+                except discord.HTTPException:
+                    pass
+        finally:
+            self.closing_tickets.discard(ticket_channel.id)
+        return True
+
+    async def _close_ticket_channel(self, ticket_channel, closed_by, interaction):
+        guild = ticket_channel.guild
+        timings = {}
+        started = time.perf_counter()
+
+        # Générer la transcription depuis le journal local (une seule fois pour toutes les destinations)
+        messages = await self.journal.messages(ticket_channel)
+        timings['transcription'] = time.perf_counter() - started
+
+        # Les pièces jointes doivent être archivées avant la suppression du salon
+        step = time.perf_counter()
+        stored = await self.attachments.archive(ticket_channel.id, messages)
+        transcript = self.journal.to_transcript(ticket_channel.name, messages, stored)
+        timings['pièces jointes'] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        parts = await transcript.parts(guild.filesize_limit, self.tickets_data.get('transcript_format', 'txt'))
+        timings['rendu'] = time.perf_counter() - step
+
+        # Trouver l'utilisateur qui a créé le ticket
+        creator_id, ticket = self.store.ticket_by_channel(ticket_channel.id)
+        creator = guild.get_member(int(creator_id)) if creator_id else None
+
+        sends = []
+        # Envoyer la transcription en MP
+        if creator:
+            embed_mp = discord.Embed(
+                title="📝 Transcription du Ticket",
+                description=f"Voici la transcription de votre ticket dans {guild.name}.",
+                color=discord.Color.blue()
             )
-            view.add_item(close_button)
+            sends.append(self.send_with_retry(creator, embed_mp, parts))
+
+        # Envoyer la transcription dans le salon de logs
+        log_channel = guild.get_channel(self.tickets_data['log_channel_id']) if self.tickets_data.get('log_channel_id') else None
+        if log_channel:
+            embed_log = discord.Embed(
+                title="📝 Ticket Fermé",
+                description=f"**Ticket:** {ticket_channel.name}\n"
+                          f"**Créé par:** {creator.mention if creator else 'Inconnu'}\n"
+                          f"**Fermé par:** {closed_by.mention}",
+                color=discord.Color.orange(),
+                timestamp=datetime.utcnow()
+            )
+            sends.append(self.send_with_retry(log_channel, embed_log, parts))
+
+        step = time.perf_counter()
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        for result in results:
+            if isinstance(result, discord.Forbidden):
+                pass  # L'utilisateur a peut-être bloqué les MPs
+            elif isinstance(result, Exception):
+                self.bot.logger.error(f"Erreur lors de l'envoi de la transcription de {ticket_channel.name}: {result}")
+        timings['envoi'] = time.perf_counter() - step
+
+        # Supprimer le ticket des données (archivé dans l'historique)
+        if creator_id:
+            closed_at = time.time()
+            self.store.record_event(ticket_channel.id, 'close', closed_at, ticket.get('category_id'), ticket.get('priority'))
+            created_at = self.ticket_created_at(ticket)
+            if created_at is not None:
+                self.analytics.record('close', closed_at - created_at, ticket.get('category_id'), ticket.get('priority'), closed_at)
+            self.store.close_ticket(creator_id, ticket_channel.name, closed_by.id)
+            # Indexation dans l'archive en arrière-plan (la transcription est fermée ensuite)
+            asyncio.create_task(self.archive_ticket({
+                'channel_id': ticket_channel.id,
+                'channel_name': ticket_channel.name,
+                'user_id': int(creator_id),
+                'category_id': ticket.get('category_id'),
+                'priority': ticket.get('priority'),
+                'created_at': ticket.get('created_at'),
+                'closed_at': datetime.utcnow().isoformat(),
+                'closed_by': closed_by.id
+            }, messages, transcript))
+        else:
+            transcript.close()
+        self.balancer.remove_ticket(ticket_channel.id)
+        self.journal.delete(ticket_channel.id)
+        self.inactivity.forget(ticket_channel.id)
+
+        if interaction is not None:
+            await interaction.followup.send("✅ Le ticket a été fermé et la transcription a été envoyée.", ephemeral=True)
+
+        # Supprimer le canal en dernier
+        step = time.perf_counter()
+        try:
+            await ticket_channel.delete(reason="Ticket fermé")
+        except discord.NotFound:
+            pass  # Salon déjà supprimé
+        timings['suppression'] = time.perf_counter() - step
+        timings['total'] = time.perf_counter() - started
+
+        self.close_timings.append(timings)
+        self.bot.logger.info(
+            f"Ticket {ticket_channel.name} fermé en {timings['total']:.2f}s ("
+            + ", ".join(f"{stage}: {duration:.2f}s" for stage, duration in timings.items() if stage != 'total')
+            + ")"
+        )
+
+    async def archive_ticket(self, ticket, messages, transcript):
+        """Archive un ticket fermé puis libère sa transcription"""
+        try:
+            await self.archive.add(ticket, messages, transcript)
+        finally:
+            transcript.close()
+
+    async def send_with_retry(self, destination, embed, parts, attempts=3):
+        """Envoie une transcription en réessayant sur les erreurs temporaires"""
+        for attempt in range(1, attempts + 1):
+            try:
+                await self.send_transcript(destination, embed, parts)
+                return
+            except (discord.Forbidden, discord.NotFound):
+                raise
+            except discord.HTTPException:
+                if attempt == attempts:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+    async def send_transcript(self, destination, embed, parts):
+        """Envoie les fichiers d'une transcription (un message par fichier)"""
+        for index, file in enumerate(to_files(parts)):
+            if index == 0:
+                await destination.send(embed=embed, file=file)
+            else:
+                await destination.send(file=file)
 
-            welcome_msg = await ticket_channel.send(
-                content=f"{interaction.user.mention} {support_role.mention if support_role else ''}",
-                embed=embed,
-                view=view
+    @commands.command(name="ticket_timings")
+    @commands.has_permissions(administrator=True)
+    async def ticket_timings(self, ctx):
+        """Affiche la durée moyenne des étapes de fermeture des tickets"""
+        creations = self.ticket_creations
+        if not self.close_timings:
+            await ctx.send(
+                "❌ Aucun ticket n'a été fermé depuis le démarrage du bot. "
+                f"(Créations : {creations.calls} demandes, {creations.absorbed} doublons absorbés)"
             )
+            return
 
-            # Sauvegarder les informations du ticket
-            self.tickets_data['active_tickets'][str(interaction.user.id)] = {
-                'channel_id': ticket_channel.id,
-                'category_id': category_id,
-                'welcome_message_id': welcome_msg.id,
-                'created_at': datetime.utcnow().isoformat()
-            }
-            self.save_tickets()
+        stages = {}
+        for timings in self.close_timings:
+            for stage, duration in timings.items():
+                stages.setdefault(stage, []).append(duration)
 
-            await interaction.response.send_message(
-                f"✅ Votre ticket a été créé : {ticket_channel.mention}",
-                ephemeral=True
+        embed = discord.Embed(
+            title="⏱️ Fermeture des Tickets",
+            description=f"Durée moyenne des étapes sur les {len(self.close_timings)} dernières fermetures",
+            color=discord.Color.blue()
+        )
+        for stage, durations in stages.items():
+            embed.add_field(
+                name=stage.capitalize(),
+                value=f"{sum(durations) / len(durations):.2f}s (max {max(durations):.2f}s)"
             )
-            asyncio.create_task(self.delete_after(interaction))
+        embed.set_footer(text=f"Créations : {creations.calls} demandes, {creations.absorbed} doublons absorbés")
+        await ctx.send(embed=embed)
 
-        elif custom_id.startswith('close_ticket:'):
-            # Extraire l'ID du canal
-            _, ticket_channel_id = custom_id.split(':')
-            ticket_channel_id = int(ticket_channel_id)
-            
-            # Vérifier si le canal existe
-            ticket_channel = interaction.guild.get_channel(ticket_channel_id)
-            if not ticket_channel:
-                await interaction.response.send_message("❌ Ce ticket n'existe plus.", ephemeral=True)
-                return
+    @commands.command(name="ticket_stats")
+    @commands.has_permissions(administrator=True)
+    async def ticket_stats(self, ctx):
+        """Affiche les délais de première réponse et de fermeture des tickets"""
+        def summary(category=ALL, priority=ALL):
+            parts = []
+            for metric, label in (('first_response', "réponse"), ('close', "fermeture")):
+                count, (median, p90) = self.analytics.quantiles(metric, category, priority)
+                parts.append(f"{label} {format_duration(median)} / {format_duration(p90)}" if count else f"{label} -")
+            return " • ".join(parts)
+
+        stats = self.tickets_data['ticket_stats']
+        embed = discord.Embed(
+            title="📊 Statistiques des Tickets",
+            description=f"Délais sur les {self.analytics.window_days} derniers jours (médiane / 90e centile)",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Tickets",
+            value=f"**Créés:** {stats['total_tickets']}\n**Ouverts:** {len(self.tickets_data['active_tickets'])}",
+            inline=False
+        )
+        for metric, label in (('first_response', "⏱️ Première réponse du staff"), ('close', "🔒 Fermeture")):
+            count, (median, p90) = self.analytics.quantiles(metric)
+            embed.add_field(name=label, value=f"{format_duration(median)} / {format_duration(p90)} ({count} tickets)")
+
+        embed.add_field(
+            name="Par catégorie",
+            value="\n".join(
+                f"{info['emoji']} {info['name']} : {summary(category=category_id)}"
+                for category_id, info in self.ticket_categories.items()
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="Par priorité",
+            value="\n".join(
+                f"{self.priorities[priority]['emoji'] if priority in self.priorities else '⚪'} {priority} : {summary(priority=priority)}"
+                for priority in list(self.priorities) + [NO_PRIORITY]
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
 
-            # Vérifier les permissions
-            member_permissions = ticket_channel.permissions_for(interaction.user)
-            if not (member_permissions.manage_channels or interaction.user.id == int(next(
-                (user_id for user_id, ticket in self.tickets_data['active_tickets'].items() 
-                if ticket['channel_id'] == ticket_channel_id), 0
-            ))):
-                await interaction.response.send_message("❌ Vous n'avez pas la permission de fermer ce ticket.", ephemeral=True)
+    @commands.command(name="ticket_assign")
+    @commands.has_permissions(administrator=True)
+    async def ticket_assign(self, ctx, channel: discord.TextChannel, mode: str = None):
+        """Active ou désactive l'assignation automatique des tickets au staff (on/off)"""
+        panel_id = str(channel.id)
+        config = self.tickets_data['ticket_configs'].get(panel_id)
+        if config is None:
+            await ctx.send("❌ Aucune configuration trouvée pour ce salon.")
+            return
+        support_role = ctx.guild.get_role(config['support_role_id']) if config.get('support_role_id') else None
+
+        if mode is not None:
+            if mode.lower() not in ("on", "off"):
+                await ctx.send("❌ Mode invalide. Utilisez `on` ou `off`.")
                 return
+            if mode.lower() == "on" and support_role is None:
+                await ctx.send("❌ Cette configuration n'a pas de rôle support.")
+                return
+            config['auto_assign'] = mode.lower() == "on"
+            self.store.save_config(panel_id)
+            if config['auto_assign']:
+                self.track_support_role(ctx.guild, support_role)
+
+        if not config.get('auto_assign'):
+            await ctx.send(f"ℹ️ L'assignation automatique est désactivée pour {channel.mention}.")
+            return
+
+        online = sorted(
+            self.balancer.online(ctx.guild.id, support_role.id),
+            key=lambda member_id: self.balancer.load(ctx.guild.id, member_id)
+        )
+        lines = []
+        for member_id in online[:15]:
+            member = ctx.guild.get_member(member_id)
+            if member is not None:
+                lines.append(f"• {member.mention} : {len(self.balancer.tickets(ctx.guild.id, member_id))} tickets "
+                             f"(charge {self.balancer.load(ctx.guild.id, member_id)})")
+        embed = discord.Embed(
+            title="👥 Assignation Automatique",
+            description=f"Les nouveaux tickets de {channel.mention} sont assignés au membre de "
+                        f"{support_role.mention} en ligne le moins chargé.",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name=f"Staff en ligne ({len(online)})",
+            value="\n".join(lines) or "Aucun membre en ligne",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="ticket_search")
+    @commands.has_permissions(administrator=True)
+    async def ticket_search(self, ctx, *, query: str = None):
+        """Recherche dans les messages des tickets fermés"""
+        if not query:
+            await ctx.send("❌ Veuillez indiquer les mots à rechercher. Exemple : `?ticket_search commande #1234`")
+            return
+
+        total, hits = await self.archive.search(query, SearchResultsView.PAGE_SIZE)
+        view = SearchResultsView(self.archive, query, ctx.author, total)
+        await ctx.send(embed=view.build_embed(hits), view=view if view.pages > 1 else None)
 
-            # Créer le message de confirmation
+    @commands.command(name="ticket_archive")
+    @commands.has_permissions(administrator=True)
+    async def ticket_archive(self, ctx, number: int = None):
+        """Affiche l'espace occupé par l'archive ou renvoie la transcription d'un ticket archivé"""
+        if number is None:
+            storage = await self.archive.storage()
             embed = discord.Embed(
-                title="🔒 Fermeture du Ticket",
-                description="Êtes-vous sûr de vouloir fermer ce ticket ?\nUne transcription sera générée avant la fermeture.",
-                color=discord.Color.orange()
+                title="🗄️ Archive des Tickets",
+                description="Transcriptions compressées des tickets fermés : zlib avec dictionnaire pendant "
+                            "30 jours, puis lzma, supprimées après un an.",
+                color=discord.Color.blue()
             )
+            for tier, label in (('hot', "Récentes (zlib)"), ('cold', "Anciennes (lzma)")):
+                count, raw_size, stored_size = storage.get(tier, (0, 0, 0))
+                ratio = f"{raw_size / stored_size:.1f}x" if stored_size else "-"
+                embed.add_field(
+                    name=label,
+                    value=f"{count} transcriptions\n{raw_size / 1024:.0f} Ko → {stored_size / 1024:.0f} Ko ({ratio})",
+                    inline=True
+                )
+            await ctx.send(embed=embed)
+            return
 
-            view = discord.ui.View(timeout=None)
-            confirm_button = discord.ui.Button(
-                style=discord.ButtonStyle.danger,
-                label="Confirmer",
-                emoji="✅",
-                custom_id=f"confirm_close:{ticket_channel_id}"
-            )
-            cancel_button = discord.ui.Button(
-                style=discord.ButtonStyle.secondary,
-                label="Annuler",
-                emoji="❌",
-                custom_id=f"cancel_close:{ticket_channel_id}"
-            )
-            view.add_item(confirm_button)
-            view.add_item(cancel_button)
+        archived = await self.archive.transcript(number)
+        if archived is None:
+            await ctx.send(f"❌ Aucune transcription archivée pour le ticket n°{number}.")
+            return
+        info, raw = archived
+        transcript = Transcript(info['channel_name'])
+        transcript.add_line(raw.decode('utf-8'))
+        parts = await transcript.parts(ctx.guild.filesize_limit, self.tickets_data.get('transcript_format', 'txt'))
+        transcript.close()
+        await ctx.send(
+            f"📝 Transcription du ticket n°{number} (#{info['channel_name']}, fermé le {info['closed_at'][:10]})",
+            files=to_files(parts)
+        )
 
-            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
+    @commands.command(name="ticket_pool")
+    @commands.has_permissions(administrator=True)
+    async def ticket_pool(self, ctx, channel: discord.TextChannel, size: int = None):
+        """Définit le nombre de salons pré-créés par catégorie d'une configuration"""
+        panel_id = str(channel.id)
+        config = self.tickets_data['ticket_configs'].get(panel_id)
+        if config is None:
+            await ctx.send("❌ Aucune configuration trouvée pour ce salon.")
+            return
 
-        elif custom_id.startswith('confirm_close:'):
-            _, ticket_channel_id = custom_id.split(':')
-            ticket_channel_id = int(ticket_channel_id)
-            
-            # Vérifier si le canal existe
-            ticket_channel = interaction.guild.get_channel(ticket_channel_id)
-            if not ticket_channel:
-                await interaction.response.send_message("❌ Ce ticket n'existe plus.", ephemeral=True)
+        if size is not None:
+            if not 0 <= size <= MAX_POOL_SIZE:
+                await ctx.send(f"❌ La taille de la réserve doit être comprise entre 0 et {MAX_POOL_SIZE}.")
                 return
+            config['pool_size'] = size
+            self.store.save_config(panel_id)
+            for category_id in config.get('categories', {}):
+                await self.pool.shrink(ctx.guild, panel_id, category_id, size)
+                self.pool.refill(panel_id, category_id, size)
 
-            # Générer la transcription
-            transcript = []
-            async for message in ticket_channel.history(limit=None, oldest_first=True):
-                timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
-                content = message.content or ""
-                for embed in message.embeds:
-                    content += f"\n[Embed: {embed.title}]"
-                for attachment in message.attachments:
-                    content += f"\n[Pièce jointe: {attachment.filename}]"
-                transcript.append(f"[{timestamp}] {message.author}: {content}")
-
-            # Créer le fichier de transcription
-            transcript_content = "\n".join(transcript)
-            transcript_file = discord.File(
-                io.StringIO(transcript_content),
-                filename=f"transcript-{ticket_channel.name}.txt"
+        size = config.get('pool_size', 0)
+        embed = discord.Embed(
+            title="🗄️ Réserve de Salons",
+            description=f"Salons pré-créés pour {channel.mention} : **{size}** par catégorie"
+                        + ("" if size else " (désactivée)"),
+            color=discord.Color.blue()
+        )
+        for category_id in config.get('categories', {}):
+            category_info = self.ticket_categories.get(category_id, {'emoji': '', 'name': category_id})
+            embed.add_field(
+                name=f"{category_info['emoji']} {category_info['name']}",
+                value=f"{self.pool.size(panel_id, category_id)}/{size} prêts"
             )
+        embed.set_footer(text=f"Ouvertures : {self.pool.hits} depuis la réserve, {self.pool.misses} sans réserve")
+        await ctx.send(embed=embed)
 
-            # Trouver l'utilisateur qui a créé le ticket
-            creator_id = next(
-                (user_id for user_id, ticket in self.tickets_data['active_tickets'].items() 
-                if ticket['channel_id'] == ticket_channel_id),
-                None
-            )
+    @commands.command(name="ticket_inactivity")
+    @commands.has_permissions(administrator=True)
+    async def ticket_inactivity(self, ctx, channel: discord.TextChannel, hours: int = None, warning_hours: int = 12):
+        """Définit le délai d'inactivité avant la fermeture automatique des tickets (0 = désactivé)"""
+        panel_id = str(channel.id)
+        config = self.tickets_data['ticket_configs'].get(panel_id)
+        if config is None:
+            await ctx.send("❌ Aucune configuration trouvée pour ce salon.")
+            return
 
-            # Envoyer la transcription en MP
-            if creator_id:
-                creator = interaction.guild.get_member(int(creator_id))
-                if creator:
-                    try:
-                        embed_mp = discord.Embed(
-                            title="📝 Transcription du Ticket",
-                            description=f"Voici la transcription de votre ticket dans {interaction.guild.name}.",
-                            color=discord.Color.blue()
-                        )
-                        await creator.send(embed=embed_mp, file=discord.File(
-                            io.StringIO(transcript_content),
-                            filename=f"transcript-{ticket_channel.name}.txt"
-                        ))
-                    except discord.Forbidden:
-                        pass  # L'utilisateur a peut-être bloqué les MPs
-
-            # Envoyer la transcription dans le salon de logs
-            if self.tickets_data.get('log_channel_id'):
-                log_channel = interaction.guild.get_channel(self.tickets_data['log_channel_id'])
-                if log_channel:
-                    embed_log = discord.Embed(
-                        title="📝 Ticket Fermé",
-                        description=f"**Ticket:** {ticket_channel.name}\n"
-                                  f"**Créé par:** {creator.mention if creator else 'Inconnu'}\n"
-                                  f"**Fermé par:** {interaction.user.mention}",
-                        color=discord.Color.orange(),
-                        timestamp=datetime.utcnow()
-                    )
-                    await log_channel.send(
-                        embed=embed_log,
-                        file=discord.File(
-                            io.StringIO(transcript_content),
-                            filename=f"transcript-{ticket_channel.name}.txt"
-                        )
-                    )
+        if hours is not None:
+            if hours < 0 or warning_hours < 0:
+                await ctx.send("❌ Les délais doivent être positifs.")
+                return
+            config['inactivity_hours'] = hours
+            config['inactivity_warning_hours'] = warning_hours
+            self.store.save_config(panel_id)
+            self.inactivity.reschedule()
+            self.schedule_inactivity_check()
+
+        hours = config.get('inactivity_hours', 0)
+        if hours:
+            warn_after, close_after = (value / 3600 for value in self.inactivity_delays(config))
+            description = (f"Les tickets de {channel.mention} sont fermés après **{close_after:g}h** sans message, "
+                           f"avec un avertissement après **{warn_after:g}h**.")
+        else:
+            description = f"La fermeture automatique est désactivée pour {channel.mention}."
+        embed = discord.Embed(title="⏰ Tickets Inactifs", description=description, color=discord.Color.blue())
+        embed.set_footer(text=f"{len(self.inactivity)} tickets suivis")
+        await ctx.send(embed=embed)
 
-            # Supprimer le ticket des données
-            if creator_id:
-                del self.tickets_data['active_tickets'][creator_id]
-                self.save_tickets()
+    @commands.command(name="ticket_transcript")
+    @commands.has_permissions(administrator=True)
+    async def ticket_transcript(self, ctx, fmt: str = None):
+        """Définit le format des transcriptions (txt ou html)"""
+        if fmt is None or fmt.lower() not in ("txt", "html"):
+            await ctx.send(f"❌ Format invalide. Formats disponibles : txt, html (actuel : {self.tickets_data['transcript_format']})")
+            return
 
-            # Supprimer le canal
-            await ticket_channel.delete(reason="Ticket fermé")
-            await interaction.response.send_message("✅ Le ticket a été fermé et la transcription a été envoyée.", ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
-
-        elif custom_id.startswith('cancel_close:'):
-            await interaction.response.send_message("❌ Fermeture du ticket annulée.", ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
-        elif custom_id.startswith('confirm_delete:'):
-            _, channel_id = custom_id.split(':')
-            await self.handle_confirm_delete(interaction, channel_id)
-            asyncio.create_task(self.delete_after(interaction))
-        elif custom_id.startswith('cancel_delete:'):
-            await interaction.response.send_message("❌ Suppression annulée.", ephemeral=True)
-            asyncio.create_task(self.delete_after(interaction))
-        elif custom_id.startswith('edit_role:'):
-            _, channel_id = custom_id.split(':')
-            await self.handle_role_edit(interaction, channel_id)
+        self.store.set_transcript_format(fmt.lower())
+
+        embed = discord.Embed(
+            title="✅ Format des Transcriptions",
+            description=f"Les transcriptions seront générées au format **{fmt.lower()}**.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
 
     @commands.command(name="set_priority")
     @commands.has_permissions(administrator=True)
     async def set_priority(self, ctx, priority: str = None):
         """Définit la priorité d'un ticket"""
         # Vérifier si le canal est un ticket
-        ticket_info = None
-        ticket_owner_id = None
-        
-        # Chercher le ticket dans les tickets actifs
-        for user_id, ticket in self.tickets_data['active_tickets'].items():
-            if ticket['channel_id'] == ctx.channel.id:
-                ticket_info = ticket
-                ticket_owner_id = user_id
-                break
+        ticket_owner_id, ticket_info = self.store.ticket_by_channel(ctx.channel.id)
 
         if not ticket_info:
             await ctx.send("❌ Ce salon n'est pas un ticket!")
@@ -965,9 +1837,6 @@ class TicketsCog(commands.Cog):
 
         priority = priority.lower()
         
-        # Mettre à jour la priorité dans les données du ticket
-        ticket_info['priority'] = priority
-        
         # Mettre à jour les statistiques
         if 'tickets_by_priority' not in self.tickets_data['ticket_stats']:
             self.tickets_data['ticket_stats']['tickets_by_priority'] = {
@@ -977,7 +1846,10 @@ class TicketsCog(commands.Cog):
                 "urgente": 0
             }
         self.tickets_data['ticket_stats']['tickets_by_priority'][priority] += 1
-        self.save_tickets()
+        # Mettre à jour la priorité dans les données du ticket
+        self.store.set_priority(ticket_owner_id, priority)
+        self.balancer.set_priority(ctx.channel.id, priority)
+        self.store.save_stat('tickets_by_priority', priority)
 
         # Mettre à jour le nom du salon avec l'emoji de priorité
         priority_emoji = self.priorities[priority]['emoji']
@@ -1014,14 +1886,15 @@ class TicketsCog(commands.Cog):
         """Affiche la liste des tickets par priorité"""
         active_tickets = {}
         
-        # Organiser les tickets par priorité
-        for ticket_id, ticket_data in self.tickets_data['active_tickets'].items():
-            priority = ticket_data.get('priority', 'non définie')
-            if priority not in active_tickets:
-                active_tickets[priority] = []
-            channel = ctx.guild.get_channel(int(ticket_id))
-            if channel:
-                active_tickets[priority].append(channel)
+        # Organiser les tickets par priorité (index maintenu par le store)
+        for priority in ['urgente', 'haute', 'moyenne', 'basse', None]:
+            channels = []
+            for user_id in self.store.tickets_by_priority(priority):
+                ticket_data = self.tickets_data['active_tickets'][user_id]
+                channel = ctx.guild.get_channel(ticket_data['channel_id'])
+                if channel:
+                    channels.append(channel)
+            active_tickets[priority or 'non définie'] = channels
 
         embed = discord.Embed(
             title="📊 Liste des Tickets par Priorité",
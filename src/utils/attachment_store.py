@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger('discord')
+
+CHUNK_SIZE = 64 * 1024
+MAX_SIZE = 25 * 1024 * 1024  # Pièces jointes plus grandes non archivées
+RETENTION_DAYS = 90
+
+AttachmentKey = Tuple[int, str]  # (message_id, nom du fichier)
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS attachments (
+        message_id INTEGER NOT NULL,
+        filename TEXT NOT NULL,
+        channel_id INTEGER NOT NULL,
+        size INTEGER,
+        sha256 TEXT NOT NULL,
+        stored_at REAL NOT NULL,
+        PRIMARY KEY (message_id, filename)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_attachments_sha ON attachments (sha256)",
+    "CREATE INDEX IF NOT EXISTS idx_attachments_stored ON attachments (stored_at)",
+]
+
+class AttachmentStore:
+    """Archive locale des pièces jointes des tickets, adressée par contenu
+
+    Les pièces jointes sont téléchargées dès leur envoi (les URL de Discord
+    expirent et disparaissent avec le salon) par un nombre limité de
+    workers. Chaque fichier est lu par morceaux et haché au fil de l'eau,
+    puis rangé sous data/attachments/<2 premiers caractères>/<sha256> : un
+    même fichier envoyé plusieurs fois n'est stocké qu'une fois. L'index
+    SQLite n'est lu et écrit que par un thread dédié.
+    """
+
+    def __init__(self, directory: str = 'data/attachments', max_size: int = MAX_SIZE, workers: int = 3):
+        self.directory = directory
+        self.max_size = max_size
+        self.workers = workers
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, 'index.db')
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='attachments')
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: Dict[int, int] = {}  # channel_id -> téléchargements en attente
+        self._idle: Dict[int, asyncio.Event] = {}
+        self.downloaded = 0
+        self.deduplicated = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._session = aiohttp.ClientSession()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._session is not None:
+            await self._session.close()
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, sha256[:2], sha256)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _lookup(self, keys: List[AttachmentKey]) -> Dict[AttachmentKey, str]:
+        found = {}
+        message_ids = sorted({message_id for message_id, _ in keys})
+        for start in range(0, len(message_ids), 500):
+            batch = message_ids[start:start + 500]
+            found.update(
+                ((message_id, filename), sha256)
+                for message_id, filename, sha256 in self._db.execute(
+                    f"SELECT message_id, filename, sha256 FROM attachments WHERE message_id IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+            )
+        return {key: found[key] for key in keys if key in found}
+
+    async def lookup(self, keys: Iterable[AttachmentKey]) -> Dict[AttachmentKey, str]:
+        """sha256 des pièces jointes archivées parmi `keys` ((message_id, nom), en une requête)"""
+        keys = list(keys)
+        return await self._run(self._lookup, keys) if keys else {}
+
+    def enqueue(self, channel_id: int, message_id: int, attachment: dict) -> None:
+        """Programme le téléchargement d'une pièce jointe ({'filename', 'url', 'size'})"""
+        if self._queue is None:
+            return
+        self._pending[channel_id] = self._pending.get(channel_id, 0) + 1
+        self._idle.setdefault(channel_id, asyncio.Event()).clear()
+        self._queue.put_nowait((channel_id, message_id, attachment))
+
+    async def archive(self, channel_id: int, messages: List[dict], timeout: float = 60.0) -> Dict[AttachmentKey, str]:
+        """Archive les pièces jointes manquantes d'un ticket et attend la fin des téléchargements
+
+        Retourne le sha256 de chaque pièce jointe archivée ((message_id, nom) -> sha256).
+        """
+        attachments = {
+            (record['id'], attachment['filename']): attachment
+            for record in messages for attachment in record['attachments']
+        }
+        stored = await self.lookup(attachments)
+        missing = [key for key in attachments if key not in stored]
+        for message_id, filename in missing:
+            self.enqueue(channel_id, message_id, attachments[(message_id, filename)])
+        if self._pending.get(channel_id):
+            try:
+                await asyncio.wait_for(self._idle[channel_id].wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Pièces jointes du salon {channel_id} encore en cours de téléchargement")
+        if missing:
+            stored.update(await self.lookup(missing))
+        return stored
+
+    async def _worker(self) -> None:
+        while True:
+            channel_id, message_id, attachment = await self._queue.get()
+            try:
+                await self._download(channel_id, message_id, attachment)
+            except Exception as e:
+                # Un worker ne s'arrête jamais sur une erreur (réseau, disque, index...)
+                self.failed += 1
+                logger.error(f"Erreur lors du téléchargement de {attachment['filename']}: {e}")
+            finally:
+                self._queue.task_done()
+                self._pending[channel_id] -= 1
+                if not self._pending[channel_id]:
+                    del self._pending[channel_id]
+                    self._idle.pop(channel_id).set()
+
+    async def _download(self, channel_id: int, message_id: int, attachment: dict) -> None:
+        if await self.lookup([(message_id, attachment['filename'])]):
+            return
+        if (attachment.get('size') or 0) > self.max_size:
+            self.skipped += 1
+            return
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                async with self._session.get(attachment['url'], timeout=aiohttp.ClientTimeout(total=300)) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_size:
+                            self.skipped += 1
+                            return
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self.blob_path(sha256)
+            if os.path.exists(path):
+                self.deduplicated += 1
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                self.downloaded += 1
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        await self._run(self._index, (message_id, attachment['filename'], channel_id, size, sha256, time.time()))
+
+    def _index(self, row: tuple) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO attachments (message_id, filename, channel_id, size, sha256, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                row
+            )
+
+    def _prune(self, retention_days: int) -> int:
+        # Connexion propre au thread de nettoyage
+        db = sqlite3.connect(self.index_path)
+        try:
+            cutoff = time.time() - retention_days * 86400
+            with db:
+                expired = {row[0] for row in db.execute("SELECT sha256 FROM attachments WHERE stored_at < ?", (cutoff,))}
+                db.execute("DELETE FROM attachments WHERE stored_at < ?", (cutoff,))
+            removed = 0
+            for sha256 in expired:
+                if db.execute("SELECT 1 FROM attachments WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone():
+                    continue  # Encore référencé par une pièce jointe plus récente
+                try:
+                    os.remove(self.blob_path(sha256))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            return removed
+        finally:
+            db.close()
+
+    async def prune(self, retention_days: int = RETENTION_DAYS) -> int:
+        """Supprime les pièces jointes archivées depuis plus de `retention_days` jours"""
+        return await asyncio.to_thread(self._prune, retention_days)
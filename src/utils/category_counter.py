@@ -0,0 +1,61 @@
+from typing import Dict, Set
+
+import discord
+
+CATEGORY_LIMIT = 50  # Salons au maximum dans une catégorie Discord
+
+class CategoryChannelCounter:
+    """Nombre de salons de chaque catégorie Discord, tenu à jour en direct
+
+    Initialisé une fois par serveur depuis le cache, puis mis à jour par les
+    événements de création, suppression et déplacement de salons : savoir si
+    une catégorie est pleine ne demande aucun parcours des salons du serveur.
+    Les places réservées (salon en cours de création) sont comptées jusqu'à
+    l'appel de release() pour que deux créations simultanées ne dépassent
+    pas la limite.
+    """
+
+    def __init__(self, limit: int = CATEGORY_LIMIT):
+        self.limit = limit
+        self._channels: Dict[int, Set[int]] = {}  # catégorie -> salons
+        self._reserved: Dict[int, int] = {}
+
+    def seed(self, guild: discord.Guild) -> None:
+        for channel in guild.channels:
+            self.add(channel)
+
+    def add(self, channel) -> None:
+        if channel.category_id is not None:
+            self._channels.setdefault(channel.category_id, set()).add(channel.id)
+
+    def remove(self, channel, category_id: int = None) -> None:
+        category_id = category_id if category_id is not None else channel.category_id
+        channels = self._channels.get(category_id)
+        if channels is not None:
+            channels.discard(channel.id)
+            if not channels:
+                del self._channels[category_id]
+
+    def move(self, before, after) -> None:
+        self.remove(before)
+        self.add(after)
+
+    def forget_category(self, category_id: int) -> None:
+        self._channels.pop(category_id, None)
+        self._reserved.pop(category_id, None)
+
+    def count(self, category_id: int) -> int:
+        return len(self._channels.get(category_id, ())) + self._reserved.get(category_id, 0)
+
+    def available(self, category_id: int) -> bool:
+        return self.count(category_id) < self.limit
+
+    def reserve(self, category_id: int) -> None:
+        self._reserved[category_id] = self._reserved.get(category_id, 0) + 1
+
+    def release(self, category_id: int) -> None:
+        remaining = self._reserved.get(category_id, 0) - 1
+        if remaining > 0:
+            self._reserved[category_id] = remaining
+        else:
+            self._reserved.pop(category_id, None)
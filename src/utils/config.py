@@ -1,6 +1,10 @@
+import asyncio
 import json
+import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger('discord')
 
 DEFAULT_CONFIG = {
     "banned_words": [
@@ -25,6 +29,7 @@ DEFAULT_CONFIG = {
     "goodbye_message": "Au revoir {member.name} ! 😢\nNous sommes maintenant {member_count} membres.",
     "auto_reactions": {},  # Format: {"channel_id": ["emoji1", "emoji2", ...]}
     "auto_reaction_chance": 0.3,  # Probabilité de réaction (30%)
+    "staff_presence": False,  # Intent Presence : tickets assignés au staff en ligne uniquement
     "stats_channels": {
         "members": None,     # ID du salon pour le compteur de membres
         "bots": None,       # ID du salon pour le compteur de bots
@@ -64,8 +69,87 @@ def load_config() -> Dict[str, Any]:
         return DEFAULT_CONFIG
 
 def save_config(config: Dict[str, Any]) -> None:
-    """Sauvegarde la configuration dans le fichier config.json"""
+    """Sauvegarde la configuration dans le fichier config.json
+
+    L'écriture passe par un fichier temporaire synchronisé sur disque puis
+    renommé : un arrêt brutal laisse l'ancien fichier ou le nouveau, jamais
+    un fichier tronqué.
+    """
+    write_config(json.dumps(config, indent=4, ensure_ascii=False))
+
+def write_config(content: str) -> None:
+    """Écrit une configuration déjà sérialisée (remplacement atomique)"""
     config_path = "data/config.json"
-    
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=4, ensure_ascii=False) 
\ No newline at end of file
+    tmp_path = config_path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, config_path)
+
+class ConfigWriter:
+    """Sauvegarde différée de la configuration
+
+    save() marque la configuration comme modifiée ; l'écriture a lieu après
+    `delay` secondes dans un thread, de sorte qu'une rafale de modifications
+    ne coûte qu'une écriture et que la boucle d'événements n'attend jamais
+    le disque. Seul un instantané compact est pris sur la boucle (cohérent,
+    environ trois fois moins coûteux que la sérialisation indentée) ; la mise
+    en forme et l'écriture du fichier se font dans le thread. En cas d'erreur
+    disque, l'écriture est retentée avec un délai croissant.
+    flush() force l'écriture (à appeler à l'arrêt du bot).
+    """
+
+    def __init__(self, config: Dict[str, Any], delay: float = 2.0):
+        self.config = config
+        self.delay = delay
+        self.writes = 0
+        self.failures = 0
+        self._dirty = False
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def save(self) -> None:
+        """Planifie la sauvegarde de la configuration"""
+        self._dirty = True
+        if self._handle is None and (self._task is None or self._task.done()):
+            loop = asyncio.get_running_loop()
+            self._handle = loop.call_later(self.delay, self._start)
+
+    def _start(self) -> None:
+        self._handle = None
+        self._task = asyncio.create_task(self._write())
+
+    async def _write(self) -> None:
+        # Les modifications faites pendant l'écriture relancent un tour de boucle
+        while self._dirty:
+            self._dirty = False
+            # Instantané pris sur la boucle : les commandes ne modifient pas le dict pendant la sérialisation
+            snapshot = json.dumps(self.config, ensure_ascii=False, separators=(',', ':'))
+            try:
+                await asyncio.to_thread(self._write_snapshot, snapshot)
+                self.writes += 1
+                self.failures = 0
+            except OSError as e:
+                self._dirty = True
+                self.failures += 1
+                retry = min(self.delay * 2 ** self.failures, 300)
+                logger.error(f"Erreur lors de la sauvegarde de la configuration: {e} (nouvel essai dans {retry:.0f}s)")
+                if self._handle is None:
+                    self._handle = asyncio.get_running_loop().call_later(retry, self._start)
+                return
+
+    @staticmethod
+    def _write_snapshot(snapshot: str) -> None:
+        write_config(json.dumps(json.loads(snapshot), indent=4, ensure_ascii=False))
+
+    async def flush(self) -> None:
+        """Écrit immédiatement les modifications en attente"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._task is not None and not self._task.done():
+            await self._task
+        if self._dirty:
+            await self._write()
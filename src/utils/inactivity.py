@@ -0,0 +1,96 @@
+import heapq
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# (délai avant avertissement, délai avant fermeture) en secondes, None si désactivé
+Thresholds = Callable[[int], Optional[Tuple[float, float]]]
+
+class InactivityIndex:
+    """Index de la dernière activité des tickets
+
+    touch() ne fait qu'écrire une date dans un dictionnaire : il est appelé à
+    chaque message. Le tas contient une échéance par ticket ; due() ne
+    regarde que les échéances dépassées et, si le ticket a eu de l'activité
+    depuis, le replace simplement plus loin dans le tas. Aucun parcours de
+    tous les tickets n'est nécessaire.
+    """
+
+    def __init__(self, thresholds: Thresholds):
+        self.thresholds = thresholds
+        self._last: Dict[int, float] = {}   # channel_id -> dernière activité
+        self._heap: List[Tuple[float, int]] = []  # (échéance, channel_id)
+        self._warned: Set[int] = set()
+
+    def track(self, channel_id: int, last_activity: float = None) -> None:
+        """Commence à suivre un ticket"""
+        self._last[channel_id] = last_activity if last_activity is not None else time.time()
+        self._warned.discard(channel_id)
+        self._schedule(channel_id)
+
+    def touch(self, channel_id: int, at: float = None) -> None:
+        """Enregistre une activité dans un ticket suivi"""
+        if channel_id in self._last:
+            self._last[channel_id] = at if at is not None else time.time()
+            self._warned.discard(channel_id)
+
+    def forget(self, channel_id: int) -> None:
+        # L'entrée du tas est ignorée lorsqu'elle arrive à échéance
+        self._last.pop(channel_id, None)
+        self._warned.discard(channel_id)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._last
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def last_activity(self, channel_id: int) -> Optional[float]:
+        return self._last.get(channel_id)
+
+    def _deadline(self, channel_id: int) -> Optional[float]:
+        thresholds = self.thresholds(channel_id)
+        if thresholds is None:
+            return None
+        warn_after, close_after = thresholds
+        delay = close_after if channel_id in self._warned else warn_after
+        return self._last[channel_id] + delay
+
+    def _schedule(self, channel_id: int) -> None:
+        deadline = self._deadline(channel_id)
+        if deadline is not None:
+            heapq.heappush(self._heap, (deadline, channel_id))
+
+    def next_deadline(self) -> Optional[float]:
+        """Échéance la plus proche (parfois celle d'un ticket fermé ou actif depuis)"""
+        return self._heap[0][0] if self._heap else None
+
+    def reschedule(self) -> None:
+        """Recalcule toutes les échéances (après un changement de seuil)"""
+        self._heap = []
+        for channel_id in self._last:
+            self._schedule(channel_id)
+
+    def due(self, now: float = None) -> List[Tuple[int, str]]:
+        """Retourne les tickets à avertir ('warn') ou à fermer ('close')"""
+        now = now if now is not None else time.time()
+        actions = []
+        while self._heap and self._heap[0][0] <= now:
+            _, channel_id = heapq.heappop(self._heap)
+            if channel_id not in self._last:
+                continue  # Ticket fermé entre-temps
+
+            deadline = self._deadline(channel_id)
+            if deadline is None:
+                continue  # Fermeture automatique désactivée pour cette configuration
+            if deadline > now:
+                heapq.heappush(self._heap, (deadline, channel_id))  # Activité récente
+                continue
+
+            if channel_id in self._warned:
+                actions.append((channel_id, 'close'))
+                self.forget(channel_id)
+            else:
+                actions.append((channel_id, 'warn'))
+                self._warned.add(channel_id)
+                self._schedule(channel_id)
+        return actions
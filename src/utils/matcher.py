@@ -0,0 +1,81 @@
+import re
+from typing import Iterable, Optional
+
+class BannedWordMatcher:
+    """Détecteur de mots interdits compilé en une seule expression régulière
+
+    Les mots sont rangés dans un trie puis convertis en une alternance
+    factorisée par préfixe (ex: "hack", "hacks" -> "hacks?"), ce qui permet
+    de parcourir le message une seule fois quel que soit le nombre de mots.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._pattern: Optional[re.Pattern] = None
+        self.words = frozenset()
+        self.rebuild(words)
+
+    def rebuild(self, words: Iterable[str]) -> None:
+        """Reconstruit le détecteur à partir de la liste de mots
+
+        La nouvelle expression est compilée avant d'être publiée : un message
+        traité pendant la reconstruction utilise l'ancienne version complète.
+        """
+        words = frozenset(w.lower() for w in words if w)
+        pattern = None
+        if words:
+            pattern = re.compile(rf"\b(?:{self._build_regex(words)})\b")
+        self._pattern, self.words = pattern, words
+
+    def search(self, content: str) -> Optional[str]:
+        """Retourne le premier mot interdit trouvé dans le contenu, sinon None"""
+        pattern = self._pattern
+        if pattern is None:
+            return None
+        match = pattern.search(content.lower())
+        return match.group(0) if match else None
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @classmethod
+    def _build_regex(cls, words) -> str:
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+        return cls._trie_to_regex(trie)
+
+    @classmethod
+    def _trie_to_regex(cls, node) -> str:
+        # "" marque la fin d'un mot : la suite devient optionnelle
+        is_end = "" in node
+        branches = []
+        chars = []
+        for char in sorted(k for k in node if k):
+            child = cls._trie_to_regex(node[char])
+            if child:
+                branches.append(re.escape(char) + child)
+            else:
+                chars.append(re.escape(char))
+
+        if chars:
+            branches.append(chars[0] if len(chars) == 1 else f"[{''.join(chars)}]")
+
+        if not branches:
+            return ""
+
+        if len(branches) > 1:
+            return f"(?:{'|'.join(branches)})" + ("?" if is_end else "")
+
+        body = branches[0]
+        if not is_end:
+            return body
+        # Un caractère seul ou une classe [..] peuvent recevoir "?" directement
+        if len(body) == 1 or (chars and len(chars) > 1):
+            return f"{body}?"
+        return f"(?:{body})?"
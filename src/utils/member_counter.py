@@ -0,0 +1,69 @@
+from typing import Dict, List
+
+class MemberCounter:
+    """Compteurs de membres par serveur (humains et bots)
+
+    Les compteurs sont initialisés une fois en parcourant guild.members, puis
+    tenus à jour en O(1) à chaque arrivée ou départ. verify() les compare à
+    guild.member_count et les recalcule en cas d'écart.
+    """
+
+    def __init__(self):
+        self._counts: Dict[int, List[int]] = {}  # guild_id -> [humains, bots]
+
+    def seed(self, guild) -> None:
+        """Initialise les compteurs d'un serveur à partir de sa liste de membres"""
+        bots = sum(1 for m in guild.members if m.bot)
+        self._counts[guild.id] = [len(guild.members) - bots, bots]
+
+    def forget(self, guild) -> None:
+        self._counts.pop(guild.id, None)
+
+    def member_joined(self, member) -> None:
+        counts = self._counts.get(member.guild.id)
+        if counts is None:
+            self.seed(member.guild)
+            return
+        counts[1 if member.bot else 0] += 1
+
+    def member_left(self, member) -> None:
+        counts = self._counts.get(member.guild.id)
+        if counts is None:
+            self.seed(member.guild)
+            return
+        index = 1 if member.bot else 0
+        counts[index] = max(0, counts[index] - 1)
+
+    def member_updated(self, before, after) -> None:
+        if before.bot != after.bot:
+            self.member_left(before)
+            self.member_joined(after)
+
+    def _get(self, guild) -> List[int]:
+        counts = self._counts.get(guild.id)
+        if counts is None:
+            self.seed(guild)
+            counts = self._counts[guild.id]
+        return counts
+
+    def humans(self, guild) -> int:
+        return self._get(guild)[0]
+
+    def bots(self, guild) -> int:
+        return self._get(guild)[1]
+
+    def total(self, guild) -> int:
+        humans, bots = self._get(guild)
+        return humans + bots
+
+    def verify(self, guild) -> bool:
+        """Vérifie la cohérence avec guild.member_count, recalcule si besoin
+
+        Retourne True si les compteurs étaient cohérents.
+        """
+        if guild.member_count is None or not guild.chunked:
+            return True
+        if self.total(guild) == guild.member_count:
+            return True
+        self.seed(guild)
+        return False
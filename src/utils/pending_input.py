@@ -0,0 +1,73 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+import discord
+
+InputKey = Tuple[int, int]  # (user_id, channel_id)
+Check = Callable[[discord.Message], bool]
+
+class PendingInputRegistry:
+    """Messages attendus par les assistants de configuration
+
+    Remplace bot.wait_for('message', check=...) : discord.py évalue chaque
+    check en attente sur chaque message reçu, alors qu'ici un message n'est
+    comparé qu'aux attentes de son auteur dans son salon (une recherche dans
+    un dictionnaire). Les délais d'attente sont des minuteurs de la boucle
+    asyncio, annulés dès que la réponse arrive.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[InputKey, List[Tuple[asyncio.Future, Optional[Check]]]] = {}
+        self.routed = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def is_waiting(self, user_id: int, channel_id: int) -> bool:
+        return (user_id, channel_id) in self._waiters
+
+    async def wait(self, user_id: int, channel_id: int, timeout: float, check: Check = None) -> discord.Message:
+        """Prochain message de l'utilisateur dans le salon accepté par `check`
+
+        Lève asyncio.TimeoutError si aucun message n'arrive dans `timeout` secondes.
+        """
+        loop = asyncio.get_running_loop()
+        key = (user_id, channel_id)
+        future = loop.create_future()
+        waiter = (future, check)
+        self._waiters.setdefault(key, []).append(waiter)
+        timer = loop.call_later(timeout, self._expire, future)
+        try:
+            return await future
+        finally:
+            timer.cancel()
+            waiters = self._waiters.get(key)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    def _expire(self, future: asyncio.Future) -> None:
+        if not future.done():
+            self.expired += 1
+            future.set_exception(asyncio.TimeoutError())
+
+    def dispatch(self, message: discord.Message) -> bool:
+        """Transmet un message à la plus ancienne attente qui l'accepte"""
+        waiters = self._waiters.get((message.author.id, message.channel.id))
+        if not waiters:
+            return False
+        for future, check in waiters:
+            if future.done():
+                continue
+            try:
+                if check is not None and not check(message):
+                    continue
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            future.set_result(message)
+            self.routed += 1
+            return True
+        return False
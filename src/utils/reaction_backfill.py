@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+MAX_BACKFILL = 100000  # Messages au maximum par rattrapage
+CHECKPOINT_EVERY = 100  # Un point de reprise par page d'historique
+
+def emoji_key(emoji: Any) -> str:
+    # Les emojis Unicode arrivent avec ou sans sélecteur de variante (❤️ / ❤)
+    return str(emoji).replace('\ufe0f', '')
+
+class BackfillCheckpoints:
+    """Points de reprise des rattrapages de réactions (data/react_history.json)
+
+    Pour chaque salon : le dernier message traité, le nombre de messages
+    demandés et les compteurs. Le fichier est remplacé atomiquement, comme
+    config.json.
+    """
+
+    def __init__(self, path: str = 'data/react_history.json'):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        try:
+            with open(path, encoding='utf-8') as f:
+                self._data: Dict[str, Dict[str, Any]] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._data = {}
+
+    def get(self, channel_id: int) -> Optional[Dict[str, Any]]:
+        return self._data.get(str(channel_id))
+
+    def set(self, channel_id: int, state: Dict[str, Any]) -> None:
+        self._data[str(channel_id)] = state
+        self._write()
+
+    def remove(self, channel_id: int) -> None:
+        if self._data.pop(str(channel_id), None) is not None:
+            self._write()
+
+    def _write(self) -> None:
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
+
+class ReactionBackfill:
+    """Ajout des réactions configurées aux anciens messages d'un salon
+
+    L'historique est parcouru page par page, du plus récent au plus ancien.
+    Les réactions déjà posées par le bot (message.reactions, me=True) ne
+    coûtent aucune requête. Un point de reprise est enregistré à chaque
+    page : après un arrêt ou une annulation, le rattrapage repart du dernier
+    message traité, jusqu'à la plus grande des deux limites (enregistrée ou
+    demandée).
+    """
+
+    def __init__(self, channel: discord.TextChannel, emojis: List[str], limit: int,
+                 react: Callable[[discord.Message, str], Awaitable[None]],
+                 checkpoints: BackfillCheckpoints, state: Dict[str, Any] = None):
+        self.channel = channel
+        self.emojis = list(emojis)
+        self.react = react
+        self.checkpoints = checkpoints
+        state = state or {}
+        # Une reprise garde la limite enregistrée, sauf si la nouvelle est plus grande
+        self.limit = max(limit, state.get('limit', limit))
+        self.kept_limit = self.limit != limit
+        self.before = state.get('before')
+        self.processed = state.get('processed', 0)
+        self.added = state.get('added', 0)
+        self.skipped = state.get('skipped', 0)
+        self.failed = state.get('failed', 0)
+        self.resumed = bool(state)
+        self.done = False
+        self._started = time.monotonic()
+        self._start_processed = self.processed
+
+    @property
+    def rate(self) -> float:
+        """Messages traités par seconde depuis le début (ou la reprise)"""
+        elapsed = time.monotonic() - self._started
+        return (self.processed - self._start_processed) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Secondes restantes estimées (None tant que le rythme est inconnu)"""
+        rate = self.rate
+        if not rate:
+            return None
+        return (self.limit - self.processed) / rate
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            'limit': self.limit, 'before': self.before, 'processed': self.processed,
+            'added': self.added, 'skipped': self.skipped, 'failed': self.failed
+        }
+
+    async def run(self) -> None:
+        before = discord.Object(self.before) if self.before else None
+        try:
+            async for message in self.channel.history(limit=self.limit - self.processed, before=before):
+                mine = {emoji_key(reaction.emoji) for reaction in message.reactions if reaction.me}
+                for emoji in self.emojis:
+                    if emoji_key(emoji) in mine:
+                        self.skipped += 1
+                        continue
+                    try:
+                        await self.react(message, emoji)
+                        self.added += 1
+                    except discord.NotFound:
+                        break  # Message supprimé entre-temps
+                    except discord.HTTPException:
+                        self.failed += 1
+                self.processed += 1
+                self.before = message.id
+                if self.processed % CHECKPOINT_EVERY == 0:
+                    self.checkpoints.set(self.channel.id, self.state())
+            self.done = True
+            self.checkpoints.remove(self.channel.id)
+        finally:
+            if not self.done:
+                # Arrêt, annulation ou erreur : le rattrapage reprendra d'ici
+                self.checkpoints.set(self.channel.id, self.state())
@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger('discord')
+
+class ReactionDispatcher:
+    """Réactions automatiques ajoutées en arrière-plan
+
+    on_message ne fait que mettre le message en file : la modération n'attend
+    jamais les réactions. Chaque salon a sa file et sa tâche, qui respecte un
+    intervalle minimal entre deux réactions (limite de Discord par salon) et
+    abandonne les messages les plus anciens lors d'un afflux. Pendant une
+    action de modération (priority()), les réactions sont suspendues pour ne
+    pas lui prendre de requêtes ; les messages supprimés entre-temps sont
+    retirés des files (discard()).
+    """
+
+    def __init__(self, chance: Callable[[], float], interval: float = 0.25, max_queue: int = 100):
+        self.chance = chance
+        self.interval = interval
+        self.max_queue = max_queue
+        self._queues: Dict[int, Deque[Tuple[discord.Message, List[str]]]] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._last: Dict[int, float] = {}  # channel_id -> dernière réaction
+        self._current: Dict[int, Optional[int]] = {}  # channel_id -> message en cours
+        self._busy = 0
+        self._clear = asyncio.Event()
+        self._clear.set()
+        self.submitted = 0
+        self.sampled_out = 0
+        self.reacted = 0
+        self.skipped = 0
+        self.dropped = 0
+
+    def submit(self, message: discord.Message, emojis: List[str]) -> bool:
+        """Met en file les réactions d'un message (selon auto_reaction_chance)"""
+        if not emojis:
+            return False
+        self.submitted += 1
+        if random.random() >= self.chance():
+            self.sampled_out += 1
+            return False
+
+        queue = self._queues.setdefault(message.channel.id, deque())
+        if len(queue) >= self.max_queue:
+            queue.popleft()  # Afflux de messages : les plus anciens sont abandonnés
+            self.dropped += 1
+        queue.append((message, list(emojis)))
+        task = self._tasks.get(message.channel.id)
+        if task is None or task.done():
+            self._tasks[message.channel.id] = asyncio.create_task(self._run(message.channel.id))
+        return True
+
+    def discard(self, channel_id: int, message_id: int) -> None:
+        """Annule les réactions en attente d'un message supprimé"""
+        if self._current.get(channel_id) == message_id:
+            self._current[channel_id] = None
+            self.skipped += 1
+        for entry in self._queues.get(channel_id, ()):
+            if entry[0].id == message_id:
+                self._queues[channel_id].remove(entry)
+                self.skipped += 1
+                break
+
+    @contextlib.asynccontextmanager
+    async def priority(self):
+        """Suspend les réactions le temps d'une action de modération"""
+        self._busy += 1
+        self._clear.clear()
+        try:
+            yield
+        finally:
+            self._busy -= 1
+            if not self._busy:
+                self._clear.set()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def _wait_turn(self, channel_id: int) -> None:
+        while True:
+            await self._clear.wait()
+            delay = self._last.get(channel_id, 0) + self.interval - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def react(self, message: discord.Message, emoji: str) -> None:
+        """Ajoute une réaction hors file (rattrapage), au rythme du salon et après la modération"""
+        await self._wait_turn(message.channel.id)
+        self._last[message.channel.id] = time.monotonic()
+        await message.add_reaction(emoji)
+
+    async def _run(self, channel_id: int) -> None:
+        queue = self._queues[channel_id]
+        while queue:
+            message, emojis = queue.popleft()
+            self._current[channel_id] = message.id
+            for emoji in emojis:
+                await self._wait_turn(channel_id)
+                if self._current.get(channel_id) != message.id:
+                    break  # Supprimé pendant l'attente
+                self._last[channel_id] = time.monotonic()
+                try:
+                    await message.add_reaction(emoji)
+                    self.reacted += 1
+                except discord.NotFound:
+                    self.skipped += 1
+                    break
+                except discord.HTTPException as e:
+                    logger.error(f"Impossible d'ajouter la réaction {emoji} au message de {message.author}: {e}")
+        self._queues.pop(channel_id, None)
+        self._current.pop(channel_id, None)
+        self._tasks.pop(channel_id, None)
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._queues.clear()
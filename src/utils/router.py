@@ -0,0 +1,37 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+Handler = Callable[..., Awaitable[None]]
+
+class InteractionRouter:
+    """Table de routage des interactions par préfixe de custom_id
+
+    Un custom_id de la forme "prefixe:arg1:arg2" est découpé une seule fois ;
+    le préfixe est cherché dans un dictionnaire et le gestionnaire reçoit
+    (interaction, arg1, arg2). Les custom_id inconnus sont ignorés en O(1).
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {}
+
+    def register(self, prefix: str, handler: Handler) -> None:
+        self._handlers[prefix] = handler
+
+    def resolve(self, custom_id: str) -> Optional[Tuple[Handler, List[str]]]:
+        prefix, _, args = custom_id.partition(':')
+        handler = self._handlers.get(prefix)
+        if handler is None:
+            return None
+        return handler, args.split(':') if args else []
+
+    async def dispatch(self, interaction) -> bool:
+        """Appelle le gestionnaire de l'interaction, retourne False si elle est ignorée"""
+        data = interaction.data
+        custom_id = data.get('custom_id') if data else None
+        if not custom_id:
+            return False
+        route = self.resolve(custom_id)
+        if route is None:
+            return False
+        handler, args = route
+        await handler(interaction, *args)
+        return True
@@ -0,0 +1,31 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """Regroupe les appels concurrents portant sur la même clé
+
+    Tant qu'une opération est en cours pour une clé, les appels suivants
+    n'en lancent pas de nouvelle : ils attendent le résultat de la première.
+    `absorbed` compte les appels ainsi regroupés.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.absorbed = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.absorbed += 1
+            # shield : l'annulation d'un appelant n'annule pas l'opération commune
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(factory())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
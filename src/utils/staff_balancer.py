@@ -0,0 +1,177 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Set, Tuple
+
+# Poids d'un ticket dans la charge d'un membre du staff selon sa priorité
+PRIORITY_WEIGHTS = {None: 1, 'basse': 1, 'moyenne': 2, 'haute': 3, 'urgente': 4}
+
+PoolKey = Tuple[int, int]    # (guild_id, role_id)
+MemberKey = Tuple[int, int]  # (guild_id, member_id)
+Entry = Tuple[int, int, int]  # (charge, n°, member_id)
+
+class StaffBalancer:
+    """Répartition des tickets entre les membres du staff en ligne
+
+    Chaque rôle support a un tas (charge, n°, membre) de ses membres en ligne.
+    La charge d'un membre est la somme des poids (selon la priorité) des
+    tickets qui lui sont assignés. Un membre a au plus une entrée valide par
+    tas (celle dont le n° est enregistré) : un retour en ligne n'en ajoute
+    une que si la sienne a disparu ou porte une autre charge. Les entrées
+    devenues obsolètes (membre hors ligne, charge modifiée) ne sont pas
+    retirées du tas mais ignorées lorsqu'elles arrivent au sommet ; le tas
+    n'est reconstruit que s'il compte plus du double d'entrées que de
+    membres en ligne.
+
+    Sans suivi des présences (track_presence=False, intent Presence
+    désactivé), tous les membres du rôle sont considérés en ligne : le moins
+    chargé est choisi.
+    """
+
+    def __init__(self, track_presence: bool = True):
+        self.track_presence = track_presence
+        self._heaps: Dict[PoolKey, List[Entry]] = {}
+        self._entries: Dict[Tuple[PoolKey, int], Tuple[int, int]] = {}  # (rôle, membre) -> (n°, charge) de son entrée
+        self._seq = itertools.count()
+        self._online: Dict[PoolKey, Set[int]] = {}
+        self._pools: Dict[MemberKey, Set[PoolKey]] = {}  # rôles support d'un membre
+        self._load: Dict[MemberKey, int] = {}
+        self._tickets: Dict[MemberKey, Dict[int, int]] = {}  # ticket -> poids
+        self._assignees: Dict[int, MemberKey] = {}  # ticket -> membre assigné
+
+    def load(self, guild_id: int, member_id: int) -> int:
+        return self._load.get((guild_id, member_id), 0)
+
+    def tickets(self, guild_id: int, member_id: int) -> List[int]:
+        return list(self._tickets.get((guild_id, member_id), {}))
+
+    def _push(self, member: MemberKey) -> None:
+        guild_id, member_id = member
+        for pool in self._pools.get(member, ()):
+            if member_id in self._online[pool]:
+                self._push_entry(pool, member_id)
+
+    def _push_entry(self, pool: PoolKey, member_id: int) -> None:
+        seq = next(self._seq)
+        load = self.load(pool[0], member_id)
+        self._entries[(pool, member_id)] = (seq, load)
+        heap = self._heaps[pool]
+        heapq.heappush(heap, (load, seq, member_id))
+        if len(heap) > 2 * len(self._online[pool]) + 8:
+            # Trop d'entrées obsolètes : reconstruction avec les seules entrées valides
+            valid = []
+            for entry in heap:
+                if self._is_valid(pool, entry):
+                    valid.append(entry)
+                else:
+                    self._drop(pool, entry)
+            heap[:] = valid
+            heapq.heapify(heap)
+
+    def _is_valid(self, pool: PoolKey, entry: Entry) -> bool:
+        load, seq, member_id = entry
+        return (
+            member_id in self._online[pool]
+            and self._entries.get((pool, member_id)) == (seq, load)
+            and load == self.load(pool[0], member_id)
+        )
+
+    def _drop(self, pool: PoolKey, entry: Entry) -> None:
+        """Oublie l'entrée d'un membre retirée du tas"""
+        _, seq, member_id = entry
+        if self._entries.get((pool, member_id), (None,))[0] == seq:
+            del self._entries[(pool, member_id)]
+
+    # Présences et rôles
+
+    def set_member(self, guild_id: int, role_id: int, member_id: int, online: bool) -> None:
+        """Ajoute un membre au rôle support (ou met à jour sa présence)"""
+        online = online or not self.track_presence
+        pool = (guild_id, role_id)
+        member = (guild_id, member_id)
+        self._heaps.setdefault(pool, [])
+        online_members = self._online.setdefault(pool, set())
+        self._pools.setdefault(member, set()).add(pool)
+        if online and member_id not in online_members:
+            online_members.add(member_id)
+            # L'entrée d'avant le passage hors ligne reste valide si la charge n'a pas changé
+            if self._entries.get((pool, member_id), (None, None))[1] != self.load(*member):
+                self._push_entry(pool, member_id)
+        elif not online:
+            online_members.discard(member_id)
+
+    def remove_member(self, guild_id: int, role_id: int, member_id: int) -> None:
+        """Retire un membre du rôle support"""
+        pool = (guild_id, role_id)
+        self._online.get(pool, set()).discard(member_id)
+        pools = self._pools.get((guild_id, member_id))
+        if pools is not None:
+            pools.discard(pool)
+
+    def set_online(self, guild_id: int, member_id: int, online: bool) -> None:
+        """Met à jour la présence d'un membre dans tous ses rôles support"""
+        if not self.track_presence:
+            return
+        for _, role_id in list(self._pools.get((guild_id, member_id), ())):
+            self.set_member(guild_id, role_id, member_id, online)
+
+    def is_tracked(self, guild_id: int, member_id: int) -> bool:
+        return bool(self._pools.get((guild_id, member_id)))
+
+    def online(self, guild_id: int, role_id: int) -> Set[int]:
+        return self._online.get((guild_id, role_id), set())
+
+    # Tickets
+
+    def pick(self, guild_id: int, role_id: int, exclude: int = None) -> Optional[int]:
+        """Membre en ligne le moins chargé du rôle (None si personne n'est en ligne)"""
+        pool = (guild_id, role_id)
+        heap = self._heaps.get(pool, [])
+        skipped = []
+        chosen = None
+        while heap:
+            load, _, member_id = heap[0]
+            if not self._is_valid(pool, heap[0]):
+                self._drop(pool, heapq.heappop(heap))  # Entrée obsolète
+                continue
+            if member_id == exclude:
+                skipped.append(heapq.heappop(heap))
+                continue
+            chosen = member_id
+            break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    def add_ticket(self, guild_id: int, member_id: int, ticket_id: int, priority: str = None) -> None:
+        """Assigne un ticket (ID du salon, ou provisoirement de l'interaction) à un membre"""
+        member = (guild_id, member_id)
+        weight = PRIORITY_WEIGHTS.get(priority, 1)
+        self._tickets.setdefault(member, {})[ticket_id] = weight
+        self._assignees[ticket_id] = member
+        self._load[member] = self.load(*member) + weight
+        self._push(member)
+
+    def remove_ticket(self, ticket_id: int) -> None:
+        member = self._assignees.pop(ticket_id, None)
+        if member is None:
+            return
+        weight = self._tickets[member].pop(ticket_id)
+        self._load[member] = self.load(*member) - weight
+        self._push(member)
+
+    def rekey(self, old_id: int, new_id: int) -> None:
+        """Remplace l'ID provisoire d'un ticket par celui de son salon"""
+        member = self._assignees.pop(old_id, None)
+        if member is not None:
+            self._assignees[new_id] = member
+            self._tickets[member][new_id] = self._tickets[member].pop(old_id)
+
+    def assignee(self, ticket_id: int) -> Optional[int]:
+        member = self._assignees.get(ticket_id)
+        return member[1] if member else None
+
+    def set_priority(self, ticket_id: int, priority: str) -> None:
+        member = self._assignees.get(ticket_id)
+        if member is not None:
+            self.remove_ticket(ticket_id)
+            self.add_ticket(*member, ticket_id, priority)
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict
+
+import discord
+
+logger = logging.getLogger('discord')
+
+class StatsRenameScheduler:
+    """Planificateur des renommages des salons de statistiques
+
+    Discord n'autorise qu'environ 2 renommages par salon toutes les 10 minutes.
+    Chaque demande remplace la précédente pour le même salon (seule la dernière
+    valeur compte) et un renommage n'est envoyé que lorsque le quota du salon
+    le permet, et seulement si le nom change réellement.
+    """
+
+    def __init__(self, max_renames: int = 2, window: float = 600.0):
+        self.max_renames = max_renames
+        self.window = window
+        self._pending: Dict[int, tuple] = {}        # channel_id -> (salon, nom)
+        self._history: Dict[int, Deque[float]] = {}  # channel_id -> dates des renommages
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.requested = 0
+        self.coalesced = 0
+        self.skipped = 0
+        self.applied = 0
+
+    def request(self, channel, name: str) -> None:
+        """Demande le renommage d'un salon (la dernière demande l'emporte)"""
+        self.requested += 1
+        if channel.id in self._pending:
+            self.coalesced += 1
+        elif channel.name == name:
+            self.skipped += 1
+            return
+
+        self._pending[channel.id] = (channel, name)
+        task = self._tasks.get(channel.id)
+        if task is None or task.done():
+            self._tasks[channel.id] = asyncio.create_task(self._flush(channel.id))
+
+    def _delay(self, channel_id: int) -> float:
+        history = self._history.setdefault(channel_id, deque())
+        now = time.monotonic()
+        while history and now - history[0] >= self.window:
+            history.popleft()
+        if len(history) < self.max_renames:
+            return 0.0
+        return self.window - (now - history[0])
+
+    async def _flush(self, channel_id: int) -> None:
+        while channel_id in self._pending:
+            delay = self._delay(channel_id)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            channel, name = self._pending.pop(channel_id)
+            if channel.name == name:
+                self.skipped += 1
+                continue
+
+            self._history[channel_id].append(time.monotonic())
+            try:
+                await channel.edit(name=name)
+                self.applied += 1
+            except discord.Forbidden:
+                logger.error(f"Impossible de modifier le nom du salon {channel.name}")
+            except discord.HTTPException as e:
+                logger.error(f"Erreur lors de la modification du salon {channel.name}: {e}")
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._pending.clear()
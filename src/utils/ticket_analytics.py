@@ -0,0 +1,134 @@
+import json
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ALL = '*'  # Toutes catégories ou toutes priorités confondues
+NO_PRIORITY = 'aucune'
+
+class QuantileSketch:
+    """Esquisse de quantiles à erreur relative bornée (principe de DDSketch)
+
+    Chaque valeur est rangée dans un intervalle logarithmique : la taille de
+    l'esquisse ne dépend que de l'étendue des valeurs (quelques centaines
+    d'intervalles entre une seconde et un an), pas du nombre de valeurs. Un
+    quantile est estimé à `accuracy` près (2 % par défaut).
+    """
+
+    def __init__(self, accuracy: float = 0.02):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        if value < 1:
+            self.zeros += 1  # Moins d'une seconde
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+        self.count += 1
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({'bins': self.bins, 'zeros': self.zeros, 'count': self.count})
+
+    @classmethod
+    def from_json(cls, data: str, accuracy: float = 0.02) -> 'QuantileSketch':
+        sketch = cls(accuracy)
+        values = json.loads(data)
+        sketch.bins = {int(index): count for index, count in values['bins'].items()}
+        sketch.zeros = values['zeros']
+        sketch.count = values['count']
+        return sketch
+
+class TicketAnalytics:
+    """Durées des tickets (première réponse du staff, fermeture) par catégorie et priorité
+
+    Chaque durée est ajoutée à l'esquisse du jour pour (catégorie, priorité),
+    (catégorie, toutes) et (toutes, priorité) ainsi qu'au total. Une requête
+    fusionne au plus `window_days` esquisses : son coût ne dépend pas du
+    nombre de tickets fermés. Les esquisses du jour sont enregistrées dans
+    la base des tickets après chaque ajout.
+    """
+
+    def __init__(self, store, window_days: int = 30):
+        self.store = store
+        self.window_days = window_days
+        # (mesure, catégorie, priorité) -> jour -> esquisse
+        self._sketches: Dict[Tuple[str, str, str], Dict[int, QuantileSketch]] = {}
+
+    @staticmethod
+    def _today(at: float = None) -> int:
+        return int((at if at is not None else time.time()) // 86400)
+
+    def prune(self) -> None:
+        """Supprime de la base les esquisses et les événements sortis de la fenêtre"""
+        oldest = self._today() - self.window_days + 1
+        self.store.purge_sketches(oldest)
+        self.store.purge_events(oldest * 86400)
+
+    def load(self) -> None:
+        oldest = self._today() - self.window_days + 1
+        self.prune()
+        for metric, category, priority, day, data in self.store.load_sketches(oldest):
+            self._sketches.setdefault((metric, category, priority), {})[day] = QuantileSketch.from_json(data)
+
+    def record(self, metric: str, seconds: float, category: str, priority: Optional[str], at: float = None) -> None:
+        day = self._today(at)
+        priority = priority or NO_PRIORITY
+        category = category or ALL
+        for key in {(metric, category, priority), (metric, category, ALL), (metric, ALL, priority), (metric, ALL, ALL)}:
+            days = self._sketches.setdefault(key, {})
+            sketch = days.setdefault(day, QuantileSketch())
+            sketch.add(seconds)
+            self.store.save_sketch(*key, day, sketch.to_json())
+            for old in [d for d in days if d <= day - self.window_days]:
+                del days[old]
+
+    def sketch(self, metric: str, category: str = ALL, priority: str = ALL) -> QuantileSketch:
+        """Esquisse de la fenêtre glissante (fusion des esquisses quotidiennes)"""
+        oldest = self._today() - self.window_days + 1
+        merged = QuantileSketch()
+        for day, sketch in self._sketches.get((metric, category, priority), {}).items():
+            if day >= oldest:
+                merged.merge(sketch)
+        return merged
+
+    def quantiles(self, metric: str, category: str = ALL, priority: str = ALL,
+                  qs: Iterable[float] = (0.5, 0.9)) -> Tuple[int, List[Optional[float]]]:
+        """(nombre de tickets, quantiles en secondes) sur la fenêtre glissante"""
+        sketch = self.sketch(metric, category, priority)
+        return sketch.count, [sketch.quantile(q) for q in qs]
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}min"
+    if seconds < 86400:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}"
+    return f"{seconds // 86400}j {seconds % 86400 // 3600}h"
@@ -0,0 +1,377 @@
+import asyncio
+import logging
+import lzma
+import os
+import re
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .transcript import Transcript
+
+logger = logging.getLogger('discord')
+
+MAX_COUNT = 1000  # Au-delà, search() retourne MAX_COUNT comme total
+
+HOT_DAYS = 30          # Transcriptions récentes : zlib + dictionnaire (lecture rapide)
+BLOCK_SIZE = 256 * 1024  # Taille (non compressée) des blocs lzma du niveau cold
+RETENTION_DAYS = 365   # Tickets archivés supprimés au-delà
+DICT_SIZE = 32 * 1024  # Taille maximale d'un dictionnaire zlib (taille de sa fenêtre)
+DICT_SAMPLE = 500      # Transcriptions utilisées pour construire un dictionnaire
+DICT_INTERVAL = 200    # Nouveau dictionnaire toutes les 200 transcriptions
+TIMESTAMP = re.compile(rb"^\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\] ")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS archived_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel_id INTEGER NOT NULL,
+        channel_name TEXT,
+        user_id INTEGER,
+        category_id TEXT,
+        priority TEXT,
+        created_at TEXT,
+        closed_at TEXT,
+        closed_by INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_archived_channel ON archived_tickets (channel_id)",
+    # Index plein texte : une ligne par message (ticket = rowid de archived_tickets)
+    """CREATE VIRTUAL TABLE IF NOT EXISTS archived_messages USING fts5(
+        content,
+        author,
+        category,
+        ticket UNINDEXED,
+        ts UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    # Transcription de chaque ticket : hot (zlib + dictionnaire, dans data)
+    # ou cold (à la position offset du bloc lzma block)
+    """CREATE TABLE IF NOT EXISTS transcripts (
+        ticket INTEGER PRIMARY KEY,
+        tier TEXT NOT NULL,
+        dictionary INTEGER,
+        block INTEGER,
+        offset INTEGER,
+        raw_size INTEGER NOT NULL,
+        data BLOB,
+        stored_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_transcripts_block ON transcripts (block)",
+    """CREATE TABLE IF NOT EXISTS transcript_blocks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data BLOB NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_transcripts_tier ON transcripts (tier, stored_at)",
+    """CREATE TABLE IF NOT EXISTS dictionaries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data BLOB NOT NULL,
+        created_at REAL NOT NULL
+    )""",
+]
+
+def train_dictionary(samples: List[bytes], size: int = DICT_SIZE) -> bytes:
+    """Construit un dictionnaire zlib à partir de transcriptions
+
+    Les lignes (sans leur horodatage) présentes dans plusieurs transcriptions
+    - messages de bienvenue, auteurs, embeds... - sont retenues par gain
+    estimé (occurrences x longueur). zlib trouvant plus facilement les
+    correspondances proches de la fin du dictionnaire, les meilleures sont
+    placées en dernier.
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update({TIMESTAMP.sub(b"", line) for line in sample.split(b"\n")})
+    candidates = sorted(
+        (line for line, count in counts.items() if count > 1 and len(line) > 8),
+        key=lambda line: counts[line] * len(line),
+        reverse=True
+    )
+    chosen, total = [], 0
+    for line in candidates:
+        if total + len(line) + 1 > size:
+            break
+        chosen.append(line)
+        total += len(line) + 1
+    return b"\n".join(reversed(chosen))
+
+def fts_query(query: str) -> str:
+    """Transforme une recherche libre en requête FTS5 (chaque mot entre guillemets)
+
+    Les caractères spéciaux de FTS5 ("#1234", "-", ":"...) sont ainsi traités
+    comme du texte. Un mot terminé par * reste une recherche par préfixe.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith('*') and len(term) > 1
+        term = term.rstrip('*').replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+class TicketArchive:
+    """Archive consultable des tickets fermés (SQLite FTS5)
+
+    À la fermeture, les messages du ticket sont indexés (contenu, auteur,
+    catégorie) dans un thread dédié, sans retarder la fermeture. search()
+    parcourt l'index inversé du plus récent au plus ancien et s'arrête à la
+    page demandée : le temps de réponse ne dépend pas du nombre de tickets
+    archivés.
+
+    La transcription de chaque ticket est stockée compressée dans sa propre
+    ligne, compressée avec zlib et un dictionnaire construit sur les
+    transcriptions précédentes. Après HOT_DAYS jours, les transcriptions sont
+    regroupées par blocs d'environ BLOCK_SIZE octets compressés avec lzma
+    (plus compact, plus lent) : lire un ticket ne décompresse que son bloc,
+    jamais le reste de l'archive. maintain() fait passer les transcriptions
+    d'un niveau à l'autre, renouvelle le dictionnaire et supprime les tickets
+    plus vieux que RETENTION_DAYS.
+    """
+
+    def __init__(self, path: str = 'data/ticket_archive.db'):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ticket-archive')
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+        # Connexion de lecture séparée : une recherche n'attend pas la fin d'une indexation
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ticket-search')
+        self._read_db = sqlite3.connect(path, check_same_thread=False)
+        self._dictionaries: Dict[int, bytes] = {}
+        row = self._db.execute("SELECT id, data FROM dictionaries ORDER BY id DESC LIMIT 1").fetchone()
+        self._dictionary: Tuple[Optional[int], bytes] = (row[0], row[1]) if row else (None, b"")
+
+    # Compression
+
+    def _compress_hot(self, chunks: Iterable[bytes]) -> Tuple[Optional[int], int, bytes]:
+        dictionary_id, zdict = self._dictionary
+        compressor = zlib.compressobj(9, zdict=zdict) if zdict else zlib.compressobj(9)
+        raw_size = 0
+        out = []
+        for chunk in chunks:
+            raw_size += len(chunk)
+            out.append(compressor.compress(chunk))
+        out.append(compressor.flush())
+        return dictionary_id, raw_size, b"".join(out)
+
+    def _get_dictionary(self, db: sqlite3.Connection, dictionary_id: int) -> bytes:
+        if dictionary_id not in self._dictionaries:
+            row = db.execute("SELECT data FROM dictionaries WHERE id = ?", (dictionary_id,)).fetchone()
+            self._dictionaries[dictionary_id] = row[0]
+        return self._dictionaries[dictionary_id]
+
+    def _decompress_hot(self, db: sqlite3.Connection, dictionary_id: Optional[int], data: bytes) -> bytes:
+        if dictionary_id is None:
+            return zlib.decompress(data)
+        decompressor = zlib.decompressobj(zdict=self._get_dictionary(db, dictionary_id))
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def _load(self, db: sqlite3.Connection, tier: str, dictionary_id: Optional[int], block: Optional[int],
+              offset: Optional[int], raw_size: int, data: Optional[bytes]) -> bytes:
+        if tier == 'hot':
+            return self._decompress_hot(db, dictionary_id, data)
+        block_data = db.execute("SELECT data FROM transcript_blocks WHERE id = ?", (block,)).fetchone()[0]
+        return lzma.decompress(block_data)[offset:offset + raw_size]
+
+    def _add(self, ticket: Dict[str, Any], messages: List[dict], transcript: Optional[Transcript]) -> int:
+        if transcript is not None:
+            dictionary_id, raw_size, data = self._compress_hot(transcript.chunks())
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT INTO archived_tickets (channel_id, channel_name, user_id, category_id, priority, created_at, closed_at, closed_by) "
+                "VALUES (:channel_id, :channel_name, :user_id, :category_id, :priority, :created_at, :closed_at, :closed_by)",
+                ticket
+            )
+            ticket_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO archived_messages (content, author, category, ticket, ts) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        "\n".join([record['content']] + [a['filename'] for a in record['attachments']]),
+                        record['author'], ticket['category_id'] or '', ticket_id, record['ts']
+                    )
+                    for record in messages
+                )
+            )
+            if transcript is not None:
+                self._db.execute(
+                    "INSERT INTO transcripts (ticket, tier, dictionary, raw_size, data, stored_at) VALUES (?, 'hot', ?, ?, ?, ?)",
+                    (ticket_id, dictionary_id, raw_size, data, time.time())
+                )
+        return ticket_id
+
+    async def add(self, ticket: Dict[str, Any], messages: List[dict], transcript: Transcript = None) -> None:
+        """Archive un ticket fermé, indexe ses messages et stocke sa transcription compressée
+
+        La transcription est lue par morceaux depuis son fichier ; elle ne doit
+        pas être fermée avant la fin de l'archivage.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._add, ticket, messages, transcript)
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'archivage du ticket {ticket.get('channel_name')}: {e}")
+
+    def _search(self, query: str, limit: int, offset: int) -> Tuple[int, List[dict]]:
+        match = fts_query(query)
+        if not match:
+            return 0, []
+        # Compter tous les résultats d'un mot fréquent coûterait plus que la recherche : plafonné
+        total = self._read_db.execute(
+            "SELECT count(*) FROM (SELECT 1 FROM archived_messages WHERE archived_messages MATCH ? LIMIT ?)",
+            (match, MAX_COUNT)
+        ).fetchone()[0]
+        rows = self._read_db.execute(
+            "SELECT t.id, t.channel_name, t.user_id, t.category_id, t.closed_at, m.author, m.ts, "
+            "snippet(archived_messages, 0, '**', '**', '…', 16) "
+            "FROM archived_messages m JOIN archived_tickets t ON t.id = m.ticket "
+            "WHERE archived_messages MATCH ? ORDER BY m.rowid DESC LIMIT ? OFFSET ?",
+            (match, limit, offset)
+        ).fetchall()
+        columns = ('ticket', 'channel_name', 'user_id', 'category_id', 'closed_at', 'author', 'ts', 'snippet')
+        return total, [dict(zip(columns, row)) for row in rows]
+
+    async def search(self, query: str, limit: int = 5, offset: int = 0) -> Tuple[int, List[dict]]:
+        """(nombre de résultats plafonné à MAX_COUNT, messages de la page demandée)
+
+        Les messages les plus récents sont retournés en premier.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader, self._search, query, limit, offset)
+
+    # Transcriptions
+
+    def _transcript(self, ticket_id: int) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        row = self._read_db.execute(
+            "SELECT t.channel_name, t.user_id, t.category_id, t.closed_at, "
+            "s.tier, s.dictionary, s.block, s.offset, s.raw_size, s.data "
+            "FROM archived_tickets t JOIN transcripts s ON s.ticket = t.id WHERE t.id = ?",
+            (ticket_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        ticket = dict(zip(('channel_name', 'user_id', 'category_id', 'closed_at'), row[:4]))
+        return ticket, self._load(self._read_db, *row[4:])
+
+    async def transcript(self, ticket_id: int) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """(informations du ticket, transcription) d'un ticket archivé, None s'il n'existe pas"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader, self._transcript, ticket_id)
+
+    def _storage(self) -> Dict[str, Tuple[int, int, int]]:
+        storage = {
+            tier: [count, raw_size or 0, stored_size or 0]
+            for tier, count, raw_size, stored_size in self._read_db.execute(
+                "SELECT tier, count(*), sum(raw_size), sum(length(data)) FROM transcripts GROUP BY tier"
+            )
+        }
+        if 'cold' in storage:
+            storage['cold'][2] = self._read_db.execute(
+                "SELECT coalesce(sum(length(data)), 0) FROM transcript_blocks"
+            ).fetchone()[0]
+        return {tier: tuple(values) for tier, values in storage.items()}
+
+    async def storage(self) -> Dict[str, Tuple[int, int, int]]:
+        """Par niveau : (transcriptions, taille d'origine, taille stockée)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader, self._storage)
+
+    # Maintenance
+
+    def _delete_tickets(self, ticket_ids: List[int]) -> None:
+        for start in range(0, len(ticket_ids), 500):
+            chunk = ticket_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            with self._db:
+                self._db.execute(f"DELETE FROM archived_messages WHERE ticket IN ({placeholders})", chunk)
+                self._db.execute(f"DELETE FROM transcripts WHERE ticket IN ({placeholders})", chunk)
+                self._db.execute(f"DELETE FROM archived_tickets WHERE id IN ({placeholders})", chunk)
+        with self._db:
+            self._db.execute(
+                "DELETE FROM transcript_blocks WHERE id NOT IN "
+                "(SELECT DISTINCT block FROM transcripts WHERE block IS NOT NULL)"
+            )
+
+    def _train(self) -> bool:
+        dictionary_id, _ = self._dictionary
+        created_at = 0
+        if dictionary_id is not None:
+            created_at = self._db.execute("SELECT created_at FROM dictionaries WHERE id = ?", (dictionary_id,)).fetchone()[0]
+        new = self._db.execute("SELECT count(*) FROM transcripts WHERE stored_at > ?", (created_at,)).fetchone()[0]
+        if new < DICT_INTERVAL:
+            return False
+
+        samples = [
+            self._decompress_hot(self._db, dictionary, data)
+            for dictionary, data in self._db.execute(
+                "SELECT dictionary, data FROM transcripts WHERE tier = 'hot' ORDER BY stored_at DESC LIMIT ?", (DICT_SAMPLE,)
+            ).fetchall()
+        ]
+        zdict = train_dictionary(samples)
+        if not zdict:
+            return False
+        with self._db:
+            cursor = self._db.execute("INSERT INTO dictionaries (data, created_at) VALUES (?, ?)", (zdict, time.time()))
+        self._dictionary = (cursor.lastrowid, zdict)
+        return True
+
+    def _write_block(self, block: List[bytes], members: List[Tuple[int, int]]) -> None:
+        data = lzma.compress(b"".join(block), preset=9 | lzma.PRESET_EXTREME)
+        with self._db:
+            block_id = self._db.execute("INSERT INTO transcript_blocks (data) VALUES (?)", (data,)).lastrowid
+            self._db.executemany(
+                "UPDATE transcripts SET tier = 'cold', dictionary = NULL, data = NULL, block = ?, offset = ? WHERE ticket = ?",
+                ((block_id, offset, ticket_id) for ticket_id, offset in members)
+            )
+
+    def _maintain(self, hot_days: int, retention_days: int) -> Dict[str, int]:
+        now = time.time()
+        results = {}
+
+        # Tickets plus vieux que la durée de conservation
+        expired = [row[0] for row in self._db.execute(
+            "SELECT ticket FROM transcripts WHERE stored_at < ?", (now - retention_days * 86400,)
+        )]
+        self._delete_tickets(expired)
+        results['supprimés'] = len(expired)
+
+        # Niveau hot -> cold : regroupement par blocs recompressés avec lzma
+        rows = self._db.execute(
+            "SELECT ticket, dictionary, data FROM transcripts WHERE tier = 'hot' AND stored_at < ? ORDER BY ticket",
+            (now - hot_days * 86400,)
+        ).fetchall()
+        block, members = [], []
+        for index, (ticket_id, dictionary_id, data) in enumerate(rows):
+            raw = self._decompress_hot(self._db, dictionary_id, data)
+            members.append((ticket_id, sum(len(part) for part in block)))
+            block.append(raw)
+            if sum(len(part) for part in block) >= BLOCK_SIZE or index == len(rows) - 1:
+                self._write_block(block, members)
+                block, members = [], []
+        results['archivés en lzma'] = len(rows)
+
+        results['nouveau dictionnaire'] = int(self._train())
+
+        # Dictionnaires qui ne servent plus à aucune transcription
+        with self._db:
+            self._db.execute(
+                "DELETE FROM dictionaries WHERE id != ? AND id NOT IN "
+                "(SELECT DISTINCT dictionary FROM transcripts WHERE dictionary IS NOT NULL)",
+                (self._dictionary[0] or -1,)
+            )
+        return results
+
+    async def maintain(self, hot_days: int = HOT_DAYS, retention_days: int = RETENTION_DAYS) -> Dict[str, int]:
+        """Change de niveau les anciennes transcriptions et applique la durée de conservation"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._maintain, hot_days, retention_days)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._reader.shutdown(wait=True)
+        self._db.close()
+        self._read_db.close()
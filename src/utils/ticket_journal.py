@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import discord
+
+from .transcript import Transcript
+
+MAX_OPEN_FILES = 64  # Journaux gardés ouverts en même temps
+
+class TicketJournal:
+    """Journal local des messages des tickets actifs
+
+    Chaque ticket a un fichier JSON Lines en ajout seul (data/journals/<salon>.jsonl)
+    alimenté au fil des messages et des modifications. À la fermeture, la
+    transcription est reconstruite depuis ce fichier : seuls les messages
+    envoyés pendant un arrêt du bot (entre le dernier message journalisé et
+    le premier reçu depuis le démarrage) sont récupérés via l'API.
+    """
+
+    def __init__(self, directory: str = 'data/journals', max_open: int = MAX_OPEN_FILES):
+        self.directory = directory
+        self.max_open = max_open
+        os.makedirs(directory, exist_ok=True)
+        # Fichiers ouverts en ajout, les moins récemment utilisés fermés au-delà de max_open
+        self._files: OrderedDict[int, TextIO] = OrderedDict()
+        # Premier message journalisé pendant cette session, par salon
+        # (0 : journal créé pendant cette session, aucun trou possible)
+        self._first_live: Dict[int, int] = {}
+        # Dernier message du salon connu à la connexion du bot (channel.last_message_id)
+        self._latest_at_start: Dict[int, Optional[int]] = {}
+
+    def path(self, channel_id: int) -> str:
+        return os.path.join(self.directory, f"{channel_id}.jsonl")
+
+    def _open(self, channel_id: int) -> TextIO:
+        file = self._files.get(channel_id)
+        if file is None:
+            file = open(self.path(channel_id), 'a', encoding='utf-8')
+            self._files[channel_id] = file
+            if len(self._files) > self.max_open:
+                _, oldest = self._files.popitem(last=False)
+                oldest.close()
+        else:
+            self._files.move_to_end(channel_id)
+        return file
+
+    def _append(self, channel_id: int, record: dict) -> None:
+        file = self._open(channel_id)
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        file.flush()
+
+    def _records(self, channel_id: int):
+        path = self.path(channel_id)
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Ligne incomplète (arrêt brutal pendant l'écriture)
+
+    def start(self, channel_id: int) -> None:
+        """Crée le journal d'un nouveau ticket"""
+        self._first_live[channel_id] = 0
+        self._open(channel_id)
+
+    def note_connected(self, channel_id: int, last_message_id: Optional[int]) -> None:
+        """Mémorise le dernier message du salon au démarrage (aucun trou si déjà journalisé)"""
+        self._latest_at_start.setdefault(channel_id, last_message_id)
+
+    def __contains__(self, channel_id: int) -> bool:
+        """Journal alimenté pendant cette session"""
+        return channel_id in self._first_live
+
+    def has_journal(self, channel_id: int) -> bool:
+        return channel_id in self._first_live or os.path.exists(self.path(channel_id))
+
+    @staticmethod
+    def message_record(message: discord.Message) -> dict:
+        return {
+            'type': 'message',
+            'id': message.id,
+            'ts': message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'author': str(message.author),
+            'author_id': message.author.id,
+            'content': message.content or "",
+            'embeds': [embed.title for embed in message.embeds],
+            'attachments': [
+                {'filename': a.filename, 'url': a.url, 'size': a.size}
+                for a in message.attachments
+            ]
+        }
+
+    def record_message(self, message: discord.Message) -> None:
+        self._first_live.setdefault(message.channel.id, message.id)
+        self._append(message.channel.id, self.message_record(message))
+
+    def record_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        record = {'type': 'edit', 'id': payload.message_id}
+        if 'content' in payload.data:
+            record['content'] = payload.data['content'] or ""
+        if 'embeds' in payload.data:
+            record['embeds'] = [embed.get('title') for embed in payload.data['embeds']]
+        self._append(payload.channel_id, record)
+
+    def _replay(self, channel_id: int, first_live: Optional[int]) -> Tuple[Dict[int, dict], Optional[int]]:
+        """Relit le journal en appliquant les modifications aux messages
+
+        Retourne aussi le dernier message journalisé avant `first_live`
+        (avant le démarrage du bot).
+        """
+        messages = {}
+        resume_after = None
+        for record in self._records(channel_id):
+            if record['type'] == 'message':
+                messages[record['id']] = record
+                if not first_live or record['id'] < first_live:
+                    resume_after = max(resume_after or 0, record['id'])
+            elif record['id'] in messages:
+                messages[record['id']].update({k: v for k, v in record.items() if k != 'type'})
+        return messages, resume_after
+
+    async def messages(self, channel) -> List[dict]:
+        """Messages d'un ticket (enregistrements du journal), du plus ancien au plus récent"""
+        if not self.has_journal(channel.id):
+            # Ticket antérieur au journal : historique complet
+            return [self.message_record(message) async for message in channel.history(limit=None, oldest_first=True)]
+
+        first_live = self._first_live.get(channel.id)
+        messages, resume_after = await asyncio.to_thread(self._replay, channel.id, first_live)
+
+        # Messages envoyés pendant un arrêt du bot : seulement le trou entre le
+        # dernier message journalisé avant l'arrêt et le premier de cette session
+        if first_live == 0:
+            return [messages[message_id] for message_id in sorted(messages)]
+        latest = self._latest_at_start.get(channel.id)
+        if resume_after is not None and latest is not None and latest <= resume_after:
+            return [messages[message_id] for message_id in sorted(messages)]  # Rien n'a été envoyé pendant l'arrêt
+        after = discord.Object(id=resume_after) if resume_after is not None else None
+        before = discord.Object(id=first_live) if first_live else None
+        async for message in channel.history(limit=None, after=after, before=before, oldest_first=True):
+            messages.setdefault(message.id, self.message_record(message))
+
+        return [messages[message_id] for message_id in sorted(messages)]
+
+    @staticmethod
+    def to_transcript(name: str, messages: List[dict], stored: Dict[Tuple[int, str], str] = None) -> Transcript:
+        """Transcription des messages ; stored[(message_id, nom)] donne le sha256 d'une pièce jointe archivée"""
+        transcript = Transcript(name)
+        for record in messages:
+            content = record['content']
+            for title in record['embeds']:
+                content += f"\n[Embed: {title}]"
+            for attachment in record['attachments']:
+                sha256 = stored.get((record['id'], attachment['filename'])) if stored else None
+                suffix = f" (sha256:{sha256})" if sha256 else ""
+                content += f"\n[Pièce jointe: {attachment['filename']}{suffix}]"
+            transcript.add_line(f"[{record['ts']}] {record['author']}: {content}")
+        return transcript
+
+    async def transcript(self, channel) -> Transcript:
+        """Reconstruit la transcription d'un ticket depuis son journal"""
+        return self.to_transcript(channel.name, await self.messages(channel))
+
+    def delete(self, channel_id: int) -> None:
+        """Supprime le journal d'un ticket fermé"""
+        file = self._files.pop(channel_id, None)
+        if file is not None:
+            file.close()
+        self._first_live.pop(channel_id, None)
+        self._latest_at_start.pop(channel_id, None)
+        try:
+            os.remove(self.path(channel_id))
+        except FileNotFoundError:
+            pass
+
+    def close(self) -> None:
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger('discord')
+
+MAX_POOL_SIZE = 10  # Salons en réserve au maximum par catégorie
+
+class TicketChannelPool:
+    """Réserve de salons de tickets pré-créés
+
+    Pour chaque catégorie d'un panneau, quelques salons cachés sont créés à
+    l'avance. À l'ouverture d'un ticket, un salon est pris dans la réserve :
+    il suffit alors de le renommer et de changer ses permissions (une seule
+    requête) au lieu de le créer. La réserve est complétée en arrière-plan,
+    un salon à la fois, espacés de `interval` secondes pour ne pas consommer
+    les limites de l'API pendant un afflux de tickets.
+
+    `create(panel_id, category_id)` crée un salon de réserve et retourne son
+    ID (None si la configuration n'existe plus).
+    """
+
+    def __init__(self, store, create: Callable[[str, str], Awaitable[Optional[int]]], interval: float = 2.0):
+        self.store = store
+        self._create = create
+        self.interval = interval
+        self._targets: Dict[Tuple[str, str], int] = {}  # (panneau, catégorie) -> taille voulue
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+
+    def size(self, panel_id: str, category_id: str) -> int:
+        return len(self.store.pool_channels(panel_id, category_id))
+
+    def take(self, guild: discord.Guild, panel_id: str, category_id: str) -> Optional[discord.TextChannel]:
+        """Prend un salon de la réserve (None si elle est vide)"""
+        while True:
+            channel_id = self.store.take_pool_channel(panel_id, category_id)
+            if channel_id is None:
+                self.misses += 1
+                return None
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                self.hits += 1
+                return channel
+            # Salon supprimé entre-temps : on passe au suivant
+
+    def refill(self, panel_id: str, category_id: str, size: int) -> None:
+        """Demande à compléter la réserve d'une catégorie jusqu'à `size` salons"""
+        key = (panel_id, category_id)
+        if size <= 0:
+            self._targets.pop(key, None)
+            return
+        self._targets[key] = min(size, MAX_POOL_SIZE)
+        if self.size(*key) < self._targets[key] and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def shrink(self, guild: discord.Guild, panel_id: str, category_id: str, size: int) -> None:
+        """Supprime les salons en trop dans la réserve d'une catégorie"""
+        self._targets[(panel_id, category_id)] = size
+        while self.size(panel_id, category_id) > size:
+            channel_id = self.store.take_pool_channel(panel_id, category_id)
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            try:
+                await channel.delete(reason="Réduction de la réserve de tickets")
+            except discord.HTTPException as e:
+                logger.error(f"Erreur lors de la suppression du salon de réserve {channel_id}: {e}")
+
+    def _next(self) -> Optional[Tuple[str, str]]:
+        # La catégorie la moins remplie (en proportion) est servie en premier
+        missing = [(self.size(*key) / size, key) for key, size in self._targets.items() if self.size(*key) < size]
+        return min(missing)[1] if missing else None
+
+    async def _run(self) -> None:
+        while (key := self._next()) is not None:
+            try:
+                channel_id = await self._create(*key)
+            except discord.HTTPException as e:
+                logger.error(f"Erreur lors de la création d'un salon de réserve: {e}")
+                channel_id = None
+
+            if channel_id is None:
+                # Configuration supprimée ou création impossible : on n'insiste pas
+                self._targets.pop(key, None)
+            else:
+                self.store.add_pool_channel(*key, channel_id)
+                self.created += 1
+            await asyncio.sleep(self.interval)
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._targets.clear()
@@ -0,0 +1,436 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger('discord')
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+    # Configuration d'un panneau de tickets (clé = ID du salon du panneau)
+    """CREATE TABLE IF NOT EXISTS ticket_configs (
+        panel_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS active_tickets (
+        user_id INTEGER PRIMARY KEY,
+        channel_id INTEGER NOT NULL UNIQUE,
+        category_id TEXT,
+        welcome_message_id INTEGER,
+        priority TEXT,
+        created_at TEXT,
+        panel_id TEXT,
+        first_response_at TEXT,
+        assignee_id INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_active_priority ON active_tickets (priority)",
+    """CREATE TABLE IF NOT EXISTS closed_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        channel_name TEXT,
+        category_id TEXT,
+        priority TEXT,
+        created_at TEXT,
+        closed_at TEXT NOT NULL,
+        closed_by INTEGER,
+        first_response_at TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_closed_user ON closed_tickets (user_id, closed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_closed_at ON closed_tickets (closed_at)",
+    # Compteurs : total_tickets, tickets_by_category/<catégorie>, tickets_by_priority/<priorité>
+    """CREATE TABLE IF NOT EXISTS ticket_stats (
+        name TEXT NOT NULL,
+        key TEXT NOT NULL DEFAULT '',
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (name, key)
+    )""",
+    # Événements des tickets (open, first_response, close) dans l'ordre chronologique
+    """CREATE TABLE IF NOT EXISTS ticket_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel_id INTEGER NOT NULL,
+        event TEXT NOT NULL,
+        at REAL NOT NULL,
+        category_id TEXT,
+        priority TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_events_at ON ticket_events (at)",
+    # Esquisses de quantiles quotidiennes des durées des tickets
+    """CREATE TABLE IF NOT EXISTS ticket_sketches (
+        metric TEXT NOT NULL,
+        category TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (metric, category, priority, day)
+    )""",
+    # Salons pré-créés en réserve, en attente d'un ticket
+    """CREATE TABLE IF NOT EXISTS ticket_pool (
+        channel_id INTEGER PRIMARY KEY,
+        panel_id TEXT NOT NULL,
+        category_id TEXT NOT NULL,
+        created_at TEXT
+    )""",
+]
+
+# Colonnes de active_tickets en dehors de user_id
+TICKET_COLUMNS = ('channel_id', 'category_id', 'welcome_message_id', 'priority', 'created_at', 'panel_id', 'first_response_at', 'assignee_id')
+
+# Colonnes ajoutées après la création de la base (table -> (colonne, type))
+ADDED_COLUMNS = {
+    'active_tickets': (('panel_id', 'TEXT'), ('first_response_at', 'TEXT'), ('assignee_id', 'INTEGER')),
+    'closed_tickets': (('first_response_at', 'TEXT'),),
+}
+
+def default_tickets_data() -> Dict[str, Any]:
+    return {
+        'ticket_configs': {},  # Configurations par salon
+        'active_tickets': {},
+        'log_channel_id': None,
+        'transcript_format': 'txt',  # txt ou html
+        'ticket_stats': {
+            'total_tickets': 0,
+            'tickets_by_category': {
+                'support': 0,
+                'bug': 0,
+                'commande': 0,
+                'autre': 0
+            },
+            'tickets_by_priority': {
+                'basse': 0,
+                'moyenne': 0,
+                'haute': 0,
+                'urgente': 0
+            }
+        }
+    }
+
+class TicketStore:
+    """Stockage SQLite des données des tickets
+
+    Les données sont chargées une fois en mémoire (même structure que l'ancien
+    tickets.json) ; chaque modification n'écrit ensuite que la ligne concernée.
+    Les écritures sont exécutées dans l'ordre par un thread dédié afin de ne
+    jamais bloquer la boucle d'événements.
+
+    Les tickets actifs sont indexés par utilisateur (clé de active_tickets),
+    par salon et par priorité. Les index sont tenus à jour par open_ticket(),
+    save_ticket() et close_ticket() : toute modification d'un ticket actif
+    doit passer par ces méthodes.
+    """
+
+    def __init__(self, path: str = 'data/tickets.db', legacy_path: str = 'data/tickets.json'):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.legacy_path = legacy_path
+        self.data: Dict[str, Any] = default_tickets_data()
+        self._by_channel: Dict[int, str] = {}            # channel_id -> user_id
+        self._by_priority: Dict[Optional[str], Set[str]] = {}  # priorité -> user_ids
+        self._indexed: Dict[str, Tuple[int, Optional[str]]] = {}
+        self.pool: Dict[Tuple[str, str], List[int]] = {}  # (panneau, catégorie) -> salons en réserve
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ticket-store')
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+            for table, added in ADDED_COLUMNS.items():
+                columns = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+                for column, column_type in added:
+                    if column not in columns:
+                        self._db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    # Chargement et migration
+
+    def load(self) -> Dict[str, Any]:
+        """Charge les données (et migre tickets.json lors du premier lancement)"""
+        if self._get_setting('migrated_from_json') is None:
+            self._migrate_json()
+
+        data = default_tickets_data()
+        log_channel_id = self._get_setting('log_channel_id')
+        data['log_channel_id'] = int(log_channel_id) if log_channel_id else None
+        data['transcript_format'] = self._get_setting('transcript_format') or 'txt'
+
+        for panel_id, config in self._db.execute("SELECT panel_id, data FROM ticket_configs"):
+            data['ticket_configs'][panel_id] = json.loads(config)
+
+        columns = ', '.join(TICKET_COLUMNS)
+        for row in self._db.execute(f"SELECT user_id, {columns} FROM active_tickets"):
+            ticket = {k: v for k, v in zip(TICKET_COLUMNS, row[1:]) if v is not None}
+            data['active_tickets'][str(row[0])] = ticket
+
+        stats = data['ticket_stats']
+        for name, key, count in self._db.execute("SELECT name, key, count FROM ticket_stats"):
+            if key:
+                stats.setdefault(name, {})[key] = count
+            else:
+                stats[name] = count
+
+        self.pool.clear()
+        for channel_id, panel_id, category_id in self._db.execute(
+            "SELECT channel_id, panel_id, category_id FROM ticket_pool ORDER BY created_at"
+        ):
+            self.pool.setdefault((panel_id, category_id), []).append(channel_id)
+
+        self.data = data
+        self._by_channel.clear()
+        self._by_priority.clear()
+        self._indexed.clear()
+        for user_id in data['active_tickets']:
+            self._index(user_id)
+        return data
+
+    # Index des tickets actifs
+
+    def _index(self, user_id: str) -> None:
+        self._unindex(user_id)
+        ticket = self.data['active_tickets'][user_id]
+        channel_id, priority = ticket['channel_id'], ticket.get('priority')
+        self._by_channel[channel_id] = user_id
+        self._by_priority.setdefault(priority, set()).add(user_id)
+        self._indexed[user_id] = (channel_id, priority)
+
+    def _unindex(self, user_id: str) -> None:
+        indexed = self._indexed.pop(user_id, None)
+        if indexed is None:
+            return
+        channel_id, priority = indexed
+        if self._by_channel.get(channel_id) == user_id:
+            del self._by_channel[channel_id]
+        users = self._by_priority.get(priority)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._by_priority[priority]
+
+    def ticket_by_user(self, user_id) -> Optional[Dict[str, Any]]:
+        """Ticket actif d'un utilisateur"""
+        return self.data['active_tickets'].get(str(user_id))
+
+    def ticket_by_channel(self, channel_id: int) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Retourne (user_id, ticket) pour le salon d'un ticket actif, sinon (None, None)"""
+        user_id = self._by_channel.get(channel_id)
+        if user_id is None:
+            return None, None
+        return user_id, self.data['active_tickets'][user_id]
+
+    def tickets_by_priority(self, priority: Optional[str]) -> Set[str]:
+        """user_ids des tickets actifs d'une priorité (None = non définie)"""
+        return self._by_priority.get(priority, set())
+
+    def _migrate_json(self) -> None:
+        """Importe l'ancien fichier tickets.json dans la base"""
+        legacy = {}
+        if os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, 'r') as f:
+                    legacy = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                logger.error("Erreur lors du chargement du fichier tickets.json")
+
+        data = default_tickets_data()
+        # Migration des anciennes données (une seule catégorie de tickets)
+        if 'ticket_category_id' in legacy:
+            default_config = {
+                'category_id': legacy.get('ticket_category_id'),
+                'support_role_id': legacy.get('support_role_id'),
+                'welcome_message': "Bienvenue {user} dans votre ticket!\nUn membre du staff vous répondra dès que possible."
+            }
+            if default_config['category_id'] is not None:
+                data['ticket_configs']['default'] = default_config
+
+        # Fusionner les données existantes avec la structure par défaut
+        for key in data:
+            if key in legacy:
+                data[key] = legacy[key]
+
+        with self._db:
+            for panel_id, config in data['ticket_configs'].items():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ticket_configs (panel_id, data) VALUES (?, ?)",
+                    (panel_id, json.dumps(config))
+                )
+            for user_id, ticket in data['active_tickets'].items():
+                self._db.execute(*self._ticket_upsert(user_id, ticket))
+            for name, value in data['ticket_stats'].items():
+                if isinstance(value, dict):
+                    for key, count in value.items():
+                        self._db.execute(*self._stat_upsert(name, key, count))
+                else:
+                    self._db.execute(*self._stat_upsert(name, '', value))
+            if data.get('log_channel_id'):
+                self._db.execute(*self._setting_upsert('log_channel_id', str(data['log_channel_id'])))
+            self._db.execute(*self._setting_upsert('migrated_from_json', datetime.utcnow().isoformat()))
+
+        if legacy:
+            logger.info(f"Données des tickets migrées depuis {self.legacy_path}")
+
+    def _get_setting(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # Requêtes
+
+    @staticmethod
+    def _setting_upsert(key: str, value: Optional[str]):
+        return ("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _ticket_upsert(user_id, ticket: Dict[str, Any]):
+        columns = ', '.join(('user_id',) + TICKET_COLUMNS)
+        placeholders = ', '.join('?' * (len(TICKET_COLUMNS) + 1))
+        values = (int(user_id),) + tuple(ticket.get(column) for column in TICKET_COLUMNS)
+        return (f"INSERT OR REPLACE INTO active_tickets ({columns}) VALUES ({placeholders})", values)
+
+    @staticmethod
+    def _stat_upsert(name: str, key: str, count: int):
+        return ("INSERT OR REPLACE INTO ticket_stats (name, key, count) VALUES (?, ?, ?)", (name, key, count))
+
+    # Écritures (ligne par ligne, hors de la boucle d'événements)
+
+    def _run(self, *statements) -> None:
+        with self._db:
+            for sql, params in statements:
+                self._db.execute(sql, params)
+
+    def _submit(self, *statements) -> 'asyncio.Future':
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Hors boucle (démarrage, tests) : écriture synchrone
+            self._executor.submit(self._run, *statements).result()
+            return None
+        future = loop.run_in_executor(self._executor, self._run, *statements)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        if not future.cancelled() and future.exception():
+            logger.error(f"Erreur lors de l'écriture des tickets: {future.exception()}")
+
+    def set_log_channel(self, channel_id: Optional[int]):
+        """Définit le salon des logs des tickets"""
+        self.data['log_channel_id'] = channel_id
+        return self._submit(self._setting_upsert('log_channel_id', str(channel_id) if channel_id else None))
+
+    def set_transcript_format(self, fmt: str):
+        """Définit le format des transcriptions (txt ou html)"""
+        self.data['transcript_format'] = fmt
+        return self._submit(self._setting_upsert('transcript_format', fmt))
+
+    def save_config(self, panel_id: str):
+        """Enregistre la configuration d'un panneau de tickets"""
+        config = json.dumps(self.data['ticket_configs'][panel_id])
+        return self._submit(("INSERT OR REPLACE INTO ticket_configs (panel_id, data) VALUES (?, ?)", (panel_id, config)))
+
+    def delete_config(self, panel_id: str):
+        """Supprime la configuration d'un panneau de tickets"""
+        self.data['ticket_configs'].pop(panel_id, None)
+        return self._submit(("DELETE FROM ticket_configs WHERE panel_id = ?", (panel_id,)))
+
+    def open_ticket(self, user_id: str, ticket: Dict[str, Any]):
+        """Ajoute un ticket actif"""
+        self.data['active_tickets'][user_id] = ticket
+        return self.save_ticket(user_id)
+
+    def save_ticket(self, user_id: str):
+        """Enregistre un ticket actif après modification (et met à jour les index)"""
+        self._index(user_id)
+        return self._submit(self._ticket_upsert(user_id, self.data['active_tickets'][user_id]))
+
+    def set_priority(self, user_id: str, priority: str):
+        """Change la priorité d'un ticket actif"""
+        self.data['active_tickets'][user_id]['priority'] = priority
+        return self.save_ticket(user_id)
+
+    def close_ticket(self, user_id: str, channel_name: str = None, closed_by: int = None):
+        """Retire un ticket des tickets actifs et l'ajoute à l'historique"""
+        ticket = self.data['active_tickets'].pop(user_id, None)
+        if ticket is None:
+            return None
+        self._unindex(user_id)
+        return self._submit(
+            ("DELETE FROM active_tickets WHERE user_id = ?", (int(user_id),)),
+            ("INSERT INTO closed_tickets (user_id, channel_id, channel_name, category_id, priority, created_at, closed_at, closed_by, first_response_at) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+             (int(user_id), ticket['channel_id'], channel_name, ticket.get('category_id'), ticket.get('priority'),
+              ticket.get('created_at'), datetime.utcnow().isoformat(), closed_by, ticket.get('first_response_at')))
+        )
+
+    def save_stat(self, name: str, key: str = ''):
+        """Enregistre la valeur d'un compteur de ticket_stats"""
+        value = self.data['ticket_stats'][name]
+        count = value[key] if key else value
+        return self._submit(self._stat_upsert(name, key, count))
+
+    # Statistiques
+
+    def record_event(self, channel_id: int, event: str, at: float, category_id: str = None, priority: str = None):
+        """Ajoute un événement (open, first_response, close) à l'historique des tickets"""
+        return self._submit((
+            "INSERT INTO ticket_events (channel_id, event, at, category_id, priority) VALUES (?, ?, ?, ?, ?)",
+            (channel_id, event, at, category_id, priority)
+        ))
+
+    def save_sketch(self, metric: str, category: str, priority: str, day: int, data: str):
+        return self._submit((
+            "INSERT OR REPLACE INTO ticket_sketches (metric, category, priority, day, data) VALUES (?, ?, ?, ?, ?)",
+            (metric, category, priority, day, data)
+        ))
+
+    def load_sketches(self, oldest_day: int):
+        return self._db.execute(
+            "SELECT metric, category, priority, day, data FROM ticket_sketches WHERE day >= ?", (oldest_day,)
+        ).fetchall()
+
+    def purge_sketches(self, oldest_day: int):
+        return self._submit(("DELETE FROM ticket_sketches WHERE day < ?", (oldest_day,)))
+
+    def purge_events(self, before: float):
+        """Supprime les événements antérieurs à `before` (timestamp)"""
+        return self._submit(("DELETE FROM ticket_events WHERE at < ?", (before,)))
+
+    # Réserve de salons pré-créés
+
+    def pool_channels(self, panel_id: str, category_id: str) -> List[int]:
+        """Salons en réserve d'une catégorie d'un panneau, du plus ancien au plus récent"""
+        return self.pool.get((panel_id, category_id), [])
+
+    def add_pool_channel(self, panel_id: str, category_id: str, channel_id: int):
+        """Ajoute un salon pré-créé à la réserve"""
+        self.pool.setdefault((panel_id, category_id), []).append(channel_id)
+        return self._submit((
+            "INSERT OR REPLACE INTO ticket_pool (channel_id, panel_id, category_id, created_at) VALUES (?, ?, ?, ?)",
+            (channel_id, panel_id, category_id, datetime.utcnow().isoformat())
+        ))
+
+    def take_pool_channel(self, panel_id: str, category_id: str) -> Optional[int]:
+        """Retire et retourne le plus ancien salon en réserve (None si la réserve est vide)"""
+        channels = self.pool.get((panel_id, category_id))
+        if not channels:
+            return None
+        channel_id = channels.pop(0)
+        self._submit(("DELETE FROM ticket_pool WHERE channel_id = ?", (channel_id,)))
+        return channel_id
+
+    def remove_pool_channel(self, channel_id: int):
+        """Retire un salon de la réserve (supprimé ou réserve réduite)"""
+        for channels in self.pool.values():
+            if channel_id in channels:
+                channels.remove(channel_id)
+                return self._submit(("DELETE FROM ticket_pool WHERE channel_id = ?", (channel_id,)))
+        return None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._db.close()
@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('discord')
+
+Handler = Callable[[Any], Awaitable[None]]
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS timers (
+    key TEXT PRIMARY KEY,
+    action TEXT NOT NULL,
+    due REAL NOT NULL,
+    payload TEXT
+)"""
+
+class TimerScheduler:
+    """Actions différées du bot (suppressions de messages, expirations...)
+
+    Une seule tâche dort jusqu'à la prochaine échéance d'un tas, au lieu
+    d'une coroutine endormie par action. Chaque minuteur a une clé :
+    reprogrammer une clé remplace le minuteur précédent, cancel() l'annule
+    (les entrées remplacées restent dans le tas et sont ignorées). Les
+    minuteurs sont enregistrés dans une base SQLite (écritures regroupées en
+    une transaction par un thread dédié) et reprennent au redémarrage ; ceux
+    dont l'échéance est passée pendant l'arrêt sont exécutés dès le démarrage.
+    """
+
+    def __init__(self, path: str = 'data/timers.db'):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='timers')
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._writes: List[Tuple[str, tuple]] = []
+        self._writes_lock = threading.Lock()
+        with self._db:
+            self._db.execute(SCHEMA)
+        self._handlers: Dict[str, Handler] = {}
+        self._timers: Dict[str, Tuple[str, float, Any, int]] = {}  # clé -> (action, échéance, données, n°)
+        self._heap: List[Tuple[float, int, str]] = []  # (échéance, n°, clé)
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.failed = 0
+        self.last_lag = 0.0  # Retard de la dernière action exécutée (secondes)
+        for key, action, due, payload in self._db.execute("SELECT key, action, due, payload FROM timers"):
+            self._push(key, action, due, json.loads(payload) if payload else None)
+
+    def register(self, action: str, handler: Handler) -> None:
+        """Associe une coroutine handler(payload) à un type d'action"""
+        self._handlers[action] = handler
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._timers
+
+    @property
+    def lag(self) -> float:
+        """Retard de l'échéance la plus ancienne non encore exécutée (0 si aucune)"""
+        while self._heap and self._timers.get(self._heap[0][2], (None, None, None, None))[3] != self._heap[0][1]:
+            heapq.heappop(self._heap)  # Entrée remplacée ou annulée
+        if not self._heap:
+            return 0.0
+        return max(0.0, time.time() - self._heap[0][0])
+
+    def depth(self) -> Dict[str, int]:
+        """Nombre de minuteurs en attente par action"""
+        counts: Dict[str, int] = {}
+        for action, _, _, _ in self._timers.values():
+            counts[action] = counts.get(action, 0) + 1
+        return counts
+
+    def due_at(self, key: str) -> Optional[float]:
+        timer = self._timers.get(key)
+        return timer[1] if timer else None
+
+    def _push(self, key: str, action: str, due: float, payload: Any) -> None:
+        seq = next(self._seq)
+        self._timers[key] = (action, due, payload, seq)
+        heapq.heappush(self._heap, (due, seq, key))
+
+    def schedule(self, action: str, delay: float = 0, payload: Any = None, key: str = None, at: float = None) -> str:
+        """Programme une action dans `delay` secondes (ou à la date `at`) et retourne sa clé"""
+        due = at if at is not None else time.time() + delay
+        if key is None:
+            key = f"{action}:{time.time_ns()}:{next(self._seq)}"
+        self._push(key, action, due, payload)
+        self._write(
+            "INSERT OR REPLACE INTO timers (key, action, due, payload) VALUES (?, ?, ?, ?)",
+            (key, action, due, json.dumps(payload) if payload is not None else None)
+        )
+        if self._wake is not None and self._heap[0][2] == key:
+            self._wake.set()  # Nouvelle échéance la plus proche
+        return key
+
+    def cancel(self, key: str) -> bool:
+        if self._timers.pop(key, None) is None:
+            return False
+        self._write("DELETE FROM timers WHERE key = ?", (key,))
+        return True
+
+    def _flush(self) -> None:
+        with self._writes_lock:
+            writes, self._writes = self._writes, []
+        with self._db:
+            for sql, params in writes:
+                self._db.execute(sql, params)
+
+    def _write(self, sql: str, params: tuple) -> None:
+        with self._writes_lock:
+            self._writes.append((sql, params))
+            if len(self._writes) > 1:
+                return  # Une écriture groupée est déjà programmée
+        future = self._executor.submit(self._flush)
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        if not future.cancelled() and future.exception():
+            logger.error(f"Erreur lors de l'enregistrement des minuteurs: {future.exception()}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, seq, key = heapq.heappop(self._heap)
+                timer = self._timers.get(key)
+                if timer is None or timer[3] != seq:
+                    continue  # Remplacé ou annulé
+                del self._timers[key]
+                self._write("DELETE FROM timers WHERE key = ?", (key,))
+                action, _, payload, _ = timer
+                handler = self._handlers.get(action)
+                if handler is None:
+                    logger.warning(f"Minuteur {key} ignoré : aucune action {action} enregistrée")
+                    continue
+                self.last_lag = now - due
+                asyncio.create_task(self._fire(key, handler, payload))
+
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, key: str, handler: Handler, payload: Any) -> None:
+        try:
+            await handler(payload)
+            self.fired += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Erreur lors de l'exécution du minuteur {key}: {e}")
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=True)
+        self._db.close()
@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+import html
+import io
+import re
+import tempfile
+from typing import Iterator, List, Tuple
+
+import discord
+
+SPOOL_SIZE = 1024 * 1024  # Au-delà, la transcription passe sur disque
+CHUNK_SIZE = 64 * 1024  # Taille des lectures lors du rendu et de l'archivage
+
+HTML_HEADER = (
+    "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title>"
+    "<style>body{{font-family:sans-serif;background:#36393f;color:#dcddde}}"
+    ".m{{margin:4px 0;white-space:pre-wrap}}.t{{color:#72767d}}.a{{font-weight:bold;color:#fff}}</style>"
+    "</head><body><h1>{title}</h1>\n"
+)
+HTML_FOOTER = "</body></html>\n"
+MESSAGE_START = re.compile(r"\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\] ")
+
+class Transcript:
+    """Transcription d'un salon de ticket
+
+    Les messages sont écrits au fil de l'eau, déjà encodés en UTF-8, dans un
+    fichier temporaire (en mémoire jusqu'à SPOOL_SIZE, puis sur disque).
+    parts() produit une seule fois les fichiers à envoyer, partagés par toutes
+    les destinations (MP, salon de logs...) : compression gzip ou découpage
+    automatique si la transcription dépasse la taille autorisée. Le rendu, la
+    compression et le découpage lisent le fichier par morceaux, sans jamais
+    charger toute la transcription en mémoire ; le découpage se fait sur des
+    fins de ligne (un message HTML par ligne).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.message_count = 0
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode='w+b')
+        self._parts = {}
+
+    @classmethod
+    async def from_channel(cls, channel) -> 'Transcript':
+        """Construit la transcription en parcourant l'historique page par page"""
+        transcript = cls(channel.name)
+        async for message in channel.history(limit=None, oldest_first=True):
+            transcript.add(message)
+        return transcript
+
+    @staticmethod
+    def format_message(message) -> str:
+        timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        content = message.content or ""
+        for embed in message.embeds:
+            content += f"\n[Embed: {embed.title}]"
+        for attachment in message.attachments:
+            content += f"\n[Pièce jointe: {attachment.filename}]"
+        return f"[{timestamp}] {message.author}: {content}"
+
+    def add(self, message) -> None:
+        self.add_line(self.format_message(message))
+
+    def add_line(self, line: str) -> None:
+        self._file.seek(0, io.SEEK_END)
+        if self.message_count:
+            self._file.write(b"\n")
+        self._file.write(line.encode("utf-8"))
+        self.message_count += 1
+        self._parts.clear()
+
+    @property
+    def size(self) -> int:
+        return self._file.seek(0, io.SEEK_END)
+
+    def chunks(self, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Transcription brute (texte UTF-8) lue par morceaux, telle qu'elle est archivée"""
+        return _chunks(self._file, size)
+
+    def _render_html(self, out) -> None:
+        # Un message par ligne : les sauts de ligne du contenu deviennent des entités
+        self._file.seek(0)
+        block = []
+        for line in self._file:
+            line = line.decode("utf-8").rstrip("\n")
+            # Chaque message commence par "[date] auteur: " en début de ligne
+            if block and MESSAGE_START.match(line):
+                out.write(self._html_message("\n".join(block)))
+                block = []
+            block.append(line)
+        if block:
+            out.write(self._html_message("\n".join(block)))
+
+    @staticmethod
+    def _html_message(text: str) -> bytes:
+        header, _, content = text.partition("] ")
+        author, _, content = content.partition(": ")
+        return (
+            f'<div class="m"><span class="t">{html.escape(header.lstrip("["))}</span> '
+            f'<span class="a">{html.escape(author)}</span> {html.escape(content).replace(chr(10), "&#10;")}</div>\n'
+        ).encode("utf-8")
+
+    def _build_parts(self, limit: int, fmt: str) -> List[Tuple[str, bytes]]:
+        if fmt == "html":
+            title = html.escape(f"Transcription - {self.name}")
+            prefix, suffix = HTML_HEADER.format(title=title).encode("utf-8"), HTML_FOOTER.encode("utf-8")
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode='w+b') as body:
+                self._render_html(body)
+                return self._fit(body, limit, "html", prefix, suffix)
+        return self._fit(self._file, limit, "txt", b"", b"")
+
+    def _fit(self, source, limit: int, extension: str, prefix: bytes, suffix: bytes) -> List[Tuple[str, bytes]]:
+        filename = f"transcript-{self.name}.{extension}"
+        size = len(prefix) + source.seek(0, io.SEEK_END) + len(suffix)
+
+        if size <= limit:
+            source.seek(0)
+            return [(filename, prefix + source.read() + suffix)]
+
+        # Compression par morceaux, abandonnée dès qu'elle dépasse la limite
+        compressed = io.BytesIO()
+        with gzip.GzipFile(fileobj=compressed, mode='wb') as gz:
+            gz.write(prefix)
+            for chunk in _chunks(source):
+                gz.write(chunk)
+                if compressed.tell() > limit:
+                    break
+            else:
+                gz.write(suffix)
+        if compressed.tell() <= limit:
+            return [(f"{filename}.gz", compressed.getvalue())]
+
+        # Découpage en plusieurs fichiers sur des fins de ligne (en HTML, chaque
+        # partie reçoit l'en-tête et la fin de document)
+        if extension != "html":
+            prefix = suffix = b""
+        capacity = max(limit - len(prefix) - len(suffix), 1)
+        parts = []
+        current = bytearray()
+        source.seek(0)
+        for line in source:
+            while len(line) > capacity:
+                # Ligne plus longue qu'une partie : coupée sur une frontière de caractère UTF-8
+                if current:
+                    parts.append(bytes(current))
+                    current.clear()
+                cut = capacity
+                while cut > 0 and line[cut] & 0xC0 == 0x80:
+                    cut -= 1
+                cut = cut or capacity
+                parts.append(line[:cut])
+                line = line[cut:]
+            if len(current) + len(line) > capacity:
+                parts.append(bytes(current))
+                current.clear()
+            current += line
+        if current:
+            parts.append(bytes(current))
+        total = len(parts)
+        return [
+            (f"transcript-{self.name}-{index}-{total}.{extension}", prefix + part + suffix)
+            for index, part in enumerate(parts, start=1)
+        ]
+
+    async def parts(self, limit: int, fmt: str = "txt") -> List[Tuple[str, bytes]]:
+        """Fichiers (nom, contenu) de la transcription, chacun sous `limit` octets
+
+        Le rendu, la compression et le découpage sont faits dans un thread.
+        """
+        key = (limit, fmt)
+        if key not in self._parts:
+            self._parts[key] = await asyncio.to_thread(self._build_parts, limit, fmt)
+        return self._parts[key]
+
+    def close(self) -> None:
+        self._file.close()
+        self._parts.clear()
+
+def _chunks(file, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    file.seek(0)
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+def to_files(parts: List[Tuple[str, bytes]]) -> List[discord.File]:
+    """Crée des discord.File partageant les mêmes octets (sans copie)"""
+    return [discord.File(io.BytesIO(data), filename=filename) for filename, data in parts]
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+class WarningStore:
+    """Stockage persistant des avertissements (SQLite en mode WAL)
+
+    Chaque avertissement est une ligne horodatée. L'index (member_id, created_at)
+    permet de compter les avertissements d'une fenêtre glissante sans charger
+    l'historique du membre ; les lignes expirées sont purgées par purge(),
+    programmée à l'expiration du dernier avertissement de chaque membre.
+    Les requêtes sont exécutées par un thread dédié, hors de la boucle
+    d'événements.
+    """
+
+    def __init__(self, path: str = "data/warnings.db"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='warnings')
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS warnings ("
+            " id INTEGER PRIMARY KEY,"
+            " member_id INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " reason TEXT)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_warnings_member ON warnings (member_id, created_at)"
+        )
+        self._db.commit()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _add(self, member_id: int, reason: Optional[str] = None, at: Optional[float] = None) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT INTO warnings (member_id, created_at, reason) VALUES (?, ?, ?)",
+                (member_id, time.time() if at is None else at, reason)
+            )
+
+    def _count(self, member_id: int, ttl_hours: float) -> int:
+        row = self._db.execute(
+            "SELECT COUNT(*) FROM warnings WHERE member_id = ? AND created_at >= ?",
+            (member_id, time.time() - ttl_hours * 3600)
+        ).fetchone()
+        return row[0]
+
+    def _list(self, member_id: int, ttl_hours: float) -> List[datetime]:
+        rows = self._db.execute(
+            "SELECT created_at FROM warnings WHERE member_id = ? AND created_at >= ? ORDER BY created_at",
+            (member_id, time.time() - ttl_hours * 3600)
+        ).fetchall()
+        return [datetime.fromtimestamp(created_at) for (created_at,) in rows]
+
+    def _clear(self, member_id: int) -> int:
+        with self._db:
+            cursor = self._db.execute("DELETE FROM warnings WHERE member_id = ?", (member_id,))
+        return cursor.rowcount
+
+    def _purge(self, ttl_hours: float, member_id: Optional[int] = None) -> int:
+        cutoff = time.time() - ttl_hours * 3600
+        with self._db:
+            if member_id is None:
+                cursor = self._db.execute("DELETE FROM warnings WHERE created_at < ?", (cutoff,))
+            else:
+                cursor = self._db.execute(
+                    "DELETE FROM warnings WHERE member_id = ? AND created_at < ?", (member_id, cutoff)
+                )
+        return cursor.rowcount
+
+    async def add(self, member_id: int, reason: Optional[str] = None, at: Optional[float] = None) -> None:
+        """Enregistre un avertissement pour un membre"""
+        await self._run(self._add, member_id, reason, at)
+
+    async def count(self, member_id: int, ttl_hours: float) -> int:
+        """Nombre d'avertissements du membre encore valides"""
+        return await self._run(self._count, member_id, ttl_hours)
+
+    async def list(self, member_id: int, ttl_hours: float) -> List[datetime]:
+        """Dates des avertissements du membre encore valides"""
+        return await self._run(self._list, member_id, ttl_hours)
+
+    async def clear(self, member_id: int) -> int:
+        """Supprime tous les avertissements d'un membre (expirés compris) et retourne leur nombre"""
+        return await self._run(self._clear, member_id)
+
+    async def purge(self, ttl_hours: float, member_id: Optional[int] = None) -> int:
+        """Supprime les avertissements expirés (d'un membre ou de tous les membres)"""
+        return await self._run(self._purge, ttl_hours, member_id)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._db.close()
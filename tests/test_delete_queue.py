@@ -0,0 +1,129 @@
+import asyncio
+from datetime import timedelta
+
+import aiohttp
+import discord
+import pytest
+
+from utils.delete_queue import BULK_LIMIT, BulkDeleteQueue
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "erreur"
+
+class FakeChannel:
+    def __init__(self, bulk_error=None):
+        self.id = 1
+        self.bulk_error = bulk_error
+        self.bulk_sizes = []
+        self.deleted = []
+
+    async def delete_messages(self, messages, reason=None):
+        await asyncio.sleep(0)
+        self.bulk_sizes.append(len(messages))
+        if self.bulk_error is not None:
+            raise self.bulk_error
+        self.deleted.extend(message.id for message in messages)
+
+class FakeMessage:
+    def __init__(self, message_id, channel, age=timedelta(0), error=None):
+        self.id = message_id
+        self.channel = channel
+        self.created_at = discord.utils.utcnow() - age
+        self.error = error
+
+    async def delete(self):
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        self.channel.deleted.append(self.id)
+
+def test_burst_is_deleted_in_bulk():
+    channel = FakeChannel()
+    queue = BulkDeleteQueue()
+
+    async def main():
+        first = asyncio.create_task(queue.delete(FakeMessage(0, channel)))
+        await asyncio.sleep(0)  # Salon calme : suppression immédiate en cours
+        messages = [FakeMessage(i, channel) for i in range(1, BULK_LIMIT + 51)]
+        await asyncio.gather(first, *(queue.delete(message) for message in messages))
+
+    asyncio.run(main())
+    # Le premier message part seul, ceux arrivés pendant sa suppression par paquets de BULK_LIMIT
+    assert sorted(channel.deleted) == list(range(BULK_LIMIT + 51))
+    assert queue.single_calls == 1 and channel.bulk_sizes == [BULK_LIMIT, 50]
+    assert queue.deleted == BULK_LIMIT + 51 and queue.pending == 0
+    assert queue.latency.count == BULK_LIMIT + 51
+
+def test_old_messages_are_deleted_one_by_one():
+    channel = FakeChannel()
+    queue = BulkDeleteQueue()
+
+    async def main():
+        messages = [FakeMessage(i, channel) for i in range(4)]
+        messages += [FakeMessage(i, channel, age=timedelta(days=20)) for i in range(4, 6)]
+        await asyncio.gather(*(queue.delete(message) for message in messages))
+
+    asyncio.run(main())
+    assert sorted(channel.deleted) == list(range(6))
+    assert channel.bulk_sizes == [4]
+    assert queue.single_calls == 2
+
+def test_rejected_bulk_falls_back_to_single_deletes():
+    channel = FakeChannel(bulk_error=discord.HTTPException(FakeResponse(400), "trop ancien"))
+    queue = BulkDeleteQueue()
+
+    async def main():
+        messages = [FakeMessage(i, channel) for i in range(4)]
+        messages[2].error = discord.NotFound(FakeResponse(404), "déjà supprimé")
+        await asyncio.gather(*(queue.delete(message) for message in messages))
+
+    asyncio.run(main())
+    assert sorted(channel.deleted) == [0, 1, 3]
+    assert queue.deleted == 4
+
+def test_forbidden_is_raised_to_every_caller():
+    channel = FakeChannel(bulk_error=discord.Forbidden(FakeResponse(403), "interdit"))
+    queue = BulkDeleteQueue()
+
+    async def main():
+        messages = [FakeMessage(i, channel) for i in range(3)]
+        messages[0].error = discord.Forbidden(FakeResponse(403), "interdit")
+        return await asyncio.gather(*(queue.delete(message) for message in messages), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, discord.Forbidden) for result in results)
+    assert queue.deleted == 0
+
+def test_transport_error_resolves_the_batch():
+    channel = FakeChannel(bulk_error=aiohttp.ClientConnectionError("connexion perdue"))
+    queue = BulkDeleteQueue()
+
+    async def main():
+        messages = [FakeMessage(i, channel) for i in range(3)]
+        results = await asyncio.wait_for(
+            asyncio.gather(*(queue.delete(message) for message in messages), return_exceptions=True), 1
+        )
+        # La file du salon repart normalement après l'erreur
+        channel.bulk_error = None
+        await queue.delete(FakeMessage(9, channel))
+        return results
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, aiohttp.ClientConnectionError) for result in results)
+    assert channel.deleted == [9]
+    assert queue.pending == 0
+
+def test_cancel_cancels_waiting_callers():
+    channel = FakeChannel()
+    queue = BulkDeleteQueue()
+
+    async def main():
+        tasks = [asyncio.create_task(queue.delete(FakeMessage(i, channel))) for i in range(3)]
+        await asyncio.sleep(0)
+        queue.cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,51 @@
+from utils.inactivity import InactivityIndex
+
+WARN, CLOSE = 100, 150  # Deux délais comptés depuis la dernière activité
+
+def index(thresholds=(WARN, CLOSE)):
+    return InactivityIndex(lambda channel_id: thresholds)
+
+def test_warn_then_close():
+    inactivity = index()
+    inactivity.track(1, last_activity=0)
+    assert inactivity.due(now=99) == []
+    assert inactivity.due(now=100) == [(1, 'warn')]
+    assert inactivity.due(now=149) == []
+    assert inactivity.due(now=150) == [(1, 'close')]
+    assert 1 not in inactivity
+    assert inactivity.due(now=1000) == []
+
+def test_activity_postpones_the_deadline():
+    inactivity = index()
+    inactivity.track(1, last_activity=0)
+    inactivity.touch(1, at=80)
+    assert inactivity.due(now=100) == []
+    assert inactivity.next_deadline() == 180
+    assert inactivity.due(now=180) == [(1, 'warn')]
+
+def test_activity_after_warning_resets_it():
+    inactivity = index()
+    inactivity.track(1, last_activity=0)
+    assert inactivity.due(now=100) == [(1, 'warn')]
+    inactivity.touch(1, at=120)
+    assert inactivity.due(now=150) == []
+    assert inactivity.due(now=219) == []
+    assert inactivity.due(now=220) == [(1, 'warn')]
+
+def test_forgotten_and_untracked_tickets_are_ignored():
+    inactivity = index()
+    inactivity.track(1, last_activity=0)
+    inactivity.track(2, last_activity=0)
+    inactivity.forget(1)
+    inactivity.touch(3, at=0)
+    assert inactivity.due(now=100) == [(2, 'warn')]
+    assert len(inactivity) == 1
+
+def test_disabled_thresholds_and_reschedule():
+    thresholds = {'value': None}
+    inactivity = InactivityIndex(lambda channel_id: thresholds['value'])
+    inactivity.track(1, last_activity=0)
+    assert inactivity.next_deadline() is None
+    thresholds['value'] = (WARN, CLOSE)
+    inactivity.reschedule()
+    assert inactivity.due(now=100) == [(1, 'warn')]
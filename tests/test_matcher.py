@@ -0,0 +1,45 @@
+from utils.matcher import BannedWordMatcher
+
+def test_empty_matcher_finds_nothing():
+    matcher = BannedWordMatcher()
+    assert matcher.search("n'importe quoi") is None
+    assert len(matcher) == 0
+
+def test_whole_words_only():
+    matcher = BannedWordMatcher(["hack"])
+    assert matcher.search("un hack ici") == "hack"
+    assert matcher.search("hacker") is None
+    assert matcher.search("shack") is None
+
+def test_shared_prefixes():
+    matcher = BannedWordMatcher(["hack", "hacks", "hacking", "ha"])
+    assert matcher.search("des hacks") == "hacks"
+    assert matcher.search("hacking") == "hacking"
+    assert matcher.search("ha ha") == "ha"
+    assert matcher.search("hac") is None
+
+def test_case_insensitive():
+    matcher = BannedWordMatcher(["Spam"])
+    assert matcher.search("SPAM !") == "spam"
+    assert "SPAM" in matcher
+
+def test_special_characters_are_escaped():
+    matcher = BannedWordMatcher(["a.b", "c+"])
+    assert matcher.search("a.b") == "a.b"
+    assert matcher.search("axb") is None
+
+def test_same_result_as_one_search_per_word():
+    import re
+    words = ["abc", "abd", "ab", "b", "bcd", "xyz", "xy"]
+    matcher = BannedWordMatcher(words)
+    for content in ["ab", "abc abd", "x xy xyz", "bc", "b", "zz abdx", "abd"]:
+        found = {w for w in words if re.search(rf"\b{re.escape(w)}\b", content)}
+        result = matcher.search(content)
+        assert (result in found) if found else result is None
+
+def test_rebuild_replaces_words():
+    matcher = BannedWordMatcher(["foo"])
+    matcher.rebuild(["bar", ""])
+    assert matcher.search("foo") is None
+    assert matcher.search("bar") == "bar"
+    assert len(matcher) == 1
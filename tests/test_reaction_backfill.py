@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.reaction_backfill import BackfillCheckpoints, ReactionBackfill
+
+class FakeChannel:
+    """Salon de `size` messages (ID 1 à size), historique du plus récent au plus ancien"""
+
+    def __init__(self, size, reacted=()):
+        self.id = 42
+        self.size = size
+        self.reacted = set(reacted)
+        self.calls = []
+
+    async def history(self, limit, before=None):
+        self.calls.append((limit, before.id if before else None))
+        start = (before.id - 1) if before else self.size
+        for message_id in range(start, max(start - limit, 0), -1):
+            me = message_id in self.reacted
+            yield SimpleNamespace(id=message_id, reactions=[SimpleNamespace(emoji="👍", me=me)] if me else [])
+
+def backfill(channel, checkpoints, limit, react, state=None):
+    return ReactionBackfill(channel, ["👍"], limit, react, checkpoints, state)
+
+def test_resume_keeps_the_larger_limit(tmp_path):
+    checkpoints = BackfillCheckpoints(str(tmp_path / 'react_history.json'))
+    state = {'limit': 500, 'before': 300, 'processed': 200}
+    job = backfill(FakeChannel(1000), checkpoints, 100, None, state)
+    assert job.limit == 500 and job.kept_limit and job.resumed
+    job = backfill(FakeChannel(1000), checkpoints, 800, None, state)
+    assert job.limit == 800 and not job.kept_limit
+    job = backfill(FakeChannel(1000), checkpoints, 100, None)
+    assert job.limit == 100 and not job.kept_limit and not job.resumed
+
+def test_interrupted_backfill_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / 'react_history.json')
+    channel = FakeChannel(1000, reacted={990})
+    reacted = []
+
+    async def failing_react(message, emoji):
+        if len(reacted) == 150:
+            raise RuntimeError("arrêt")
+        reacted.append(message.id)
+
+    job = backfill(channel, BackfillCheckpoints(path), 300, failing_react)
+    with pytest.raises(RuntimeError):
+        asyncio.run(job.run())
+    assert job.skipped == 1
+
+    # Le point de reprise survit à un redémarrage
+    state = BackfillCheckpoints(path).get(channel.id)
+    assert state['processed'] == 151 and state['before'] == 850
+
+    async def react(message, emoji):
+        reacted.append(message.id)
+
+    checkpoints = BackfillCheckpoints(path)
+    job = backfill(channel, checkpoints, 100, react, state)
+    asyncio.run(job.run())
+    assert job.done and job.limit == 300
+    assert channel.calls[-1] == (149, 850)
+    # Chaque message n'a reçu la réaction qu'une fois, le plus récent déjà réagi est ignoré
+    assert sorted(reacted) == [i for i in range(701, 1001) if i != 990]
+    assert checkpoints.get(channel.id) is None
+    assert BackfillCheckpoints(path).get(channel.id) is None
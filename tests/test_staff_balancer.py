@@ -0,0 +1,76 @@
+from utils.staff_balancer import StaffBalancer
+
+GUILD, ROLE = 1, 2
+
+def balancer_with(*members, track_presence=True, online=True):
+    balancer = StaffBalancer(track_presence=track_presence)
+    for member_id in members:
+        balancer.set_member(GUILD, ROLE, member_id, online)
+    return balancer
+
+def test_picks_least_loaded_online_member():
+    balancer = balancer_with(10, 11, 12)
+    balancer.add_ticket(GUILD, 10, 100, 'haute')
+    balancer.add_ticket(GUILD, 11, 101)
+    assert balancer.pick(GUILD, ROLE) == 12
+    balancer.add_ticket(GUILD, 12, 102, 'moyenne')
+    assert balancer.pick(GUILD, ROLE) == 11
+    assert balancer.pick(GUILD, ROLE, exclude=11) == 12
+
+def test_offline_members_are_skipped():
+    balancer = balancer_with(10, 11)
+    balancer.add_ticket(GUILD, 11, 100)
+    balancer.set_online(GUILD, 10, False)
+    assert balancer.pick(GUILD, ROLE) == 11
+    balancer.set_online(GUILD, 11, False)
+    assert balancer.pick(GUILD, ROLE) is None
+    balancer.set_online(GUILD, 10, True)
+    assert balancer.pick(GUILD, ROLE) == 10
+
+def test_presence_flaps_do_not_grow_the_heap():
+    balancer = balancer_with(10, 11)
+    for _ in range(1000):
+        balancer.set_online(GUILD, 10, False)
+        balancer.set_online(GUILD, 10, True)
+    assert len(balancer._heaps[(GUILD, ROLE)]) <= 2 * 2 + 8
+    assert balancer.pick(GUILD, ROLE) in (10, 11)
+
+def test_load_changes_keep_heap_bounded():
+    balancer = balancer_with(10, 11)
+    for ticket_id in range(500):
+        balancer.add_ticket(GUILD, 10, ticket_id)
+        balancer.remove_ticket(ticket_id)
+    assert len(balancer._heaps[(GUILD, ROLE)]) <= 2 * 2 + 8
+    assert balancer.load(GUILD, 10) == 0
+
+def test_remove_ticket_and_rekey():
+    balancer = balancer_with(10, 11)
+    balancer.add_ticket(GUILD, 10, 500, 'urgente')
+    balancer.rekey(500, 900)
+    assert balancer.assignee(900) == 10
+    assert balancer.assignee(500) is None
+    assert balancer.tickets(GUILD, 10) == [900]
+    assert balancer.pick(GUILD, ROLE) == 11
+    balancer.remove_ticket(900)
+    balancer.remove_ticket(900)
+    assert balancer.load(GUILD, 10) == 0
+
+def test_set_priority_updates_load():
+    balancer = balancer_with(10)
+    balancer.add_ticket(GUILD, 10, 100)
+    balancer.set_priority(100, 'urgente')
+    assert balancer.load(GUILD, 10) == 4
+
+def test_without_presence_every_member_counts_as_online():
+    balancer = balancer_with(10, 11, track_presence=False, online=False)
+    balancer.add_ticket(GUILD, 10, 100)
+    assert balancer.pick(GUILD, ROLE) == 11
+    balancer.set_online(GUILD, 11, False)
+    assert balancer.pick(GUILD, ROLE) == 11
+
+def test_removed_member_is_not_picked():
+    balancer = balancer_with(10, 11)
+    balancer.add_ticket(GUILD, 11, 100)
+    balancer.remove_member(GUILD, ROLE, 10)
+    assert balancer.pick(GUILD, ROLE) == 11
+    assert not balancer.is_tracked(GUILD, 10)
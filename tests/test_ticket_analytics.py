@@ -0,0 +1,38 @@
+import random
+
+from utils.ticket_analytics import QuantileSketch
+
+def exact_quantile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+def test_empty_sketch():
+    assert QuantileSketch().quantile(0.5) is None
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(8, 2) + 1 for _ in range(5000)]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        expected = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - expected) <= 0.02 * expected * 1.0001
+
+def test_values_below_one_second_count_as_zero():
+    sketch = QuantileSketch()
+    for value in (0, 0.5, 0.9, 100):
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert abs(sketch.quantile(1) - 100) <= 2
+
+def test_merge_and_json_round_trip():
+    a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in range(1, 500):
+        (a if value % 2 else b).add(value)
+        both.add(value)
+    a.merge(b)
+    restored = QuantileSketch.from_json(a.to_json())
+    assert restored.count == both.count
+    assert restored.bins == both.bins
+    assert restored.quantile(0.9) == both.quantile(0.9)
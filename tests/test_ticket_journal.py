@@ -0,0 +1,48 @@
+from utils.ticket_journal import TicketJournal
+
+def record(message_id, content="", embeds=(), attachments=()):
+    return {
+        'type': 'message', 'id': message_id, 'ts': "2024-01-01 12:00:00",
+        'author': "membre#0001", 'author_id': 1, 'content': content,
+        'embeds': list(embeds),
+        'attachments': [{'filename': name, 'url': f"https://cdn/{name}", 'size': 1} for name in attachments]
+    }
+
+def text(transcript):
+    return b"".join(transcript.chunks()).decode("utf-8")
+
+def test_messages_embeds_and_attachments():
+    transcript = TicketJournal.to_transcript("ticket-1", [
+        record(1, "bonjour"),
+        record(2, "voir", embeds=["Titre"], attachments=["a.png"]),
+    ])
+    assert transcript.message_count == 2
+    assert text(transcript) == (
+        "[2024-01-01 12:00:00] membre#0001: bonjour\n"
+        "[2024-01-01 12:00:00] membre#0001: voir\n[Embed: Titre]\n[Pièce jointe: a.png]"
+    )
+
+def test_archived_attachments_get_their_hash():
+    stored = {(2, "a.png"): "aaa", (2, "c.txt"): "ccc", (3, "a.png"): "ddd"}
+    transcript = TicketJournal.to_transcript("ticket-1", [
+        record(2, attachments=["a.png", "b.png", "c.txt"]),
+        record(3, attachments=["a.png"]),
+    ], stored)
+    assert text(transcript) == (
+        "[2024-01-01 12:00:00] membre#0001: \n"
+        "[Pièce jointe: a.png (sha256:aaa)]\n[Pièce jointe: b.png]\n[Pièce jointe: c.txt (sha256:ccc)]\n"
+        "[2024-01-01 12:00:00] membre#0001: \n[Pièce jointe: a.png (sha256:ddd)]"
+    )
+    assert len(stored) == 3
+
+def test_journal_replay_applies_edits(tmp_path):
+    journal = TicketJournal(str(tmp_path))
+    journal.start(10)
+    journal._append(10, record(1, "avant"))
+    journal._append(10, record(2, "autre"))
+    journal._append(10, {'type': 'edit', 'id': 1, 'content': "après"})
+    journal._append(10, {'type': 'edit', 'id': 99, 'content': "inconnu"})
+    messages, _ = journal._replay(10, 0)
+    assert [messages[i]['content'] for i in sorted(messages)] == ["après", "autre"]
+    journal.delete(10)
+    assert not journal.has_journal(10)
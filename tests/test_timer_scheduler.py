@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from utils.timer_scheduler import TimerScheduler
+
+def test_schedule_cancel_and_replace(tmp_path):
+    timers = TimerScheduler(str(tmp_path / 'timers.db'))
+    try:
+        key = timers.schedule('ping', 60, {'n': 1}, key='a')
+        assert key == 'a' and 'a' in timers
+        timers.schedule('ping', 120, {'n': 2}, key='a')
+        assert len(timers) == 1
+        assert timers.due_at('a') > time.time() + 100
+        timers.schedule('pong', 60)
+        assert timers.depth() == {'ping': 1, 'pong': 1}
+        assert timers.cancel('a')
+        assert not timers.cancel('a')
+        assert len(timers) == 1
+    finally:
+        timers.close()
+
+def test_timers_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'timers.db')
+    timers = TimerScheduler(path)
+    timers.schedule('ping', 60, {'n': 1}, key='kept')
+    timers.schedule('ping', 60, key='cancelled')
+    timers.cancel('cancelled')
+    timers.close()
+
+    timers = TimerScheduler(path)
+    try:
+        assert 'kept' in timers
+        assert 'cancelled' not in timers
+        assert timers._timers['kept'][2] == {'n': 1}
+    finally:
+        timers.close()
+
+def test_due_timers_fire_in_order(tmp_path):
+    timers = TimerScheduler(str(tmp_path / 'timers.db'))
+    fired = []
+
+    async def handler(payload):
+        fired.append(payload)
+
+    async def main():
+        timers.register('ping', handler)
+        timers.schedule('ping', 0.05, 2)
+        timers.schedule('ping', 0, 1)
+        timers.schedule('ping', 0.02, 'annulé', key='c')
+        timers.cancel('c')
+        timers.start()
+        timers.schedule('ping', 0.01, 'après démarrage')
+        await asyncio.sleep(0.2)
+        timers._task.cancel()
+
+    try:
+        asyncio.run(main())
+    finally:
+        timers.close()
+    assert fired == [1, 'après démarrage', 2]
+    assert timers.fired == 3 and len(timers) == 0
+
+def test_handler_errors_are_counted(tmp_path):
+    timers = TimerScheduler(str(tmp_path / 'timers.db'))
+
+    async def handler(payload):
+        raise RuntimeError("échec")
+
+    async def main():
+        timers.register('boom', handler)
+        timers.schedule('boom')
+        timers.schedule('inconnue')
+        timers.start()
+        await asyncio.sleep(0.05)
+        timers._task.cancel()
+
+    try:
+        asyncio.run(main())
+    finally:
+        timers.close()
+    assert timers.failed == 1 and timers.fired == 0
+    assert len(timers) == 0